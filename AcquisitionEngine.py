@@ -0,0 +1,333 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import os
+import time
+
+import numpy as np
+
+#the columns of the per position timing trace, in the order they are written out
+TIMING_FIELDS = ['stage_wait','autofocus','z_move','exposure','channel','sequence_setup','snap','readout','handoff','total']
+
+
+def channel_list(channel_settings):
+    """turn a ChannelSettings into the list of channels to acquire at each z plane
+
+    returns a list of (ch,prot_name,exposure,zoffset) tuples for every channel in use,
+    in the order they appear in channel_settings.channels
+    """
+    chans=[]
+    for ch in channel_settings.channels:
+        if channel_settings.usechannels[ch]:
+            chans.append((ch,channel_settings.prot_names[ch],
+                          channel_settings.exposure_times[ch],channel_settings.zoffsets[ch]))
+    return chans
+
+
+def zplane_offsets(zstack_settings):
+    """turn a ZstackSettings into the list of z offsets (microns) relative to the focus position"""
+    if not zstack_settings.zstack_flag:
+        return [0.0]
+    furthest_distance = zstack_settings.zstack_delta * (zstack_settings.zstack_number-1)/2.0
+    return [i*zstack_settings.zstack_delta - furthest_distance for i in range(zstack_settings.zstack_number)]
+
+
+def remaining_positions(positions,channels,zplanes,completed):
+    """drop the positions whose every channel and z plane is already in completed
+
+    keywords)
+    positions) a list of (slice_index,frame_index,x,y) tuples
+    channels) a list of (ch,prot_name,exposure,zoffset) tuples, see channel_list
+    zplanes) the list of z offsets, see zplane_offsets
+    completed) a set of (slice_index,frame_index,z_index,prot_name) frames already saved
+
+    positions with only some of their frames saved are kept, and acquired again in full
+    """
+    remaining=[]
+    for (i,j,x,y) in positions:
+        frames=[(i,j,z_index,prot_name) for z_index in range(len(zplanes)) for (ch,prot_name,exposure,zoffset) in channels]
+        if not all([frame in completed for frame in frames]):
+            remaining.append((i,j,x,y))
+    return remaining
+
+class PositionTiming():
+    """simple struct recording where the wall clock went while acquiring a single position"""
+    def __init__(self,slice_index,frame_index,x,y):
+        self.slice_index=slice_index
+        self.frame_index=frame_index
+        self.x=x
+        self.y=y
+        self.sequenced=False
+        self.times=dict([(field,0.0) for field in TIMING_FIELDS])
+
+    def add(self,field,dt):
+        self.times[field]+=dt
+
+
+class AcquisitionEngine():
+    """acquires a list of stage positions, overlapping the move to the next position with
+    the readout and save hand off of the last frame of the current one
+
+    the schedule for every position is
+        wait for stage -> wait for autofocus -> (z,exposure,channel,snap,readout,hand off)*
+    where the stage move for position i+1 is started as soon as the last exposure of position i
+    has finished, so the stage is travelling while that frame is read out and queued for saving.
+    with use_sequencing the (z,exposure,channel,snap) steps are replaced by one hardware
+    triggered sequence acquisition per position where the devices support it.
+
+    imgSrc needs to implement the imageSource interface (see imageSourceMM)
+    sink is anything with a put method (e.g. a SavePipeline) which is handed
+    (slice_index,frame_index,z_index,prot_name,path,data,ch,x,y,z) tuples
+    """
+    def __init__(self,imgSrc,sink,outdir,channels,zplanes=[0.0],map_chan=None,use_sequencing=False):
+        """
+        keywords)
+        imgSrc) the imageSource to acquire from
+        sink) where to put the acquired frames
+        outdir) the root directory for the acquisition, each channel goes in outdir/prot_name
+        channels) a list of (ch,prot_name,exposure,zoffset) tuples, see channel_list
+        zplanes) the list of z offsets to visit relative to the focus position, see zplane_offsets
+        map_chan) the channel to use for image based autofocus when there is no hardware autofocus
+        use_sequencing) whether to run the channel x z plane sequence at each position as a hardware
+        triggered sequence acquisition, when imgSrc.can_sequence says the devices support it
+
+        """
+        self.imgSrc=imgSrc
+        self.sink=sink
+        self.outdir=outdir
+        self.channels=channels
+        self.zplanes=zplanes
+        self.map_chan=map_chan
+        self.use_sequencing=use_sequencing
+        #whether the hardware can sequence a position, found out at the first position
+        self.can_sequence=None
+        self.timings=[]
+        self.moving_to=None
+        #(x,y) -> list of (x,y) points to stop at on the way there, see PathPlanner.insert_waypoints
+        self.waypoints={}
+
+    def plan_sequence(self,focusZ):
+        """precompute the list of (z_index,z,ch,prot_name,exposure) steps to take at a position
+        whose focus position is focusZ"""
+        sequence=[]
+        for z_index,dz in enumerate(self.zplanes):
+            for (ch,prot_name,exposure,zoffset) in self.channels:
+                sequence.append((z_index,focusZ+dz+zoffset,ch,prot_name,exposure))
+        return sequence
+
+    def start_move(self,x,y):
+        """turn on the autofocus and start the stage moving to x,y without waiting,
+        if there are waypoints on the way to x,y the stage is stepped through them first"""
+        self.imgSrc.set_hardware_autofocus_state(True)
+        for (wx,wy) in self.waypoints.get((x,y),[]):
+            self.imgSrc.move_stage(wx,wy)
+        self.imgSrc.start_move_stage(x,y)
+        self.moving_to=(x,y)
+
+    def wait_for_focus(self):
+        """wait for the stage to arrive and the focus to settle, returns (stage_wait,autofocus) in seconds"""
+        t0=time.time()
+        self.imgSrc.wait_for_xy()
+        t1=time.time()
+        if self.imgSrc.has_hardware_autofocus():
+            attempts=0
+            #wait till autofocus settles
+            while not self.imgSrc.is_hardware_autofocus_done():
+                attempts+=1
+                if attempts>100:
+                    print "not auto-focusing correctly.. giving up after 10 seconds"
+                    break
+            self.imgSrc.set_hardware_autofocus_state(False) #turn off autofocus
+        else:
+            score=self.imgSrc.image_based_autofocus(chan=self.map_chan)
+            print score
+        return (t1-t0,time.time()-t1)
+
+    def acquire_position(self,slice_index,frame_index,x,y,next_xy=None):
+        """acquire all channels and z planes at x,y, which should already have been started with start_move
+
+        keywords)
+        slice_index,frame_index) the indices used to name the saved frames
+        x,y) the stage position in microns
+        next_xy) an optional (x,y) tuple of the next position, the move there is started once the
+        last exposure here is over
+
+        returns a PositionTiming for this position
+        """
+        t_start=time.time()
+        timing=PositionTiming(slice_index,frame_index,x,y)
+        if self.moving_to!=(x,y):
+            self.start_move(x,y)
+        (stage_wait,autofocus)=self.wait_for_focus()
+        timing.add('stage_wait',stage_wait)
+        timing.add('autofocus',autofocus)
+        self.moving_to=None
+
+        presentZ=self.imgSrc.get_z()
+        sequence=self.plan_sequence(presentZ)
+        if self.use_sequencing:
+            steps=[(z,ch,exposure) for (z_index,z,ch,prot_name,exposure) in sequence]
+            if self.can_sequence is None:
+                self.can_sequence=self.imgSrc.can_sequence(steps)
+                if not self.can_sequence:
+                    print "devices can't sequence this acquisition, falling back to snapping each frame"
+            if self.can_sequence:
+                try:
+                    images=self.acquire_sequenced(timing,steps,presentZ,next_xy)
+                except IOError as e:
+                    #none of the frames have been handed over, so snap them all here instead
+                    print "sequence acquisition failed at section %d frame %d (%s), falling back to snapping each frame"%(slice_index,frame_index,e)
+                    self.can_sequence=False
+                    timing.sequenced=False
+                    if self.moving_to is not None:
+                        #the stage was already sent on to the next position
+                        self.start_move(x,y)
+                        (stage_wait,autofocus)=self.wait_for_focus()
+                        timing.add('stage_wait',stage_wait)
+                        timing.add('autofocus',autofocus)
+                        self.moving_to=None
+                        sequence=self.plan_sequence(self.imgSrc.get_z())
+                    #the sequence may have left the focus drive anywhere, so set it for the first frame
+                    presentZ=None
+                else:
+                    t0=time.time()
+                    for (z_index,z,ch,prot_name,exposure),data in zip(sequence,images):
+                        path=os.path.join(self.outdir,prot_name)
+                        self.sink.put((slice_index,frame_index,z_index,prot_name,path,data,ch,x,y,z,))
+                    timing.add('handoff',time.time()-t0)
+                    timing.add('total',time.time()-t_start)
+                    self.timings.append(timing)
+                    return timing
+
+        for k,(z_index,z,ch,prot_name,exposure) in enumerate(sequence):
+            t0=time.time()
+            if not z == presentZ:
+                self.imgSrc.set_z(z)
+                presentZ = z
+            t1=time.time()
+            self.imgSrc.set_exposure(exposure)
+            t2=time.time()
+            self.imgSrc.set_channel(ch)
+            t3=time.time()
+            snapped=self.imgSrc.start_snap()
+            t4=time.time()
+            #the exposure is over, so if this was the last frame, get the stage going
+            if (k==len(sequence)-1) and (next_xy is not None):
+                self.start_move(next_xy[0],next_xy[1])
+            if not snapped:
+                print "snap failed at section %d frame %d, channel %s z %d"%(slice_index,frame_index,ch,z_index)
+                continue
+            t5=time.time()
+            data=self.imgSrc.get_snapped_image()
+            t6=time.time()
+            path=os.path.join(self.outdir,prot_name)
+            self.sink.put((slice_index,frame_index,z_index,prot_name,path,data,ch,x,y,z,))
+            t7=time.time()
+            timing.add('z_move',t1-t0)
+            timing.add('exposure',t2-t1)
+            timing.add('channel',t3-t2)
+            timing.add('snap',t4-t3)
+            timing.add('readout',t6-t5)
+            timing.add('handoff',t7-t6)
+        timing.add('total',time.time()-t_start)
+        self.timings.append(timing)
+        return timing
+
+    def acquire_sequenced(self,timing,steps,presentZ=None,next_xy=None):
+        """acquire the (z,ch,exposure) steps of a precomputed sequence at the current position with a single
+        hardware triggered sequence acquisition, filling in timing as it goes, returns the list of images.
+        the hardware is set up for the first step here and timed like a snapped frame, the switches between
+        later steps are made by the hardware during the sequence and so count towards snap.
+        raises IOError if the camera doesn't deliver them all, the time spent until then stays in timing"""
+        timing.sequenced=True
+        (z,ch,exposure)=steps[0]
+        t0=time.time()
+        if not z == presentZ:
+            self.imgSrc.set_z(z)
+        t1=time.time()
+        self.imgSrc.set_exposure(exposure)
+        t2=time.time()
+        self.imgSrc.set_channel(ch)
+        t3=time.time()
+        timing.add('z_move',t1-t0)
+        timing.add('exposure',t2-t1)
+        timing.add('channel',t3-t2)
+        self.imgSrc.start_sequence(steps)
+        t4=time.time()
+        timing.add('sequence_setup',t4-t3)
+        try:
+            self.imgSrc.wait_for_sequence()
+        finally:
+            timing.add('snap',time.time()-t4)
+        #the camera is done exposing, so get the stage going
+        if next_xy is not None:
+            self.start_move(next_xy[0],next_xy[1])
+        t5=time.time()
+        try:
+            images=self.imgSrc.get_sequence_images(len(steps))
+        finally:
+            timing.add('readout',time.time()-t5)
+        return images
+
+    def run(self,positions,progress=None,waypoints=None):
+        """acquire a list of positions
+
+        keywords)
+        positions) a list of (slice_index,frame_index,x,y) tuples in the order to visit them
+        progress) an optional function called as progress(k) after the k'th position has been acquired,
+        if it returns False the acquisition is stopped
+        waypoints) an optional dictionary of (x,y) -> list of (x,y) points the stage should stop at on
+        the way to that position, e.g. to keep each step short enough to not lose the immersion oil
+
+        returns the number of positions acquired
+        """
+        if waypoints is not None:
+            self.waypoints=waypoints
+        if len(positions)==0:
+            return 0
+        (i,j,x,y)=positions[0]
+        self.start_move(x,y)
+        for k,(i,j,x,y) in enumerate(positions):
+            if k+1<len(positions):
+                next_xy=positions[k+1][2:4]
+            else:
+                next_xy=None
+            self.acquire_position(i,j,x,y,next_xy)
+            if progress is not None:
+                if not progress(k):
+                    #a move to the next position may have started, let it finish before giving back the stage
+                    if self.moving_to is not None:
+                        self.imgSrc.wait_for_xy()
+                        self.moving_to=None
+                    return k+1
+        return len(positions)
+
+    def summarize_timings(self):
+        """returns a dictionary of the mean time (seconds) spent on each field of the timing trace"""
+        if len(self.timings)==0:
+            return dict([(field,0.0) for field in TIMING_FIELDS])
+        return dict([(field,np.mean([t.times[field] for t in self.timings])) for field in TIMING_FIELDS])
+
+    def write_timing_trace(self,filename):
+        """write the per position timing trace out as a tab delimited text file, times in milliseconds"""
+        f = open(filename, 'w')
+        f.write("Slice\tFrame\tX\tY\tSequenced\t" + "\t".join(TIMING_FIELDS) + "\n")
+        for t in self.timings:
+            f.write("%d\t%d\t%f\t%f\t%d\t"%(t.slice_index,t.frame_index,t.x,t.y,t.sequenced))
+            f.write("\t".join(["%.1f"%(1000*t.times[field]) for field in TIMING_FIELDS]) + "\n")
+        f.close()
@@ -0,0 +1,248 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import time
+import ctypes
+import Queue
+import multiprocessing as mp
+
+import numpy as np
+
+from CutoutAlignment import correlation_shift, sift_shift
+
+STOP_TOKEN = 'STOP!!!'
+
+#the alignments a worker can run, each called as aligner(one_cut,two_cut,*params)
+ALIGNERS = {'corr':correlation_shift,
+            'sift':sift_shift}
+
+
+def alignment_process(buffers, jobs, results, stop_token, cancelled):
+    """body of a worker process, pulls (job_id,slot,shapes,dtype,method,params,data) work items off jobs,
+    aligns the pair of cutouts in them and puts (job_id,slot,result) on results
+
+    keywords)
+    buffers) the list of shared memory buffers the pairs of cutouts are handed over in
+    jobs) the work queue shared by all the workers
+    results) the queue to put the results on, result is None if the job was cancelled or failed
+    stop_token) the item which tells this worker to quit
+    cancelled) event which is set while the jobs already queued should be skipped
+
+    """
+    while True:
+        item = jobs.get()
+        if item == stop_token:
+            return
+        (job_id,slot,(shape1,shape2),dtype,method,params,data) = item
+        result = None
+        if not cancelled.is_set():
+            if slot is not None:
+                n1 = int(np.prod(shape1))
+                n2 = int(np.prod(shape2))
+                flat = np.frombuffer(buffers[slot], dtype=dtype, count=n1+n2)
+                data = (flat[:n1].reshape(shape1),flat[n1:].reshape(shape2))
+            try:
+                result = ALIGNERS[method](data[0],data[1],*params)
+            except Exception as e:
+                print "alignment of job %s failed: %s"%(job_id,e)
+        data = None
+        results.put((job_id,slot,result))
+
+
+class AlignmentPool():
+    """a pool of worker processes aligning pairs of cutouts, fed through a fixed number of shared memory buffers
+
+    the pair of cutouts is copied into a free shared buffer and only a small description of it is pickled
+    through the work queue, the same way SavePipeline hands frames to its writers.  the buffers are only
+    handed out and taken back in the process which owns the pool, so at most one job per buffer is ever
+    waiting, and results come back in whatever order the workers finish them.
+    """
+    def __init__(self, pair_bytes, num_workers=None, num_buffers=None):
+        """
+        keywords)
+        pair_bytes) the size in bytes of the largest pair of cutouts expected, larger pairs
+        are pickled through the queue instead of going through a shared buffer
+        num_workers) how many worker processes to run, defaults to one less than the number of cores
+        num_buffers) how many pairs can be waiting to be aligned at once, defaults to twice the number of workers
+
+        """
+        if num_workers is None:
+            num_workers = max(mp.cpu_count()-1,1)
+        if num_buffers is None:
+            num_buffers = 2*num_workers
+        self.pair_bytes = pair_bytes
+        self.num_workers = num_workers
+        self.buffers = [mp.RawArray(ctypes.c_char, pair_bytes) for i in range(num_buffers)]
+        self.free_slots = range(num_buffers)
+        self.jobs = mp.Queue()
+        self.results = mp.Queue()
+        self.cancelled = mp.Event()
+        #the job_ids of the jobs submitted whose results have not been collected
+        self.pending = []
+        self.workers = []
+
+    def start(self):
+        """start up the worker processes"""
+        for i in range(self.num_workers):
+            worker = mp.Process(target=alignment_process,
+                                args=(self.buffers,self.jobs,self.results,STOP_TOKEN,self.cancelled))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def is_running(self):
+        return len(self.workers) > 0
+
+    def has_free_slot(self):
+        return len(self.free_slots) > 0
+
+    def workers_alive(self):
+        """whether every worker process is still running"""
+        return all([worker.is_alive() for worker in self.workers])
+
+    def abort(self):
+        """terminate the workers and start afresh without them, for when one of them has died and the jobs
+        it had can never come back, returns the job_ids of the jobs which were outstanding
+
+        a worker killed while it held one of the queues can leave it unusable, so new queues are made, and
+        start has to be called again before submitting more jobs
+        """
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self.workers = []
+        failed = self.pending
+        self.pending = []
+        self.free_slots = range(len(self.buffers))
+        self.jobs = mp.Queue()
+        self.results = mp.Queue()
+        self.cancelled.clear()
+        return failed
+
+    def submit(self, job_id, one_cut, two_cut, method='corr', params=()):
+        """hand a pair of cutouts over to be aligned, using a shared buffer if one is free
+
+        keywords)
+        job_id) returned along with the result to identify the job, anything picklable which can be compared with ==
+        one_cut) the cutout around the point that should be fixed
+        two_cut) the cutout around the point that should be moved
+        method) which of ALIGNERS to align them with
+        params) the further arguments the aligner takes
+
+        """
+        dtype = np.result_type(one_cut,two_cut)
+        one_cut = np.ascontiguousarray(one_cut,dtype=dtype)
+        two_cut = np.ascontiguousarray(two_cut,dtype=dtype)
+        shapes = (one_cut.shape,two_cut.shape)
+        self.pending.append(job_id)
+        if one_cut.nbytes+two_cut.nbytes > self.pair_bytes or len(self.free_slots) == 0:
+            self.jobs.put((job_id,None,shapes,dtype.str,method,params,(one_cut,two_cut)))
+            return
+        slot = self.free_slots.pop()
+        shared = np.frombuffer(self.buffers[slot], dtype=dtype, count=one_cut.size+two_cut.size)
+        shared[:one_cut.size] = one_cut.ravel()
+        shared[one_cut.size:] = two_cut.ravel()
+        self.jobs.put((job_id,slot,shapes,dtype.str,method,params,None))
+
+    def get_result(self, timeout=None):
+        """wait for the next result to come back, returns (job_id,result), or None if timeout (sec) passes first"""
+        try:
+            (job_id,slot,result) = self.results.get(True,timeout)
+        except Queue.Empty:
+            return None
+        if slot is not None:
+            self.free_slots.append(slot)
+        self.pending.remove(job_id)
+        return (job_id,result)
+
+    def cancel(self):
+        """skip every job which is still waiting, align will stop handing out new ones"""
+        self.cancelled.set()
+
+    def drain(self, poll=0.05):
+        """wait for every outstanding job to come back, dropping the results, and clear any cancellation,
+        checking every poll seconds that the workers are still running and aborting the pool if not"""
+        self.cancel()
+        while len(self.pending) > 0:
+            if self.get_result(poll) is None and not self.workers_alive():
+                print "an alignment worker stopped unexpectedly, abandoning %d jobs"%len(self.pending)
+                self.abort()
+        self.cancelled.clear()
+
+    def align(self, jobs, idle=None, poll=0.05):
+        """align a sequence of pairs of cutouts, yielding the results as they come back
+
+        only as many pairs as there are shared buffers are cut out and waiting at any one time,
+        so the pairs can be produced lazily, e.g. by a generator cutting them out of the mosaic
+
+        keywords)
+        jobs) an iterable of (job_id,one_cut,two_cut,method,params) tuples
+        idle) a function to call every poll seconds while waiting for results, e.g. to keep a GUI responsive
+        and let the user cancel, it may call cancel()
+        poll) how often (sec) to call idle
+
+        yields (job_id,result) in the order the jobs finish, result being what the aligner returned, or None
+        if it failed.  after cancel() no further jobs are started, and the ones already handed over are dropped.
+        if a worker dies the pool is aborted, None is yielded for each job which was outstanding and no further
+        jobs are started, see abort
+
+        """
+        jobs = iter(jobs)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and not self.cancelled.is_set() and self.has_free_slot():
+                    try:
+                        (job_id,one_cut,two_cut,method,params) = jobs.next()
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    self.submit(job_id,one_cut,two_cut,method,params)
+                if len(self.pending) == 0 or self.cancelled.is_set():
+                    break
+                item = self.get_result(poll)
+                if item is None:
+                    if not self.workers_alive():
+                        print "an alignment worker stopped unexpectedly, failing %d jobs"%len(self.pending)
+                        for job_id in self.abort():
+                            yield (job_id,None)
+                        break
+                    if idle is not None:
+                        idle()
+                    continue
+                yield item
+        finally:
+            self.drain()
+
+    def close(self, timeout=None):
+        """stop the worker processes once they have finished what has been queued
+
+        keywords)
+        timeout) how long (sec) to wait for each worker before terminating it, None waits forever
+
+        """
+        self.drain()
+        for worker in self.workers:
+            self.jobs.put(STOP_TOKEN)
+        for worker in self.workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                print "alignment worker did not finish in time, terminating it"
+                worker.terminate()
+        self.workers = []
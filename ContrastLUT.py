@@ -0,0 +1,115 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+"""mapping 16 bit camera images to 8 bits for display through cached lookup tables"""
+from collections import OrderedDict
+
+import numpy as np
+
+#how many lookup tables to keep around, each is 64KB for 16 bit images
+MAX_LUTS = 32
+
+_luts = OrderedDict()
+
+
+def make_lut(display_min, display_max, bit_depth=16):
+    """the uint8 lookup table taking pixel values display_min..display_max linearly onto 0..255,
+    values outside that range saturate"""
+    values = np.arange(2**bit_depth,dtype=np.int64)
+    np.clip(values,display_min,display_max,out=values)
+    values -= display_min
+    values *= 256
+    values //= (display_max-display_min+1)
+    return values.astype(np.uint8)
+
+
+def get_lut(display_min, display_max, bit_depth=16):
+    """make_lut, remembering the most recently used MAX_LUTS tables"""
+    key = (int(display_min),int(display_max),int(bit_depth))
+    if key in _luts:
+        lut = _luts.pop(key)
+    else:
+        lut = make_lut(*key)
+        if len(_luts) >= MAX_LUTS:
+            _luts.popitem(last=False)
+    _luts[key] = lut
+    return lut
+
+
+def apply_lut(image, display_min, display_max, bit_depth=16, out=None):
+    """map an integer image to uint8 for display
+
+    keywords)
+    image) the 2d array of integer pixels
+    display_min) the value shown as black
+    display_max) the value shown as white
+    bit_depth) the bit depth of the camera, values beyond it are shown as white
+    out) a uint8 array the shape of image to write into, allocated if None
+
+    returns out
+    """
+    lut = get_lut(display_min,display_max,bit_depth)
+    if out is None:
+        out = np.empty(image.shape,np.uint8)
+    #mode clip both saturates stray values past the bit depth and lets take write straight into out
+    np.take(lut,image,out=out,mode='clip')
+    return out
+
+
+def auto_levels(image, saturated=0.35, step=4, bit_depth=16):
+    """the (min,max) display range leaving saturated percent of the pixels black and white each,
+    from a histogram of every step'th pixel in each direction"""
+    sample = image[::step,::step]
+    counts = np.bincount(np.clip(sample,0,2**bit_depth-1).ravel())
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    lower = int(np.searchsorted(cumulative,total*saturated/100.0,side='right'))
+    upper = int(np.searchsorted(cumulative,total*(1-saturated/100.0),side='left'))
+    if upper <= lower:
+        upper = lower+1
+    return (lower,upper)
+
+
+class ContrastMapper():
+    """turns a stream of camera frames into 8 bit images without allocating, for the live view
+
+    keeps nbuffers output buffers and cycles through them, so the frame handed to the display is not
+    overwritten until nbuffers-1 more have been converted
+    """
+    def __init__(self, bit_depth=16, nbuffers=2):
+        self.bit_depth = bit_depth
+        self.nbuffers = nbuffers
+        self.buffers = []
+        self.next = 0
+        self.levels = (0,2**bit_depth-1)
+
+    def get_buffer(self, shape):
+        if len(self.buffers) == 0 or self.buffers[0].shape != shape:
+            self.buffers = [np.empty(shape,np.uint8) for k in range(self.nbuffers)]
+            self.next = 0
+        buf = self.buffers[self.next]
+        self.next = (self.next+1) % self.nbuffers
+        return buf
+
+    def convert(self, image, display_min=None, display_max=None, auto=False):
+        """map image to uint8, with the given levels, auto levels or the last levels used"""
+        if auto:
+            self.levels = auto_levels(image,bit_depth=self.bit_depth)
+        elif display_min is not None and display_max is not None:
+            self.levels = (display_min,display_max)
+        return apply_lut(image,self.levels[0],self.levels[1],self.bit_depth,out=self.get_buffer(image.shape))
@@ -0,0 +1,606 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+"""the calculations for aligning a pair of cutouts around two points, one to be held fixed and the other
+to be moved, kept free of any display so that they can also run in the worker processes of AlignmentPool"""
+from bisect import bisect_right
+
+import numpy as np
+import cv2
+import ransac
+import fft_xcorr
+from skimage.feature.register_translation import _upsampled_dft
+
+#the least half side of the square around a correlation peak which is left out of its sidelobe
+PEAK_EXCLUSION = 5
+#how many half widths at half height of the main lobe of a peak the square reaches, see main_lobe_radius.
+#a repeat of the pattern one period away is still outside it, as the half width of a periodic peak is about a quarter period
+LOBE_HALF_WIDTHS = 3
+#the peak to sidelobe ratio above which a peak counts as fully distinct in CorrelationQuality.score
+PSR_GOOD = 10.0
+#Lowe's ratio test, a feature's nearest match has to be closer than this fraction of the distance to the second nearest
+MATCH_RATIO = 0.9
+#how many descriptors match_features compares against all the others at a time, which bounds its memory
+MATCH_CHUNK = 512
+#the least side of the full resolution windows the pyramid searches refine their shift to a fraction of a pixel on
+PYRAMID_REFINE_DIM = 256
+
+
+class CorrelationQuality():
+    """how far to trust the peak of a correlation matrix, worked out from the matrix itself
+
+    psr) the peak to sidelobe ratio, how many standard deviations of the matrix away from the peak
+    the peak stands above its mean, the square covering the main lobe of the peak (see main_lobe_radius) being left out
+    second_peak) the highest value outside that square as a fraction of the peak, near 1 when there are
+    two equally good shifts, as with a repetitive pattern
+    sharpness) how far the peak stands above its 8 neighbours, as a fraction of the peak
+    overlap) the fraction of the cutouts which overlap once shifted
+    """
+    def __init__(self,corrval,psr,second_peak,sharpness,overlap):
+        self.corrval=corrval
+        self.psr=psr
+        self.second_peak=second_peak
+        self.sharpness=sharpness
+        self.overlap=overlap
+
+    def score(self):
+        """a confidence between 0 and 1 combining how distinct and unique the peak is and how much the
+        cutouts overlap, which unlike the correlation itself doesn't drop just because a section has little contrast"""
+        return min(self.psr/PSR_GOOD,1.0)*(1.0-self.second_peak)*self.overlap
+
+    def passes(self,corr_thresh,score_thresh=0):
+        """whether to accept the alignment, by the score if score_thresh is more than 0 and otherwise by the correlation"""
+        if score_thresh > 0:
+            return self.score() > score_thresh
+        return self.corrval > corr_thresh
+
+    def __str__(self):
+        return "corr %.2f, psr %.1f, second peak %.2f, sharpness %.2f, overlap %.2f, score %.2f"%(self.corrval,self.psr,
+               self.second_peak,self.sharpness,self.overlap,self.score())
+
+
+#what an alignment which couldn't be calculated scores
+FAILED_QUALITY = CorrelationQuality(0.0,0.0,1.0,0.0,0.0)
+
+
+def cross_correlation_shift(fixed_cutout, to_shift_cutout, upsample_factor=1, fixed_spectrum=None):
+    '''
+    :param one_cut: cutout around point 1
+    :param two_cut: cutout around point 2
+    :param upsample_factor: refine the shift to 1/upsample_factor of a pixel with refine_shift, 1 for whole pixels
+    :param fixed_spectrum: the half spectrum of fixed_cutout from fft_xcorr if the caller already has it
+    :return: corrmatt, corval, dx_pix, dy_pix
+    '''
+    f1 = np.std(fixed_cutout)
+    f2 = np.std(to_shift_cutout)
+    normfactor = f1*f2*fixed_cutout.size
+    #the cutout around point 1 is often the same as last time, so its spectrum is kept by the plan
+    plan = fft_xcorr.get_plan(fixed_cutout.shape)
+    if fixed_spectrum is None:
+        src_freq = plan.fixed_spectrum(fixed_cutout)
+    else:
+        src_freq = fixed_spectrum
+    target_freq = plan.forward(to_shift_cutout)
+    corrmat = plan.correlate(src_freq,target_freq)
+    corrmat = np.fft.fftshift(corrmat/normfactor)
+    #find the peak of the matrix
+    maxind=corrmat.argmax()
+    (h,w)=corrmat.shape
+    #determine the indices of that peak
+    (max_i,max_j)=np.unravel_index(maxind,corrmat.shape)
+
+    #calculate the shift for that index in pixels
+    dy_pix=int((max_i-(h/2)))
+    dx_pix=int((max_j-(w/2)))
+
+    #calculate what the maximal correlation was
+    corrval=corrmat.max()
+
+    if upsample_factor > 1:
+        image_product = full_spectrum(src_freq*target_freq.conj(),w)
+        (dx_pix,dy_pix)=refine_shift(image_product,dx_pix,dy_pix,upsample_factor)
+
+    return corrmat, corrval, dx_pix, dy_pix
+
+
+def batch_cross_correlation_shift(fixed_stack, to_shift_stack, upsample_factor=1):
+    '''
+    the same calculation as cross_correlation_shift, for a stack of equally sized pairs of cutouts at once
+    :param fixed_stack: N x h x w array of the cutouts around the points that stay fixed
+    :param to_shift_stack: N x h x w array of the cutouts around the points to be moved
+    :param upsample_factor: refine the shifts to 1/upsample_factor of a pixel with refine_shift, 1 for whole pixels
+    :return: corrvals, dx_pix, dy_pix, qualities, arrays with one entry per pair and a list of CorrelationQuality
+    '''
+    (n,h,w) = fixed_stack.shape
+    normfactor = np.std(fixed_stack,axis=(1,2))*np.std(to_shift_stack,axis=(1,2))*h*w
+    #the whole stack is transformed over its last two axes in one go
+    plan = fft_xcorr.get_plan(fixed_stack.shape)
+    src_freq = plan.forward(fixed_stack)
+    target_freq = plan.forward(to_shift_stack)
+    corrmats = plan.correlate(src_freq,target_freq).reshape(n,h*w)
+    #find the peak of each matrix
+    maxinds = corrmats.argmax(axis=1)
+    corrvals = corrmats[np.arange(n),maxinds]/normfactor
+    (max_i,max_j) = np.unravel_index(maxinds,(h,w))
+
+    #the shift for that index in pixels, as if the matrices had been fftshifted
+    dy_pix = (max_i+h/2)%h-h/2
+    dx_pix = (max_j+w/2)%w-w/2
+    qualities = batch_correlation_quality(corrmats.reshape(n,h,w),max_i,max_j,corrvals,dx_pix,dy_pix,w)
+
+    if upsample_factor > 1:
+        refined = [refine_shift(full_spectrum(src_freq[k]*target_freq[k].conj(),w),dx_pix[k],dy_pix[k],upsample_factor)
+                   for k in range(n)]
+        dx_pix = np.array([dx for (dx,dy) in refined])
+        dy_pix = np.array([dy for (dx,dy) in refined])
+
+    return corrvals, dx_pix, dy_pix, qualities
+
+
+def overlap_fraction(dx_pix, dy_pix, dim):
+    '''
+    :param dx_pix, dy_pix: the shift between two dim x dim cutouts, scalars or arrays
+    :return: the fraction of each cutout which the other covers once shifted
+    '''
+    return np.clip(1.0-np.abs(dx_pix)/float(dim),0,1)*np.clip(1.0-np.abs(dy_pix)/float(dim),0,1)
+
+
+def main_lobe_radius(corrmats, max_i, max_j, peaks, means):
+    '''
+    how far the main lobe of each peak reaches, which on a smooth texture is many pixels, so that what is
+    left outside it is the rest of the matrix rather than the shoulder of the peak
+    :param corrmats: N x h x w array of correlation matrices
+    :param max_i, max_j: arrays of the row and column of the peak of each matrix
+    :param peaks, means: arrays of the value at each peak and the mean of each matrix
+    :return: array of LOBE_HALF_WIDTHS times the distance along the row or column through each peak at which its
+    matrix first falls halfway from the peak to the mean, at least PEAK_EXCLUSION and at most a quarter of the matrix
+    '''
+    (n,h,w) = corrmats.shape
+    reach = max(min(h,w)//4,PEAK_EXCLUSION)
+    steps = np.arange(1,reach+1)
+    half = ((peaks+means)/2.0)[:,np.newaxis]
+    k = np.arange(n)[:,np.newaxis]
+    i = max_i[:,np.newaxis]
+    j = max_j[:,np.newaxis]
+    half_width = np.zeros(n,np.int)
+    for profile in [corrmats[k,(i+steps)%h,j],corrmats[k,(i-steps)%h,j],corrmats[k,i,(j+steps)%w],corrmats[k,i,(j-steps)%w]]:
+        below = profile < half
+        half_width = np.maximum(half_width,np.where(below.any(axis=1),below.argmax(axis=1)+1,reach))
+    return np.clip(LOBE_HALF_WIDTHS*half_width,PEAK_EXCLUSION,reach)
+
+
+def batch_correlation_quality(corrmats, max_i, max_j, corrvals, dx_pix, dy_pix, dim):
+    '''
+    the CorrelationQuality of each of a stack of correlation matrices, using only sums over the matrices and
+    the square covering the main lobe of each peak, the matrices may be fftshifted or not and needn't be normalised
+    :param corrmats: N x h x w array of correlation matrices, whose values are put back as they were when done
+    :param max_i, max_j: arrays of the row and column of the peak of each matrix
+    :param corrvals: the normalised correlation at each peak
+    :param dx_pix, dy_pix: the shift found from each matrix
+    :param dim: the side of the cutouts that were correlated, for the overlap
+    :return: a list of CorrelationQuality, one per matrix
+    '''
+    (n,h,w) = corrmats.shape
+    max_i = np.asarray(max_i)
+    max_j = np.asarray(max_j)
+    flat = corrmats.reshape(n,h*w)
+    peaks = corrmats[np.arange(n),max_i,max_j]
+    radius = main_lobe_radius(corrmats,max_i,max_j,peaks,flat.mean(axis=1))
+    #the square around each peak big enough for the widest lobe, wrapping around the edges as the correlation does,
+    #and which of it is inside the lobe of each matrix
+    r = radius.max()
+    offsets = np.arange(-r,r+1)
+    rows = (np.reshape(max_i,(n,1))+offsets)%h
+    cols = (np.reshape(max_j,(n,1))+offsets)%w
+    index = (np.arange(n)[:,np.newaxis,np.newaxis],rows[:,:,np.newaxis],cols[:,np.newaxis,:])
+    square = corrmats[index]
+    near = np.abs(offsets)[np.newaxis,:]<=radius[:,np.newaxis]
+    inside = near[:,:,np.newaxis]&near[:,np.newaxis,:]
+    lobe = np.where(inside,square,0)
+
+    #the mean and standard deviation of everything outside the lobe
+    nside = np.maximum(h*w-(2*radius+1)**2,1)
+    mean = (flat.sum(axis=1)-lobe.sum(axis=(1,2)))/nside
+    var = (np.einsum('ij,ij->i',flat,flat)-np.einsum('ijk,ijk->i',lobe,lobe))/nside-mean*mean
+    psr = (peaks-mean)/np.sqrt(np.maximum(var,1e-12*np.abs(peaks)**2+1e-30))
+
+    #blank out the lobe to find the highest point outside it
+    corrmats[index] = np.where(inside,-np.inf,square)
+    second = corrmats.reshape(n,h*w).max(axis=1)
+    corrmats[index] = square
+    second_peak = np.clip(np.where(np.isfinite(second),second,0)/np.maximum(peaks,1e-30),0,1)
+
+    centre = square[:,r-1:r+2,r-1:r+2]
+    neighbours = (centre.sum(axis=(1,2))-peaks)/8.0
+    sharpness = np.clip(1.0-neighbours/np.maximum(peaks,1e-30),0,1)
+
+    overlap = overlap_fraction(dx_pix,dy_pix,dim)*np.ones(n)
+    return [CorrelationQuality(float(corrvals[k]),float(psr[k]),float(second_peak[k]),float(sharpness[k]),float(overlap[k]))
+            for k in range(n)]
+
+
+def correlation_quality(corrmat, corrval, dx_pix, dy_pix, dim):
+    '''
+    the CorrelationQuality of a single correlation matrix, as from cross_correlation_shift
+    :param corrmat: the correlation matrix, its values are put back as they were when done
+    :param corrval: the normalised correlation at its peak
+    :param dx_pix, dy_pix: the shift found
+    :param dim: the side of the cutouts that were correlated, for the overlap
+    :return: CorrelationQuality
+    '''
+    (max_i,max_j) = np.unravel_index(corrmat.argmax(),corrmat.shape)
+    return batch_correlation_quality(corrmat[np.newaxis],np.array([max_i]),np.array([max_j]),[corrval],
+                                     dx_pix,dy_pix,dim)[0]
+
+
+def full_spectrum(half_spectrum, w):
+    '''
+    the full spectrum of a real image from the half of it np.fft.rfft2 returns, using X[i,j] = conj(X[-i,-j])
+    :param half_spectrum: h x (w/2+1) array from np.fft.rfft2
+    :param w: the width of the image
+    :return: the h x w spectrum np.fft.fft2 would have returned
+    '''
+    h = half_spectrum.shape[0]
+    full = np.empty((h,w),dtype=half_spectrum.dtype)
+    full[:,:half_spectrum.shape[1]] = half_spectrum
+    cols = np.arange(half_spectrum.shape[1],w)
+    full[:,cols] = np.conj(half_spectrum[(-np.arange(h))%h][:,w-cols])
+    return full
+
+
+def refine_shift(image_product, dx_pix, dy_pix, upsample_factor):
+    '''
+    refine a whole pixel shift found by cross correlation to 1/upsample_factor of a pixel, by working out the
+    upsampled cross correlation with a matrix multiply DFT only in the 1.5 pixel neighbourhood of the peak,
+    as skimage's register_translation does, rather than taking an FFT upsample_factor times the size
+    :param image_product: the h x w cross power spectrum, the fixed spectrum times the conjugate of the moved one
+    :param dx_pix, dy_pix: the whole pixel shift at the peak of the cross correlation
+    :param upsample_factor: how many parts to divide a pixel into
+    :return: dx_pix, dy_pix refined
+    '''
+    upsampled_region_size = int(np.ceil(upsample_factor*1.5))
+    #the peak is expected in the middle of the region
+    dftshift = np.fix(upsampled_region_size/2.0)
+    sample_region_offset = dftshift-np.array([dy_pix,dx_pix],dtype=np.float64)*upsample_factor
+    corr = _upsampled_dft(image_product.conj(),upsampled_region_size,upsample_factor,sample_region_offset).conj()
+    (max_i,max_j) = np.unravel_index(np.argmax(corr.real),corr.shape)
+    dy_pix = dy_pix+(max_i-dftshift)/float(upsample_factor)
+    dx_pix = dx_pix+(max_j-dftshift)/float(upsample_factor)
+    return (dx_pix,dy_pix)
+
+
+def get_faster_pixel_dimension(current_dimension):
+    '''
+    Uses a list of pre-calculated dimensions to cut the image size down
+    to one that is faster for np.fft.fftn(). Dimensions are all integers of the form
+    k*2^n for small k.
+    :param current_dimension:
+    :return: new dimension
+    '''
+    better_dimensions = [80,   84,   88,   92,   96,  104,  110,  112,  120,  128,  130,
+    132,  136,  140,  152,  156,  160,  168,  176,  184,  192,  208,
+    220,  224,  240,  256,  260,  264,  272,  280,  304,  312,  320,
+    336,  352,  368,  384,  416,  440,  448,  480,  512,  520,  528,
+    544,  560,  608,  624,  640,  672,  704,  736,  768,  832,  880,
+    896,  960, 1024, 1040, 1056, 1088, 1120, 1216, 1248, 1280, 1344,
+    1408, 1472, 1536, 1664, 1760, 1792, 1920, 2048]
+
+    pos = bisect_right(better_dimensions, current_dimension)-1
+    return better_dimensions[pos]
+
+
+def get_central_region(cutout,dim):
+    '''
+
+    :param cutout: a 2d numpy array, could be non square
+    :param dim: an integer dimensional
+    :return: cutout_central, the central dim x dim region of cutout
+    '''
+    cut_height = cutout.shape[0]-dim
+    cut_width = cutout.shape[1]-dim
+    top_pix = int(np.floor(cut_height/2.0))
+    left_pix = int(np.floor(cut_width/2.0))
+    cutout_central = cutout[top_pix:top_pix+dim,left_pix:left_pix+dim]
+    return  cutout_central
+
+
+def fix_cutout_size(cutout1,cutout2):
+    '''
+
+    :param cutout1,2: two 2d numpy array representing a windowed cutouts around a point of interest,
+    should be in the range of 100-2048 pixels in height/width
+    :return: cutout1_fix,cutout2_fix: the a 2d numpy arrays that are square, and have been cropped to be of a size
+    that will be relatively fast to calculate a 2d FFT of.
+    '''
+    min_dim = min(cutout1.shape[0],cutout1.shape[1],cutout2.shape[0],cutout2.shape[1])
+    new_dim = get_faster_pixel_dimension(min_dim)
+
+    cutout1_fix = get_central_region(cutout1,new_dim)
+    cutout2_fix = get_central_region(cutout2,new_dim)
+
+    return (cutout1_fix,cutout2_fix)
+
+
+def block_mean(image, factor):
+    '''
+    downsample an image, or a stack of them, by averaging factor x factor blocks of its last two axes,
+    dropping the rows and columns left over at the bottom and right
+    :param image: h x w or N x h x w array
+    :param factor: the integer side of the blocks
+    :return: the downsampled float64 array
+    '''
+    if factor == 1:
+        return np.asarray(image,dtype=np.float64)
+    h = image.shape[-2]/factor
+    w = image.shape[-1]/factor
+    blocks = image[...,:h*factor,:w*factor].reshape(image.shape[:-2]+(h,factor,w,factor))
+    return blocks.mean(axis=(-3,-1),dtype=np.float64)
+
+
+def pyramid_schedule(dim, levels, fine_dim):
+    '''
+    the levels pyramid_correlation_shift works through for square cutouts of side dim
+    :param dim: the side of the cutouts in pixels
+    :param levels: the number of times to halve the resolution for the coarsest level
+    :param fine_dim: the side of the windows used at the finer levels, in pixels of that level
+    :return: a list of (factor,size) from coarsest to finest, the level being downsampled by factor and
+    correlating size x size full resolution pixels, the whole cutout at the coarsest level
+    '''
+    schedule = []
+    for level in range(levels,-1,-1):
+        factor = 2**level
+        size = dim/factor*factor
+        if level < levels:
+            size = min(fine_dim*factor,size)
+        schedule.append((factor,size))
+    return schedule
+
+
+def pyramid_window(cutout, size, dx_pix, dy_pix):
+    '''
+    the size x size window of a square cutout, or stack of them, centred dx_pix,dy_pix away from its centre,
+    as near as it gets without leaving the cutout
+    :param cutout: dim x dim or N x dim x dim array
+    :param size: the side of the window in pixels
+    :param dx_pix, dy_pix: where to centre the window, relative to the central size x size region
+    :return: window, (ox,oy) the whole pixel offset of the window from the central region
+    '''
+    dim = cutout.shape[-1]
+    top = (dim-size)/2
+    ox = int(np.clip(np.round(dx_pix),-top,dim-size-top))
+    oy = int(np.clip(np.round(dy_pix),-top,dim-size-top))
+    return cutout[...,top+oy:top+oy+size,top+ox:top+ox+size], (ox,oy)
+
+
+def pyramid_correlation_shift(fixed_cutout, to_shift_cutout, levels, fine_dim, upsample_factor=1, fixed_windows=None):
+    '''
+    cross_correlation_shift from coarse to fine, so that a large search range doesn't need large FFTs.
+    the shift is found first between the whole cutouts downsampled by 2**levels, then refined at each finer level
+    between fine_dim x fine_dim windows, the one around point 1 central and the one around point 2 centred where
+    the estimate so far puts point 1, so each level only has to correct the few pixels of error left by the one before
+    :param fixed_cutout: square cutout around point 1
+    :param to_shift_cutout: cutout around point 2 the same size
+    :param levels: the number of times to halve the resolution for the coarsest level
+    :param fine_dim: the side of the windows correlated at the finer levels, in pixels of that level
+    :param upsample_factor: refine the shift to 1/upsample_factor of a pixel, 1 for whole pixels.  this is done last,
+    between full resolution windows of at least PYRAMID_REFINE_DIM centred on the whole pixel shift, as the small
+    windows of the finer levels, and any whole pixel of shift left between them, bias the fraction of a pixel
+    :param fixed_windows: a dictionary of (factor,size) -> (zero mean window, its half spectrum) for fixed_cutout,
+    which is filled in as the windows are made so that the caller can keep them for the next point 2
+    :return: corrmat, corrval, dx_pix, dy_pix, corrmat being the coarsest level's, whose entries are 2**levels pixels apart,
+    and corrval that of the full resolution level
+    '''
+    if fixed_windows is None:
+        fixed_windows = {}
+    dx_pix = 0
+    dy_pix = 0
+    coarse_corrmat = None
+    for (factor,size) in pyramid_schedule(fixed_cutout.shape[0],levels,fine_dim):
+        if (factor,size) not in fixed_windows:
+            fixed = block_mean(pyramid_window(fixed_cutout,size,0,0)[0],factor)
+            fixed = fixed - np.mean(fixed)
+            fixed_windows[(factor,size)] = (fixed,fft_xcorr.get_plan(fixed.shape).forward(fixed))
+        (fixed,fixed_freq) = fixed_windows[(factor,size)]
+        #point 1 is dx_pix,dy_pix back from the centre of the cutout around point 2
+        (moved,(ox,oy)) = pyramid_window(to_shift_cutout,size,-dx_pix,-dy_pix)
+        moved = block_mean(moved,factor)
+        moved = moved - np.mean(moved)
+        corrmat, corrval, rx, ry = cross_correlation_shift(fixed,moved,fixed_spectrum=fixed_freq)
+        if coarse_corrmat is None:
+            coarse_corrmat = corrmat
+        dx_pix = rx*factor-ox
+        dy_pix = ry*factor-oy
+    if upsample_factor > 1:
+        size = min(max(fine_dim,PYRAMID_REFINE_DIM),fixed_cutout.shape[0])
+        if (1,size) not in fixed_windows:
+            fixed = pyramid_window(fixed_cutout,size,0,0)[0]
+            fixed = fixed - np.mean(fixed)
+            fixed_windows[(1,size)] = (fixed,fft_xcorr.get_plan(fixed.shape).forward(fixed))
+        (fixed,fixed_freq) = fixed_windows[(1,size)]
+        (moved,(ox,oy)) = pyramid_window(to_shift_cutout,size,-dx_pix,-dy_pix)
+        moved = moved - np.mean(moved)
+        corrmat, corrval, rx, ry = cross_correlation_shift(fixed,moved,upsample_factor,fixed_spectrum=fixed_freq)
+        dx_pix = rx-ox
+        dy_pix = ry-oy
+    return coarse_corrmat, corrval, dx_pix, dy_pix
+
+
+def batch_pyramid_correlation_shift(fixed_stack, to_shift_stack, levels, fine_dim, upsample_factor=1):
+    '''
+    the same calculation as pyramid_correlation_shift, for a stack of equally sized pairs of cutouts at once,
+    each level being done with batch_cross_correlation_shift
+    :param fixed_stack: N x dim x dim array of the cutouts around the points that stay fixed
+    :param to_shift_stack: N x dim x dim array of the cutouts around the points to be moved
+    :return: corrvals, dx_pix, dy_pix, qualities, with one entry per pair, the CorrelationQuality being that of the
+    coarsest level with the correlation and overlap of the final shift
+    '''
+    n = fixed_stack.shape[0]
+    dx_pix = np.zeros(n)
+    dy_pix = np.zeros(n)
+    coarse_qualities = None
+    for (factor,size) in pyramid_schedule(fixed_stack.shape[-1],levels,fine_dim):
+        fixed = block_mean(pyramid_window(fixed_stack,size,0,0)[0],factor)
+        windows = [pyramid_window(to_shift_stack[k],size,-dx_pix[k],-dy_pix[k]) for k in range(n)]
+        moved = block_mean(np.array([window for (window,offset) in windows]),factor)
+        offsets = np.array([offset for (window,offset) in windows])
+        fixed = fixed-np.mean(fixed,axis=(1,2))[:,np.newaxis,np.newaxis]
+        moved = moved-np.mean(moved,axis=(1,2))[:,np.newaxis,np.newaxis]
+        corrvals, rx, ry, qualities = batch_cross_correlation_shift(fixed,moved)
+        if coarse_qualities is None:
+            coarse_qualities = qualities
+        dx_pix = rx*factor-offsets[:,0]
+        dy_pix = ry*factor-offsets[:,1]
+    if upsample_factor > 1:
+        size = min(max(fine_dim,PYRAMID_REFINE_DIM),fixed_stack.shape[-1])
+        fixed = pyramid_window(fixed_stack,size,0,0)[0]
+        windows = [pyramid_window(to_shift_stack[k],size,-dx_pix[k],-dy_pix[k]) for k in range(n)]
+        moved = np.array([window for (window,offset) in windows])
+        offsets = np.array([offset for (window,offset) in windows])
+        fixed = fixed-np.mean(fixed,axis=(1,2))[:,np.newaxis,np.newaxis]
+        moved = moved-np.mean(moved,axis=(1,2))[:,np.newaxis,np.newaxis]
+        corrvals, rx, ry, qualities = batch_cross_correlation_shift(fixed,moved,upsample_factor)
+        dx_pix = rx-offsets[:,0]
+        dy_pix = ry-offsets[:,1]
+    #the coarsest level is the one which chose between the possible peaks over the whole search range
+    overlap = overlap_fraction(dx_pix,dy_pix,fixed_stack.shape[-1])
+    for k,quality in enumerate(coarse_qualities):
+        quality.corrval = float(corrvals[k])
+        quality.overlap = float(overlap[k])
+    return corrvals, dx_pix, dy_pix, coarse_qualities
+
+
+def correlation_shift(one_cut,two_cut,upsample_factor=1,pyramid_levels=0,pyramid_dim=128):
+    """the shift which aligns two_cut with one_cut by cross correlation, as MosaicImage.align_by_correlation calculates it
+
+    keywords)
+    one_cut) the cutout around the point that should be fixed
+    two_cut) the cutout around the point that should be moved
+    upsample_factor) refine the shift to 1/upsample_factor of a pixel, 1 for whole pixels
+    pyramid_levels) search coarse to fine with pyramid_correlation_shift from this many halvings down, 0 to correlate the whole cutouts
+    pyramid_dim) the side in pixels of the windows correlated at the finer levels of the pyramid
+
+    returns) (corrval,dx_pix,dy_pix,quality) the maximal correlation, the shift in pixels at which it was found
+    and the CorrelationQuality of the correlation matrix
+
+    """
+    one_cut,two_cut = fix_cutout_size(one_cut,two_cut)
+    one_cut = one_cut - np.mean(one_cut)
+    two_cut = two_cut - np.mean(two_cut)
+    if pyramid_levels > 0:
+        corrmat, corrval, dx_pix, dy_pix = pyramid_correlation_shift(one_cut,two_cut,pyramid_levels,pyramid_dim,upsample_factor)
+    else:
+        corrmat, corrval, dx_pix, dy_pix = cross_correlation_shift(one_cut,two_cut,upsample_factor)
+    return (corrval,dx_pix,dy_pix,correlation_quality(corrmat,corrval,dx_pix,dy_pix,one_cut.shape[0]))
+
+
+def sift_features(cut,numFeatures,contrastThreshold):
+    """detect the SIFT features of a cutout, after equalizing its histogram
+
+    keywords)
+    cut) the 8 bit cutout
+    numFeatures) the number of SIFT features to keep
+    contrastThreshold) the contrast threshold of the SIFT feature detector
+
+    returns) (points,descriptors) an N x 2 array of the (x,y) pixel positions of the features and the N x 128 array
+    of their descriptors, plain arrays so that they can be kept and passed between processes unlike cv2's keypoints
+
+    """
+    cuta=cv2.equalizeHist(np.copy(cut))
+    sift = cv2.SIFT(nfeatures=numFeatures,contrastThreshold=contrastThreshold)
+    kp, des = sift.detectAndCompute(cuta,None)
+    print "features:%d"%len(kp)
+    points = np.array([k.pt for k in kp],dtype=np.float64).reshape(-1,2)
+    if des is None:
+        des = np.zeros((0,128),dtype=np.float32)
+    return (points,des)
+
+
+def match_features(des1,des2,ratio=MATCH_RATIO):
+    """match each descriptor of des1 to its nearest neighbour in des2, keeping those which pass Lowe's ratio test
+
+    the distances are worked out exactly, MATCH_CHUNK rows of des1 at a time, from |a|^2+|b|^2-2a.b so that
+    the bulk of the work is one matrix multiply
+
+    keywords)
+    des1,des2) N1 x 128 and N2 x 128 arrays of descriptors
+    ratio) how much closer the nearest neighbour has to be than the second nearest
+
+    returns) (idx1,idx2) arrays of the indices into des1 and des2 of the matched features
+
+    """
+    if len(des1)==0 or len(des2)<2:
+        return (np.zeros(0,dtype=int),np.zeros(0,dtype=int))
+    des1 = np.asarray(des1,dtype=np.float32)
+    des2 = np.asarray(des2,dtype=np.float32)
+    norm2 = np.einsum('ij,ij->i',des2,des2)
+    nearest = []
+    dists = []
+    for start in range(0,len(des1),MATCH_CHUNK):
+        chunk = des1[start:start+MATCH_CHUNK]
+        rows = np.arange(len(chunk))[:,np.newaxis]
+        #leaving out |a|^2 doesn't change which of des2 is nearest
+        d2 = norm2[np.newaxis,:]-2*np.dot(chunk,des2.T)
+        two = np.argpartition(d2,1,axis=1)[:,:2]
+        two = two[rows,np.argsort(d2[rows,two],axis=1)]
+        d2 = d2[rows,two]+np.einsum('ij,ij->i',chunk,chunk)[:,np.newaxis]
+        nearest.append(two[:,0])
+        dists.append(np.sqrt(np.maximum(d2,0)))
+    nearest = np.concatenate(nearest)
+    dists = np.concatenate(dists)
+    idx1 = np.nonzero(dists[:,0]<ratio*dists[:,1])[0]
+    return (idx1,nearest[idx1])
+
+
+def sift_transform(one_cut,two_cut,numFeatures,contrastThreshold,features1=None):
+    """find the rigid transformation between SIFT features matched between two cutouts with ransac
+
+    keywords)
+    one_cut) the 8 bit cutout around the point that should be fixed
+    two_cut) the 8 bit cutout around the point that should be moved
+    numFeatures) the number of SIFT features to keep in each cutout
+    contrastThreshold) the contrast threshold of the SIFT feature detector
+    features1) the sift_features of one_cut if the caller already has them
+
+    returns) (bestModel,bestInlierIdx,nmatches), bestModel is None when no transformation was found
+
+    """
+    if features1 is None:
+        features1 = sift_features(one_cut,numFeatures,contrastThreshold)
+    (points1,des1) = features1
+    (points2,des2) = sift_features(two_cut,numFeatures,contrastThreshold)
+
+    (idx1,idx2) = match_features(des1,des2)
+    p1 = points1[idx1]
+    p2 = points2[idx2]
+
+    transModel=ransac.RigidModel()
+    bestModel,bestInlierIdx=ransac.batch_ransac(p1,p2,transModel,transModel.min_points,300,20.0,3,debug=True,return_all=True)
+    return (bestModel,bestInlierIdx,len(idx1))
+
+
+def sift_shift(one_cut,two_cut,numFeatures,contrastThreshold,features1=None):
+    """the shift which aligns two_cut with one_cut by matching SIFT features, see sift_transform
+
+    returns) (inliers,dx_pix,dy_pix) the number of matches agreeing with the transformation found and its
+    translation in pixels, (0,0.0,0.0) when no transformation was found
+
+    """
+    (bestModel,bestInlierIdx,nmatches)=sift_transform(one_cut,two_cut,numFeatures,contrastThreshold,features1=features1)
+    if bestModel is None:
+        return (0,0.0,0.0)
+    return (len(bestInlierIdx),-bestModel.t[0],-bestModel.t[1])
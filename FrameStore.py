@@ -0,0 +1,341 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import os
+import json
+import glob
+
+from tifffile import imsave, imread, TiffWriter, TiffFile
+
+
+def write_slice_metadata(filename, ch, xpos, ypos, zpos, meta_dict):
+    channelname    = meta_dict['channelname'][ch]
+    (height,width) = meta_dict['(height,width)']
+    ScaleFactorX   = meta_dict['ScaleFactorX']
+    ScaleFactorY   = meta_dict['ScaleFactorY']
+    exp_time       = meta_dict['exp_time'][ch]
+
+    f = open(filename, 'w')
+    f.write("Channel\tWidth\tHeight\tMosaicX\tMosaicY\tScaleX\tScaleY\tExposureTime\n")
+    f.write("%s\t%d\t%d\t%d\t%d\t%f\t%f\t%f\n" % \
+    (channelname, width, height, 1, 1, ScaleFactorX, ScaleFactorY, exp_time))
+    f.write("XPositions\tYPositions\tFocusPositions\n")
+    f.write("%s\t%s\t%s\n" %(xpos, ypos, zpos))
+    f.close()
+
+
+def tile_filename(path, prot_name, slice_index, frame_index, z_index):
+    return os.path.join(path, prot_name + "_S%04d_F%04d_Z%02d.tif" % (slice_index, frame_index, z_index))
+
+
+def stack_filename(path, prot_name, slice_index):
+    return os.path.join(path, prot_name + "_S%04d.tif" % slice_index)
+
+
+def stack_index_filename(path, prot_name, slice_index):
+    return os.path.join(path, prot_name + "_S%04d.jsonl" % slice_index)
+
+
+def frame_record(token, data, meta_dict):
+    """the structured metadata kept for each frame in a section stack"""
+    (slice_index,frame_index, z_index, prot_name, path, ch, x, y, z) = token
+    return {'section':slice_index,
+            'frame':frame_index,
+            'z_index':z_index,
+            'channel':prot_name,
+            'mm_channel':ch,
+            'x':x,
+            'y':y,
+            'z':z,
+            'exposure':meta_dict['exp_time'][ch],
+            'pixel_size':meta_dict['ScaleFactorX'],
+            'shape':list(data.shape),
+            'dtype':data.dtype.str}
+
+
+class TileFileWriter():
+    """writes each frame to its own tif, alongside a _metadata.txt file
+
+    outdir/prot_name/prot_name_S%04d_F%04d_Z%02d.tif
+    """
+    #frames can be written in any order by any writer
+    ordered = False
+
+    def __init__(self, metadata_dictionary):
+        self.metadata_dictionary = metadata_dictionary
+
+    def write(self, token, data):
+        (slice_index,frame_index, z_index, prot_name, path, ch, x, y, z) = token
+        tif_filepath = tile_filename(path, prot_name, slice_index, frame_index, z_index)
+        metadata_filepath = os.path.join(path, prot_name + "_S%04d_F%04d_Z%02d_metadata.txt"%(slice_index, frame_index, z_index))
+        imsave(tif_filepath,data)
+        write_slice_metadata(metadata_filepath, ch, x, y, z, self.metadata_dictionary)
+
+    def close(self):
+        pass
+
+
+class SectionStackWriter():
+    """appends every frame of a section to one BigTIFF per channel
+
+    outdir/prot_name/prot_name_S%04d.tif holds one page per (frame,z) in the order they arrived,
+    each page carrying its frame_record as a JSON image description.  the same records, plus the
+    page number, are appended to outdir/prot_name/prot_name_S%04d.jsonl so a reader can find a
+    tile without scanning the tif.
+    """
+    #all the frames of a section/channel have to go through the same writer, in order
+    ordered = True
+
+    def __init__(self, metadata_dictionary, max_open=8):
+        """
+        keywords)
+        metadata_dictionary) the acquisition metadata, see frame_record
+        max_open) how many stacks to keep open at once, the least recently written is closed
+        beyond this and appended to if more frames for it turn up later
+
+        """
+        self.metadata_dictionary = metadata_dictionary
+        self.max_open = max_open
+        #(path,prot_name,slice_index) -> [TiffWriter,index file,number of pages]
+        self.stacks = {}
+        self.last_used = []
+
+    def open_stack(self, path, prot_name, slice_index):
+        key = (path,prot_name,slice_index)
+        if key in self.stacks:
+            self.last_used.remove(key)
+            self.last_used.append(key)
+            return self.stacks[key]
+        if len(self.stacks) >= self.max_open:
+            self.close_stack(self.last_used[0])
+        tif_filepath = stack_filename(path, prot_name, slice_index)
+        index_filepath = stack_index_filename(path, prot_name, slice_index)
+        npages = 0
+        if os.path.isfile(tif_filepath) and os.path.isfile(index_filepath):
+            try:
+                npages = count_pages(tif_filepath)
+                tif = TiffWriter(tif_filepath, bigtiff=True, append=True)
+                #drop any half written line or records of pages which never made it into the tif
+                records = [r for r in read_stack_index(index_filepath) if r['page'] < npages]
+                write_stack_index(index_filepath, records)
+            except (ValueError, IOError):
+                #a stack left half written by a crash, keep it aside rather than appending to it
+                print "could not append to %s, starting a new stack"%tif_filepath
+                os.rename(tif_filepath, tif_filepath + '.bad')
+                os.rename(index_filepath, index_filepath + '.bad')
+                tif = TiffWriter(tif_filepath, bigtiff=True)
+        else:
+            tif = TiffWriter(tif_filepath, bigtiff=True)
+            if os.path.isfile(index_filepath):
+                os.remove(index_filepath)
+        index = open(index_filepath, 'a')
+        stack = [tif,index,npages]
+        self.stacks[key] = stack
+        self.last_used.append(key)
+        return stack
+
+    def close_stack(self, key):
+        (tif,index,npages) = self.stacks.pop(key)
+        self.last_used.remove(key)
+        tif.close()
+        index.close()
+
+    def write(self, token, data):
+        (slice_index,frame_index, z_index, prot_name, path, ch, x, y, z) = token
+        stack = self.open_stack(path, prot_name, slice_index)
+        (tif,index,npages) = stack
+        record = frame_record(token, data, self.metadata_dictionary)
+        tif.save(data, description=json.dumps(record), contiguous=False)
+        record['page'] = npages
+        index.write(json.dumps(record) + "\n")
+        index.flush()
+        stack[2] = npages+1
+
+    def close(self):
+        for key in list(self.stacks.keys()):
+            self.close_stack(key)
+
+
+FRAME_WRITERS = {'tiles':TileFileWriter,
+                 'stacks':SectionStackWriter}
+
+
+def count_pages(filename):
+    tif = TiffFile(filename)
+    npages = len(tif.pages)
+    tif.close()
+    return npages
+
+
+def write_stack_index(filename, records):
+    f = open(filename, 'w')
+    for record in records:
+        f.write(json.dumps(record) + "\n")
+    f.close()
+
+
+def read_stack_index(filename):
+    """read the list of frame records out of a section stack index, skipping a partially written last line"""
+    records = []
+    f = open(filename, 'r')
+    for line in f:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+    f.close()
+    return records
+
+
+class FrameStoreReader():
+    """pulls individual tiles back out of an acquisition directory written with either FRAME_WRITERS backend"""
+    def __init__(self, outdir):
+        self.outdir = outdir
+        #(prot_name,slice_index) -> {(frame,z_index):record} or None when there is no stack
+        self.indexes = {}
+        self.tiffs = {}
+        self.npages = {}
+
+    def get_stack_index(self, channel, section):
+        key = (channel,section)
+        if key not in self.indexes:
+            path = os.path.join(self.outdir, channel)
+            index_filepath = stack_index_filename(path, channel, section)
+            if os.path.isfile(index_filepath):
+                records = read_stack_index(index_filepath)
+                self.indexes[key] = dict([((r['frame'],r['z_index']),r) for r in records])
+            else:
+                self.indexes[key] = None
+        return self.indexes[key]
+
+    def get_record(self, section, frame, z, channel):
+        """returns the frame_record of a tile in a section stack, or None if it isn't in one"""
+        index = self.get_stack_index(channel, section)
+        if index is None:
+            return None
+        return index.get((frame,z))
+
+    def get_tile(self, section, frame, z, channel):
+        """read a single tile
+
+        keywords)
+        section,frame,z) the slice, frame and z plane indices the tile was saved with
+        channel) the protocol name of the channel
+
+        returns the tile as a numpy array, raises IOError if it was never saved
+        """
+        path = os.path.join(self.outdir, channel)
+        index = self.get_stack_index(channel, section)
+        if index is None:
+            tif_filepath = tile_filename(path, channel, section, frame, z)
+            if not os.path.isfile(tif_filepath):
+                raise IOError("no tile for section %d frame %d z %d channel %s"%(section,frame,z,channel))
+            return imread(tif_filepath)
+        if (frame,z) not in index:
+            raise IOError("no tile for section %d frame %d z %d channel %s"%(section,frame,z,channel))
+        tif_filepath = stack_filename(path, channel, section)
+        if tif_filepath not in self.tiffs:
+            self.tiffs[tif_filepath] = TiffFile(tif_filepath)
+        return self.tiffs[tif_filepath].pages[index[(frame,z)]['page']].asarray()
+
+    def has_tile(self, section, frame, z, channel, nbytes=0):
+        """check a tile made it to disk without reading it, a tile file has to hold at least nbytes,
+        a stack has to have the tile's page in it"""
+        path = os.path.join(self.outdir, channel)
+        index = self.get_stack_index(channel, section)
+        if index is None:
+            tif_filepath = tile_filename(path, channel, section, frame, z)
+            return os.path.isfile(tif_filepath) and os.path.getsize(tif_filepath) >= nbytes
+        if (frame,z) not in index:
+            return False
+        tif_filepath = stack_filename(path, channel, section)
+        if tif_filepath not in self.npages:
+            try:
+                self.npages[tif_filepath] = count_pages(tif_filepath)
+            except Exception:
+                self.npages[tif_filepath] = 0
+        return index[(frame,z)]['page'] < self.npages[tif_filepath]
+
+    def close(self):
+        for tif in self.tiffs.values():
+            tif.close()
+        self.tiffs = {}
+        self.indexes = {}
+        self.npages = {}
+
+
+#the name of each writer's FrameJournal in an acquisition directory
+JOURNAL_FILENAME = 'acquisition_journal_W%02d.txt'
+
+
+def journal_files(outdir):
+    """the FrameJournal files of every writer which has saved into outdir"""
+    return sorted(glob.glob(os.path.join(outdir, JOURNAL_FILENAME.replace('%02d','*'))))
+
+
+class FrameJournal():
+    """append only log of the frames a writer process has finished saving
+
+    each writer keeps its own outdir/acquisition_journal_W%02d.txt so no locking is needed,
+    with one tab delimited section,frame,z_index,channel,nbytes line per frame.  lines are flushed
+    as they are written, a line cut short by a crash is ignored by read_journal.
+    """
+    def __init__(self, outdir, writer_index):
+        self.f = open(os.path.join(outdir, JOURNAL_FILENAME%writer_index), 'a')
+
+    def record(self, token, data):
+        (slice_index,frame_index, z_index, prot_name, path, ch, x, y, z) = token
+        self.f.write("%d\t%d\t%d\t%s\t%d\n"%(slice_index,frame_index,z_index,prot_name,data.nbytes))
+        self.f.flush()
+
+    def close(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+
+
+def read_journal(outdir):
+    """read every writer's journal in outdir
+
+    returns a dictionary of (section,frame,z_index,channel) -> nbytes
+    """
+    entries = {}
+    for filename in journal_files(outdir):
+        f = open(filename, 'r')
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != 5:
+                continue
+            (section,frame,z_index,channel,nbytes) = fields
+            entries[(int(section),int(frame),int(z_index),channel)] = int(nbytes)
+        f.close()
+    return entries
+
+
+def completed_frames(outdir):
+    """the set of (section,frame,z_index,channel) frames in outdir which the journal says were saved
+    and which can be found on disk"""
+    reader = FrameStoreReader(outdir)
+    done = set()
+    for (section,frame,z_index,channel),nbytes in read_journal(outdir).items():
+        if reader.has_tile(section,frame,z_index,channel,nbytes):
+            done.add((section,frame,z_index,channel))
+    reader.close()
+    return done
@@ -2,25 +2,106 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 from PIL import Image
-from tifffile import imsave
+from tifffile import imsave, memmap
 import time
 import json
 from Rectangle import Rectangle
+from TileIndex import TileIndex
+from TileCache import tile_cache, mapped_tiles
+from PyramidDisplay import PyramidDisplay, downsample
+from ContrastLUT import apply_lut
 import traceback,sys
 #from imageSourceMM import imageSource
 
+#numpy types of the PIL image modes overview images come in
+PIL_MODE_DTYPES = {'L':'uint8','I;16':'uint16','I;16B':'uint16','I':'int32','F':'float32'}
+
+#the one file in the root of a collection recording every image in it
+MANIFEST_FILENAME = "collection_manifest.jsonl"
+
+#the longest side (pixels) of the downsampled copy saved next to each image, which the overview is painted from
+THUMBNAIL_MAX_SIDE = 256
+
+
+def thumbnail_level(shape,max_side=THUMBNAIL_MAX_SIDE):
+    #how many times an image of shape (height,width) has to be halved to fit in max_side
+    (h,w)=shape[:2]
+    level=0
+    while max(h,w)>max_side and min(h,w)>=2:
+        (h,w)=(h//2,w//2)
+        level+=1
+    return level
+
+
+class CollectionManifest():
+    """an append only list of the images in a collection, one JSON record per line
+
+    replaces the metadata text file that used to be written next to every image, so opening a collection
+    only has to read this one file.  a partially written last line (e.g. from a crash) is ignored.
+    """
+    def __init__(self,rootpath):
+        self.rootpath=rootpath
+        self.filename=os.path.join(rootpath,MANIFEST_FILENAME)
+
+    def exists(self):
+        return os.path.isfile(self.filename)
+
+    def read(self):
+        records=[]
+        f=open(self.filename,'r')
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+        f.close()
+        return records
+
+    def append(self,record):
+        f=open(self.filename,'a')
+        f.write(json.dumps(record)+"\n")
+        f.close()
+
+    def write(self,records):
+        #write to the side and rename, so a crash never leaves a half migrated manifest
+        tmpfile=self.filename+".tmp"
+        f=open(tmpfile,'w')
+        for record in records:
+            f.write(json.dumps(record)+"\n")
+        f.close()
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
+        os.rename(tmpfile,self.filename)
+
+    def full_path(self,record):
+        #paths of images inside the collection are stored relative to it so the collection can be moved
+        return os.path.join(self.rootpath,record["path"])
+
+    def relative_path(self,path):
+        if os.path.dirname(os.path.abspath(path))==os.path.abspath(self.rootpath):
+            return os.path.basename(path)
+        return path
+
         
 class MyImage():
     def __init__(self,imagePath=None,boundBox=None):
         
         self.boundBox = boundBox #should be a class Rectangle
         self.imagePath = imagePath
+        #the (height,width) of the pixels, if known without reading the file
+        self.shape = None
+        #.npy files are raw pixels which get memory mapped, .tif files are too if they are uncompressed 8 bit
+        #(as save_data writes them), otherwise they have to be decoded
+        self.format = ".tif"
+        self.tif_mappable = True
+        if imagePath is not None:
+            self.format = os.path.splitext(imagePath)[1]
         
         
     def save_metadata(self,filename):
          d = {"boundBox":{"top":self.boundBox.top,"bottom":self.boundBox.bottom,
                           "left":self.boundBox.left,"right":self.boundBox.right},
-              "imagePath":{"path":self.imagePath,"format":".tif"}
+              "imagePath":{"path":self.imagePath,"format":self.get_ext()}
              }
                  
          meta = json.dumps(d)
@@ -52,6 +133,31 @@ class MyImage():
         self.boundBox=Rectangle(left,right,top,bottom)
 
         
+    def to_record(self,manifest,data=None,metadata=None):
+        #the line describing this image in a CollectionManifest
+        if data is None:
+            (height,width)=self.get_pixel_shape()
+            dtype=self.get_pixel_dtype()
+        else:
+            (height,width)=data.shape[:2]
+            dtype=str(data.dtype)
+        return {"path":manifest.relative_path(self.imagePath),
+                "format":self.get_ext(),
+                "boundBox":{"top":self.boundBox.top,"bottom":self.boundBox.bottom,
+                            "left":self.boundBox.left,"right":self.boundBox.right},
+                "shape":[height,width],
+                "dtype":dtype,
+                "metadata":metadata if metadata is not None else {}}
+
+    def load_from_record(self,manifest,record):
+        b=record["boundBox"]
+        self.imagePath=manifest.full_path(record)
+        self.format=record["format"]
+        self.boundBox=Rectangle(b["left"],b["right"],b["top"],b["bottom"])
+        self.metadata=record.get("metadata",{})
+        if "shape" in record:
+            self.shape=tuple(record["shape"])
+
     def set_boundBox(self,left,right,top,bottom):
         self.boundBox=Rectangle(left,right,top,bottom)
 
@@ -63,10 +169,8 @@ class MyImage():
         '''
 
         if self.boundBox.contains_rect(box):
-            #load image from file
-            #todo
-            img=Image.open(self.imagePath,mode='r')
-            (width,height)=img.size
+            data=self.get_data()
+            (height,width)=data.shape
 
             
             rel_box=self.boundBox.find_relative_bounds(box)
@@ -76,19 +180,59 @@ class MyImage():
             top=int(rel_box.top*height)
             bottom=int(rel_box.bottom*height)
              
-            c_img=img.crop([left,top,right,bottom])
-            thedata=c_img.getdata()
-
-            (cutwidth,cutheight)=c_img.size
-            cut=np.reshape(np.array(thedata,np.dtype('uint8')),(cutheight,cutwidth))
+            cut=np.array(data[top:bottom,left:right])
            
             
             return cut
         else:
             Raise_Error("cutout not in image")
             
+    def get_pixel_shape(self):
+        #the (height,width) of the image in pixels, only reads the header of the file
+        if self.shape is not None:
+            return self.shape
+        if self.is_mapped():
+            return self.get_data().shape
+        img=Image.open(self.imagePath,mode='r')
+        (width,height)=img.size
+        return (height,width)
+
+    def get_pixel_dtype(self):
+        #the numpy type of the pixels as a string, only reads the header of the file
+        if self.is_mapped():
+            return str(self.get_data().dtype)
+        img=Image.open(self.imagePath,mode='r')
+        return PIL_MODE_DTYPES.get(img.mode,img.mode)
+
+    def sample_grid(self,xs,ys):
+        '''
+        nearest neighbour samples of this image at the pixel centres of a grid
+
+        keywords)
+        xs) 1d numpy array of the x positions (microns) of the grid columns
+        ys) 1d numpy array of the y positions (microns) of the grid rows
+
+        returns (data,in_x,in_y) where in_x and in_y are boolean arrays saying which columns and rows
+        of the grid fall inside this image, and data is the len(ys)xlen(xs) uint8 array of samples,
+        only meaningful where both are True
+        '''
+        tile=self.get_data()
+        (height,width)=tile.shape
+        cols=np.floor((xs-self.boundBox.left)*width/self.boundBox.get_width()).astype(np.int)
+        rows=np.floor((ys-self.boundBox.top)*height/self.boundBox.get_height()).astype(np.int)
+        in_x=(cols>=0)&(cols<width)
+        in_y=(rows>=0)&(rows<height)
+        data=np.zeros((len(ys),len(xs)),np.dtype('uint8'))
+        if not (np.any(in_x) and np.any(in_y)):
+            return (data,in_x,in_y)
+        data[np.ix_(in_y,in_x)]=tile[np.ix_(rows[in_y],cols[in_x])]
+        return (data,in_x,in_y)
+
     def get_ext(self):
-        return ".tif"
+        return self.format
+
+    def is_mapped(self):
+        return self.format == ".npy"
     
     def file_has_metadata(self,path):
         (base,theext)=os.path.splitext(path)
@@ -98,7 +242,38 @@ class MyImage():
     def save_data(self,data):
         #img = Image.fromarray(data)
         #img.save(self.imagePath)
-        imsave(self.imagePath,data)
+        #let go of any map of the old file before writing over it
+        mapped_tiles.invalidate(self.imagePath)
+        if self.is_mapped():
+            np.save(self.imagePath,np.ascontiguousarray(data))
+        else:
+            imsave(self.imagePath,data)
+            tile_cache.invalidate(self.imagePath)
+            self.tif_mappable = True
+        self.shape=data.shape[:2]
+        self.save_thumbnail(data)
+
+    def thumbnail_path(self):
+        return os.path.splitext(self.imagePath)[0]+"_thumb.npy"
+
+    def save_thumbnail(self,data):
+        #save a copy of the pixels data shrunk to THUMBNAIL_MAX_SIDE, and return it
+        thumb=downsample(np.asarray(data),thumbnail_level(data.shape))
+        np.save(self.thumbnail_path(),thumb)
+        return thumb
+
+    def get_thumbnail(self):
+        #the pixels shrunk to at most THUMBNAIL_MAX_SIDE a side, for painting the overview without decoding
+        #the whole image. images saved before there were thumbnails get theirs made the first time they are asked for
+        path=self.thumbnail_path()
+        if os.path.isfile(path):
+            return np.load(path)
+        data=self.get_data()
+        try:
+            return self.save_thumbnail(data)
+        except (IOError,OSError):
+            print "could not save a thumbnail of %s"%self.imagePath
+            return downsample(np.asarray(data),thumbnail_level(data.shape))
 
         
     def contains_rect(self,box):
@@ -107,45 +282,64 @@ class MyImage():
         return self.boundBox.contains_point(x,y)
         
     def get_data(self):
+        #the pixels of the whole image, shared with other callers so don't modify them.
+        #mapped images come straight from the file, so slicing them only reads the pixels in the slice
+        if self.is_mapped():
+            return mapped_tiles.get(self.imagePath,self.map_data)
+        if self.tif_mappable:
+            try:
+                return mapped_tiles.get(self.imagePath,self.map_tif)
+            except ValueError:
+                #compressed, or not 8 bit greyscale, so it has to be decoded
+                self.tif_mappable = False
+        return tile_cache.get(self.imagePath,self.read_data)
+
+    def map_data(self):
+        return np.load(self.imagePath,mmap_mode='r')
+
+    def map_tif(self):
+        data=memmap(self.imagePath,mode='r')
+        if data.dtype!=np.uint8 or data.ndim!=2:
+            raise ValueError("%s is not an 8 bit greyscale image"%self.imagePath)
+        return data
+
+    def read_data(self):
         img=Image.open(self.imagePath,mode='r')
-        thedata=img.getdata()
-        
-        (width,height)=img.size
-        data=np.reshape(np.array(thedata,np.dtype('uint8')),(height,width))
+        data=np.asarray(img)
+        if data.dtype!=np.uint8 or data.ndim!=2:
+            thedata=img.getdata()
+            (width,height)=img.size
+            data=np.reshape(np.array(thedata,np.dtype('uint8')),(height,width))
         return data
     
 class ImageCollection():
     
-    def __init__(self,rootpath,imageClass=MyImage,imageSource=None,axis=None,working_area = Rectangle(left=-30000,right=36000,top=-6100,bottom=16000)):
+    def __init__(self,rootpath,imageClass=MyImage,imageSource=None,axis=None,working_area = Rectangle(left=-30000,right=36000,top=-6100,bottom=16000),
+                 tile_format=".tif",display_max_side=None):
         
         self.rootpath=rootpath #rootpath to save images
+        self.manifest=CollectionManifest(rootpath) #the record of every image saved in rootpath
         self.imageClass=imageClass #the class of image that this image collection should be composed of,
                                 # must conform to myImage interface
         self.imageSource = imageSource #a source for new data usually a microscope, could be a virtual file
         #needs to implement numpy2darray=imageSource.take_image(x,y)
         self.images = [] #list of image objects
+        self.index = TileIndex() #spatial index of the images' bounding boxes, keyed by position in self.images
         self.imgCount=0 #counter of number of images in collection
+        self.version=0 #changes whenever images are added, so things worked out from their pixels can tell they are stale
         self.axis=axis #matplotlib.axis to plot images
         self.bigBox = None #bounding box to include all images
-        self.matplot_images=[]
         self.minvalue=0
         self.maxvalue=512
         self.working_area = working_area
+        self.tile_format = tile_format #".tif" or ".npy" for memory mapped tiles, used for new images
+        #draws all the images composited into one buffer at the resolution of the screen
+        self.display=None
+        if axis is not None:
+            self.display=PyramidDisplay(axis,self.index,self.get_full_data,get_overview_data=self.get_thumbnail,
+                                        clim=(self.minvalue,self.maxvalue),
+                                        max_side=display_max_side,area=working_area)
 
-    def display8bit(self,image, display_min, display_max): 
-        image = np.array(image, copy=True)
-        image.clip(display_min, display_max, out=image)
-        image -= display_min
-        image = image / ((display_max - display_min + 1) / 256.)
-        return image.astype(np.uint8)
-
-    def lut_convert16as8bit(self,image, display_min, display_max) :
-        lut = np.arange(2**16, dtype='uint16')
-        lut = self.display8bit(lut, display_min, display_max)
-        return np.take(lut, image)
-
-
-    
     def get_pixel_size(self):
         return self.imageSource.get_pixel_size()
     
@@ -177,29 +371,87 @@ class ImageCollection():
     def get_cutout(self,box):
         #from the collection of images return the pixels contained by the Rectangle box
         #look for an image which contains the desired cutout
-        for image in self.images:
-            if image.contains_rect(box):
-                return image.get_cutout(box)
+        for k in self.index.containing_rect(box):
+            return self.images[k].get_cutout(box)
 
-        #TODO
-        #if you don't find the cutout in one image, see if you can get it from two
-        
-        #TODO
-        #can you assemble the cutout from all overlapping images (probably harder than its worth)
-        
-        #if you can't get it from two, go get a new image from source
+        #if you don't find the cutout in one image, assemble it from all the overlapping images
+        cut=self.assemble_cutout(box)
+        if cut is not None:
+            return cut
+
+        #if the images don't cover it, go get a new image from source
         if self.imageSource is not None:
             return self.get_cutout_from_source(box)
             
         return None #we give up as we can't find the cutout for them.. sad
+
+    def assemble_cutout(self,box):
+        '''
+        stitch the pixels contained by the Rectangle box together from all the images that overlap it
+
+        where images overlap each pixel is taken from the image whose center is closest to it, so
+        every pixel comes from as far from an image edge as possible and nothing gets blurred by blending.
+        the cutout is sampled at the pixel size of the first overlapping image.
+
+        returns a 2d uint8 numpy array, or None if the images don't cover all of box
+        '''
+        tiles=[self.images[k] for k in self.index.overlapping(box)]
+        if len(tiles)==0:
+            return None
+        first=tiles[0]
+        (height,width)=first.get_pixel_shape()
+        pix_w=first.boundBox.get_width()/width
+        pix_h=first.boundBox.get_height()/height
+        cutwidth=max(int(round(box.get_width()/pix_w)),1)
+        cutheight=max(int(round(box.get_height()/pix_h)),1)
+        #the centres of the cutout pixels in microns
+        xs=box.left+(np.arange(cutwidth)+0.5)*box.get_width()/cutwidth
+        ys=box.top+(np.arange(cutheight)+0.5)*box.get_height()/cutheight
+
+        cut=np.zeros((cutheight,cutwidth),np.dtype('uint8'))
+        best=np.empty((cutheight,cutwidth))
+        best.fill(np.inf)
+        for theimage in tiles:
+            (data,in_x,in_y)=theimage.sample_grid(xs,ys)
+            (cx,cy)=theimage.boundBox.get_center()
+            #distance to the image center as a fraction of its size, so the rule doesn't favour big images
+            dx=(xs-cx)/theimage.boundBox.get_width()
+            dy=(ys-cy)/theimage.boundBox.get_height()
+            dist=dy[:,np.newaxis]**2+dx[np.newaxis,:]**2
+            take=np.outer(in_y,in_x)&(dist<best)
+            cut[take]=data[take]
+            best[take]=dist[take]
+        if np.any(np.isinf(best)):
+            return None
+        return cut
     
     
     
+    def add_to_index(self,theimage):
+        #add an image to the collection and its spatial index
+        self.images.append(theimage)
+        self.index.insert(len(self.images)-1,theimage.boundBox)
+        self.version+=1
+
+    def images_containing_point(self,x,y):
+        return [self.images[k] for k in self.index.containing_point(x,y)]
+
+    def images_containing_rect(self,box):
+        return [self.images[k] for k in self.index.containing_rect(box)]
+
+    def images_overlapping(self,box):
+        return [self.images[k] for k in self.index.overlapping(box)]
+
+    def nearest_image(self,x,y):
+        k=self.index.nearest(x,y)
+        if k is None:
+            return None
+        return self.images[k]
+
     def add_covered_point(self,x,y):
     
-        for image in self.images:
-            if image.contains_point(x,y):
-                return True
+        if len(self.index.containing_point(x,y))>0:
+            return True
         
         self.add_image_at(x,y)
         return False
@@ -212,10 +464,13 @@ class ImageCollection():
         #go get an image at x,y
         try:
             (thedata,bbox)=self.imageSource.take_image(x,y)
+            metadata={"x":x,"y":y,"z":self.imageSource.get_z(),
+                      "pixel_size":self.imageSource.get_pixel_size(),
+                      "time":time.strftime('%Y-%m-%d %H:%M:%S')}
             if thedata.dtype == np.uint16:
                 print "converting"
                 maxval=self.imageSource.get_max_pixel_value()
-                thedata=self.lut_convert16as8bit(thedata,0,15000)
+                thedata=apply_lut(thedata,0,15000)
             
         except:
             #todo handle this better
@@ -226,7 +481,7 @@ class ImageCollection():
         print "x,y is",x,y
         
         #add this image to the collection
-        theimage=self.add_image(thedata,bbox)
+        theimage=self.add_image(thedata,bbox,metadata)
         return theimage
         
         
@@ -251,24 +506,23 @@ class ImageCollection():
             print "there is no image source!"
             return None
         
-    def add_image(self,thedata,bbox):
+    def add_image(self,thedata,bbox,metadata=None):
         
         #determine the file path of this image
-        thefile=os.path.join(self.rootpath,"%010d"%self.imgCount + ".tif")
-        themetafile=os.path.join(self.rootpath,"%010d"%self.imgCount + "_metadata.txt")
+        thefile=os.path.join(self.rootpath,"%010d"%self.imgCount + self.tile_format)
         print "imgCount:%d"%self.imgCount
         self.imgCount+=1
         
         #initialize the new image and save the data
         theimage=self.imageClass(thefile,bbox)
         theimage.save_data(thedata)
-        theimage.save_metadata(themetafile)
+        self.manifest.append(theimage.to_record(self.manifest,thedata,metadata))
         
         #append this image to the list of images
-        self.images.append(theimage)
+        self.add_to_index(theimage)
         
         #update the display
-        self.add_image_to_display(thedata,bbox)
+        self.add_image_to_display(len(self.images)-1,thedata)
         return theimage
         
     
@@ -276,11 +530,23 @@ class ImageCollection():
         self.maxvalue=max
         self.minvalue=min
         
-        for theimg in self.matplot_images:
-            theimg.set_clim(min,max)
+        if self.display is not None:
+            self.display.set_clim(min,max)
+
+    def set_display_max_side(self,max_side):
+        if self.display is not None:
+            self.display.max_side=max_side
+            self.display.update_view()
+
+    def get_full_data(self,k):
+        return self.images[k].get_data()
+
+    def get_thumbnail(self,k):
+        return self.images[k].get_thumbnail()
             
-    def add_image_to_display(self,data,bbox):
-        #make the bounding box of the entire image collection include this bounding box
+    def add_image_to_display(self,k,data):
+        #make the bounding box of the entire image collection include the bounding box of image k
+        bbox=self.images[k].boundBox
         
         #if there is no big box, make one!
         if self.bigBox is None:
@@ -289,13 +555,10 @@ class ImageCollection():
         #otherwise make what we have bigger if necessary
         else:
             self.bigBox.expand_to_include(bbox) #use our handy rectangle method to do this
-        self.axis.hold(True) #matplotlib axis
-        #plot the image
-        theimg=self.axis.imshow(data,cmap='gray',extent=[bbox.left,bbox.right,bbox.bottom,bbox.top])
-        self.matplot_images.append(theimg)
-        #make sure all the other images stay in the field of view
-        #self.set_view_home()
-        theimg.set_clim(0,self.maxvalue)
+        if self.display is None:
+            return
+        #sample it into the overview and plot it if it is in view
+        self.display.add_tile(k,data,self.images[k].get_pixel_shape())
         
         self.axis.set_xlabel('X Position (um)')
         self.axis.set_ylabel('Y Position (um)')
@@ -311,27 +574,38 @@ class ImageCollection():
             image.boundBox.printRect()
             
     def load_image_collection(self):
-        #list all metadata files in rootdir
-        testimage=self.imageClass()
         if not os.path.isdir(self.rootpath):
             os.makedirs(self.rootpath)
-        
-        metafiles=[os.path.join(self.rootpath,f) for f in os.listdir(self.rootpath) if f.endswith('.txt') ]
-        
-        print "loading metadata"
-        #loop over files reading in metadata, and initializing Image objects, reading images to update display
+        if not self.manifest.exists():
+            self.migrate_metadata_files()
+
+        print "loading manifest"
+        #initialize Image objects from the manifest, painting the overview from their thumbnails,
+        #so the full pixels of an image are only read when a zoomed in view or a cutout needs them
+        for record in self.manifest.read():
+            theimage=self.imageClass()
+            theimage.load_from_record(self.manifest,record)
+            self.add_to_index(theimage)
+            self.add_image_to_display(len(self.images)-1,theimage.get_thumbnail())
+            self.imgCount+=1
+        print "loaded %d images"%len(self.images)
+
+    def migrate_metadata_files(self):
+        #collections saved before there was a manifest have a metadata text file per image,
+        #gather them all into a new manifest, leaving the text files where they are
+        metafiles=sorted([os.path.join(self.rootpath,f) for f in os.listdir(self.rootpath) if f.endswith('_metadata.txt')])
+        if len(metafiles)==0:
+            return
+        print "migrating %d metadata files to %s"%(len(metafiles),self.manifest.filename)
+        records=[]
         for file in metafiles:
-            print file
             theimage=self.imageClass()
             theimage.load_from_metadata(file)
-            self.images.append(theimage)
-            data=theimage.get_data()
-            self.add_image_to_display(data,theimage.boundBox)
-            self.imgCount+=1
-     
-            
-        
-        del(testimage)
+            #the stored paths are absolute, so look next to the metadata if the collection has been moved
+            if not os.path.isfile(theimage.imagePath):
+                theimage.imagePath=os.path.join(self.rootpath,os.path.basename(theimage.imagePath.replace('\\','/')))
+            records.append(theimage.to_record(self.manifest))
+        self.manifest.write(records)
       
 # filename="C:\Users\Smithlab\Documents\ASI_LUM_RETIGA_CRISP.cfg"
 # imgsrc=imageSource(filename)
@@ -12,6 +12,7 @@ import cv2
 from pyqtgraph.widgets.RawImageWidget import RawImageWidget
 import functools
 from imageSourceMM import imageSource
+from ContrastLUT import ContrastMapper
 
 
 class VideoView(QtGui.QWidget):
@@ -23,6 +24,8 @@ class VideoView(QtGui.QWidget):
         #self.setContentsMargins(0,0,0,0)
         self.mmc = imgSrc.mmc
         self.imgSrc = imgSrc
+        #maps 16 bit frames to 8 bits with auto levels, reusing its output buffers frame to frame
+        self.contrast = ContrastMapper(bit_depth=int(np.log2(imgSrc.get_max_pixel_value()+1)))
         self.channels=self.mmc.getAvailableConfigs(self.channelGroup)
         self.init_mmc()
         self.initUI()
@@ -252,22 +255,6 @@ class VideoView(QtGui.QWidget):
         #evt.accept()
         
 
-    def display8bit(self,image, display_min, display_max): 
-        image = np.array(image, copy=True)
-        image2=image.clip(display_min, display_max)
-        image2 -= display_min
-        image2 //= (display_max - display_min + 1) / 256.
-        return image2.astype(np.uint8)
-
-    def lut_convert16as8bit(self,image, display_min, display_max) :
-        lut = np.arange(2**16, dtype='uint16')
-
-        newlut = self.display8bit(lut, display_min, display_max)
-        print "min to max",np.min(newlut),np.max(newlut)
-        newimage = np.take(newlut, image)
-        print "new image shape",newimage.shape
-        return newimage
-
     def updateData(self):
     
         remcount = self.mmc.getRemainingImageCount()
@@ -278,16 +265,10 @@ class VideoView(QtGui.QWidget):
             data =  self.mmc.getLastImage()
 
 
+            levels=None
             if data.dtype == np.uint16:
-                maxval=self.imgSrc.get_max_pixel_value()
-                #print "max val is",maxval
-                #print 'max_before',np.max(data)
-                #data = exposure.rescale_intensity(data,in_range=(0,maxval))
-                #print 'max after rescale',np.max(data)
-                #data = img_as_ubyte(data)
-                #data=self.lut_convert16as8bit(data,0,5000)
-
-                # "maxval",maxval,np.max(data),data.dtype
+                data=self.contrast.convert(data,auto=True)
+                levels=(0,255)
             
             flipx,flipy,trans = self.imgSrc.get_image_flip()
             if trans:
@@ -298,7 +279,10 @@ class VideoView(QtGui.QWidget):
                 data = np.flipud(data)
             data = np.rot90(data,k=3)
             #gray=cv2.equalizeHist(gray)
-            self.img.setImage(data,autoLevels=True)
+            if levels is None:
+                self.img.setImage(data,autoLevels=True)
+            else:
+                self.img.setImage(data,autoLevels=False,levels=levels)
             #cv2.imshow('Video', gray)
         #else:
             #print('No frame')
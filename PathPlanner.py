@@ -0,0 +1,305 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import numpy as np
+
+#how much worse than its length a step longer than the maximum step counts when ordering sections
+LONG_STEP_PENALTY = 10.0
+
+
+def distance_matrix(xy):
+    """the matrix of euclidean distances between every pair of rows of the Nx2 array xy"""
+    d = xy[:,np.newaxis,:]-xy[np.newaxis,:,:]
+    return np.sqrt(np.sum(d*d,axis=2))
+
+
+def step_costs(dist, max_step=None):
+    """the cost of moving between positions, steps longer than max_step are penalized"""
+    if max_step is None or max_step <= 0:
+        return dist
+    return dist + LONG_STEP_PENALTY*np.maximum(dist-max_step,0)
+
+
+def path_length(cost, order):
+    order = np.asarray(order)
+    if len(order) < 2:
+        return 0.0
+    return np.sum(cost[order[:-1],order[1:]])
+
+
+def nearest_neighbour_order(cost, start=0):
+    """greedy ordering of the positions of cost, going to the closest unvisited position each time"""
+    N = cost.shape[0]
+    visited = np.zeros(N,np.bool)
+    order = [start]
+    visited[start] = True
+    for k in range(N-1):
+        c = np.where(visited,np.inf,cost[order[-1]])
+        nxt = int(np.argmin(c))
+        order.append(nxt)
+        visited[nxt] = True
+    return order
+
+
+def two_opt(cost, order, max_passes=50):
+    """improve an open path by reversing segments while that makes it shorter, the first position stays put
+
+    keywords)
+    cost) the NxN matrix of costs of moving between positions
+    order) the starting order, a list of indices into cost
+    max_passes) give up after this many sweeps through the path
+
+    returns the improved order as a list
+    """
+    order = np.array(order)
+    N = len(order)
+    if N < 4:
+        return list(order)
+    for npass in range(max_passes):
+        improved = False
+        for i in range(1,N-1):
+            #reverse order[i:j+1], replacing edges (i-1,i) and (j,j+1) with (i-1,j) and (i,j+1)
+            a = order[i-1]
+            b = order[i]
+            js = np.arange(i+1,N)
+            c = order[js]
+            d = np.append(order[js[:-1]+1],-1)
+            old = cost[a,b] + np.where(d>=0,cost[c,d],0)
+            new = cost[a,c] + np.where(d>=0,cost[b,d],0)
+            delta = new-old
+            k = np.argmin(delta)
+            if delta[k] < -1e-9:
+                j = js[k]
+                order[i:j+1] = order[i:j+1][::-1]
+                improved = True
+        if not improved:
+            break
+    return list(order)
+
+
+def grid_directions(xy, resolution=np.pi/180):
+    """the candidate row directions (radians, in [0,pi)) of a layout of frames
+
+    these are the directions from each frame to its nearest neighbour, so the rows of a rotated
+    or sheared grid are found as well as those of a straight one, plus the stage x and y axes
+
+    keywords)
+    xy) Nx2 array of frame positions
+    resolution) directions closer together than this are counted once
+    """
+    angles = [0.0,np.pi/2]
+    dist = distance_matrix(xy)
+    np.fill_diagonal(dist,np.inf)
+    for k in range(len(xy)):
+        m = np.argmin(dist[k])
+        if not np.isfinite(dist[k,m]) or dist[k,m] <= 0:
+            continue
+        (dx,dy) = xy[m]-xy[k]
+        angles.append(np.arctan2(dy,dx)%np.pi)
+    unique = []
+    for a in sorted(angles):
+        if all(min(abs(a-b),np.pi-abs(a-b)) > resolution for b in unique):
+            unique.append(a)
+    return unique
+
+
+def serpentine_order(xy, tol):
+    """order a grid of frames row by row, alternating direction on each row (boustrophedon)
+
+    each direction from grid_directions is tried as the row direction, the frames are projected onto it
+    and onto its normal, and split into rows wherever consecutive normal coordinates jump by more than tol.
+    This follows the rows of grids that are rotated with the ribbon as well as straight ones,
+    the shortest of the resulting paths is returned
+
+    keywords)
+    xy) Nx2 array of frame positions
+    tol) the smallest spacing between neighbouring rows, e.g. half a frame
+
+    returns a list of indices into xy
+    """
+    dist = distance_matrix(xy)
+    best = None
+    for angle in grid_directions(xy):
+        along = xy[:,0]*np.cos(angle)+xy[:,1]*np.sin(angle)
+        across = -xy[:,0]*np.sin(angle)+xy[:,1]*np.cos(angle)
+        lines = []
+        for k in np.argsort(across,kind='mergesort'):
+            if len(lines) > 0 and abs(across[k]-across[lines[-1][-1]]) <= tol:
+                lines[-1].append(k)
+            else:
+                lines.append([k])
+        order = []
+        for n,line in enumerate(lines):
+            line = sorted(line,key=lambda k: along[k])
+            if n%2 == 1:
+                line = line[::-1]
+            order += line
+        length = path_length(dist,order)
+        if best is None or length < best[0]:
+            best = (length,order)
+    return [int(k) for k in best[1]]
+
+
+def move_time(dx, dy, speed, settle):
+    """predicted time (sec) for the stage to move by dx,dy microns, the axes move at the same time"""
+    return settle + max(abs(dx),abs(dy))/speed
+
+
+def insert_waypoints(xy, max_step):
+    """break every step of the path xy longer than max_step into equal steps
+
+    returns a dictionary of (x,y) destination -> list of intermediate (x,y) points to go through on the way
+    """
+    waypoints = {}
+    if max_step is None or max_step <= 0:
+        return waypoints
+    for k in range(1,len(xy)):
+        (x0,y0) = xy[k-1]
+        (x1,y1) = xy[k]
+        dist = np.sqrt((x1-x0)**2+(y1-y0)**2)
+        nsteps = int(np.ceil(dist/max_step))
+        if nsteps > 1:
+            waypoints[(x1,y1)] = [(x0+(x1-x0)*f,y0+(y1-y0)*f) for f in np.arange(1,nsteps)/float(nsteps)]
+    return waypoints
+
+
+class TravelEstimate():
+    """predicted stage travel for visiting a list of positions"""
+    def __init__(self, xy, speed, settle, waypoints={}, start_xy=None):
+        """
+        keywords)
+        xy) the list of (x,y) positions in the order they are visited
+        speed) the stage speed in microns/sec
+        settle) the time in sec to settle after each move
+        waypoints) intermediate points to stop at on the way to a position, see insert_waypoints
+        start_xy) where the stage is before the first position, if known
+
+        """
+        path = []
+        if start_xy is not None:
+            path.append(tuple(start_xy))
+        for (x,y) in xy:
+            path += waypoints.get((x,y),[])
+            path.append((x,y))
+        self.distance = 0.0
+        self.time = 0.0
+        self.longest_step = 0.0
+        for k in range(1,len(path)):
+            dx = path[k][0]-path[k-1][0]
+            dy = path[k][1]-path[k-1][1]
+            step = np.sqrt(dx*dx+dy*dy)
+            self.distance += step
+            self.longest_step = max(self.longest_step,step)
+            self.time += move_time(dx,dy,speed,settle)
+
+    def __str__(self):
+        return "%.1f mm of travel, %.1f sec of stage moves, longest step %.0f um"%(self.distance/1000.0,self.time,self.longest_step)
+
+
+class PathPlan():
+    """an ordering of the acquisition positions, along with the predicted stage travel before and after"""
+    def __init__(self, positions, waypoints, before, after):
+        self.positions = positions
+        self.waypoints = waypoints
+        self.before = before
+        self.after = after
+
+    def report(self):
+        lines = ["before: %s"%self.before,
+                 "after:  %s"%self.after]
+        if self.before.time > 0:
+            lines.append("predicted stage time saved %.1f sec (%.0f%%)"%(self.before.time-self.after.time,
+                         100.0*(self.before.time-self.after.time)/self.before.time))
+        return "\n".join(lines)
+
+
+def plan_path(positions, serpentine=True, order_sections=False, max_step=None, speed=2000.0, settle=0.1,
+              frame_tol=None, start_xy=None):
+    """reorder the (slice_index,frame_index,x,y) positions of an acquisition to cut down stage travel
+
+    keywords)
+    positions) a list of (slice_index,frame_index,x,y) tuples, the frames of each section together
+    serpentine) whether to visit the frames of each section row by row in alternating directions
+    order_sections) whether to reorder the sections themselves, with nearest neighbour and 2-opt
+    on the section centres, starting from the first section
+    max_step) the longest single stage move allowed (microns), e.g. to not lose the immersion oil,
+    longer steps are discouraged when ordering sections and broken up with waypoints. None for no limit
+    speed) the stage speed in microns/sec, used to predict travel time
+    settle) the stage settling time after each move in seconds
+    frame_tol) the tolerance for grouping frames into rows, defaults to a third of the smallest
+    distance between frames of a section
+    start_xy) where the stage is before the first position, if known
+
+    returns a PathPlan, whose positions keep their original slice and frame indices,
+    the original order is kept if the plan is not predicted to be faster
+    """
+    #group the frames by section keeping the order the sections first appear in
+    sections = []
+    frames = {}
+    for (i,j,x,y) in positions:
+        if i not in frames:
+            sections.append(i)
+            frames[i] = []
+        frames[i].append((i,j,x,y))
+    before = TravelEstimate([(x,y) for (i,j,x,y) in positions],speed,settle,
+                            insert_waypoints([(x,y) for (i,j,x,y) in positions],max_step),start_xy)
+
+    if order_sections and len(sections) > 2:
+        centres = np.array([np.mean([(x,y) for (i,j,x,y) in frames[s]],axis=0) for s in sections])
+        cost = step_costs(distance_matrix(centres),max_step)
+        order = two_opt(cost,nearest_neighbour_order(cost,0))
+        sections = [sections[k] for k in order]
+
+    ordered = []
+    for s in sections:
+        section = frames[s]
+        if serpentine and len(section) > 2:
+            xy = np.array([(x,y) for (i,j,x,y) in section])
+            dist = distance_matrix(xy)
+            tol = frame_tol
+            if tol is None:
+                if not np.any(dist>0):
+                    #all the frames are in the same place, there is nothing to reorder
+                    ordered += section
+                    continue
+                tol = np.min(dist[dist>0])/3.0
+            order = serpentine_order(xy,tol)
+            #only take the serpentine if it is shorter than the order the frames were laid out in
+            if path_length(dist,order) < path_length(dist,range(len(section)))-1e-9:
+                section = [section[k] for k in order]
+            #enter the section at whichever end is closest to where the stage will be
+            if len(ordered) > 0:
+                (i,j,x0,y0) = ordered[-1]
+            elif start_xy is not None:
+                (x0,y0) = start_xy
+            if len(ordered) > 0 or start_xy is not None:
+                (i,j,xf,yf) = section[0]
+                (i,j,xl,yl) = section[-1]
+                if (xl-x0)**2+(yl-y0)**2 < (xf-x0)**2+(yf-y0)**2:
+                    section = section[::-1]
+        ordered += section
+
+    xy = [(x,y) for (i,j,x,y) in ordered]
+    waypoints = insert_waypoints(xy,max_step)
+    after = TravelEstimate(xy,speed,settle,waypoints,start_xy)
+    if after.time >= before.time and ordered != list(positions):
+        #the plan does not save any time, so stick to the original order
+        xy = [(x,y) for (i,j,x,y) in positions]
+        waypoints = insert_waypoints(xy,max_step)
+        return PathPlan(list(positions),waypoints,before,before)
+    return PathPlan(ordered,waypoints,before,after)
@@ -0,0 +1,407 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import math
+
+import numpy as np
+from matplotlib.image import AxesImage
+from matplotlib.transforms import Bbox
+
+from Rectangle import Rectangle
+from TileCache import TileCache
+
+#stop halving tiles once their longest side is this many pixels
+MIN_LEVEL_SIDE = 16
+#the most memory the downsampled levels of the tiles in view are kept in
+DEFAULT_LEVEL_CACHE_MB = 64
+
+
+def level_count(shape, min_side=MIN_LEVEL_SIDE):
+    """how many times a tile of shape (height,width) can be halved before its longest side gets down to about min_side"""
+    (h,w) = shape[:2]
+    levels = 0
+    while max(h,w) >= 2*min_side and min(h,w) >= 2:
+        (h,w) = (h//2,w//2)
+        levels += 1
+    return levels
+
+
+def downsample(data, level):
+    """shrink both dimensions of a 2d array by 2**level by averaging blocks of pixels, dropping the
+    last rows/columns which don't make up a whole block, the same as halving it level times"""
+    f = 2**level
+    (h,w) = data.shape
+    h -= h%f
+    w -= w%f
+    acc = np.zeros((h//f,w//f),np.float32)
+    for i in range(f):
+        for j in range(f):
+            acc += data[i:h:f,j:w:f]
+    acc *= 1.0/(f*f)
+    if np.issubdtype(data.dtype,np.integer):
+        np.rint(acc,out=acc)
+    return acc.astype(data.dtype)
+
+
+def paste(buf, covered, xs, ys, data, box):
+    """nearest neighbour sample data, which covers the Rectangle box, at the pixel centres xs,ys of buf
+
+    keywords)
+    buf) 2d array to paste into, len(ys) x len(xs)
+    covered) boolean array the same shape as buf, set True wherever something was pasted
+    xs,ys) 1d arrays of the stage positions (microns) of the columns and rows of buf
+    data) the 2d array of pixels to paste
+    box) the Rectangle data covers
+
+    """
+    (height,width) = data.shape
+    cols = np.floor((xs-box.left)*width/box.get_width()).astype(np.int)
+    rows = np.floor((ys-box.top)*height/box.get_height()).astype(np.int)
+    in_x = np.nonzero((cols>=0)&(cols<width))[0]
+    in_y = np.nonzero((rows>=0)&(rows<height))[0]
+    if len(in_x) == 0 or len(in_y) == 0:
+        return
+    #the columns/rows inside the box are contiguous, so plain slices of buf will do
+    (c0,c1) = (in_x[0],in_x[-1]+1)
+    (r0,r1) = (in_y[0],in_y[-1]+1)
+    buf[r0:r1,c0:c1] = data[np.ix_(rows[r0:r1],cols[c0:c1])]
+    covered[r0:r1,c0:c1] = True
+
+
+class ViewportImage(AxesImage):
+    """the one AxesImage a PyramidDisplay draws in.  just before it is drawn it has the display catch up,
+    rebuilding the viewport once if the axis limits have changed however many times they changed, and picking
+    up tiles pasted into the viewport since, rather than remaking its masked data for every tile added.  its
+    extent is always that of the viewport, which it reads from the display rather than being given with
+    set_extent, which would autoscale the axis limits"""
+    def __init__(self, display, axis, **kwargs):
+        AxesImage.__init__(self, axis, **kwargs)
+        self.display = display
+
+    def get_extent(self):
+        return self.display.extent
+
+    def get_window_extent(self, renderer=None):
+        (x0,x1,y0,y1) = self.display.extent
+        return Bbox.from_extents([x0,y0,x1,y1]).transformed(self.axes.transData)
+
+    def make_image(self, *args, **kwargs):
+        self.display.refresh_image()
+        return AxesImage.make_image(self, *args, **kwargs)
+
+
+class PyramidDisplay():
+    """draws a collection of tiles into a matplotlib axis as a single composited image
+
+    every tile is sampled into an overview buffer covering the whole stage area at a coarse resolution when
+    it is added, from its pixels or a downsampled copy of them.  what is drawn is one viewport buffer about the
+    size of the axis on screen, rebuilt the next time it is drawn after the axis limits change: zoomed out it
+    is resampled straight from the overview buffer, zoomed in past the overview's resolution it is composited
+    from the tiles intersecting the view (found with a TileIndex), each at the coarsest 2x downsampled level
+    that still has at least one tile pixel per screen pixel.  so matplotlib only ever has one AxesImage of about
+    screen size to draw or recolour, however many tiles there are.  the levels are only made when a tile is
+    drawn zoomed in, from its pixels fetched through get_full_data (e.g. the tile cache), and are kept in a
+    TileCache of their own, so the memory they take is bounded.  where tiles
+    overlap the last one added is on top, as it was with one imshow per tile.
+    """
+    def __init__(self, axis, index, get_full_data, get_overview_data=None, clim=(0,512), cmap='gray', max_side=None,
+                 area=None, overview_max_side=4096, viewport_max_side=2048, level_cache_mb=DEFAULT_LEVEL_CACHE_MB):
+        """
+        keywords)
+        axis) the matplotlib axis to draw into
+        index) the TileIndex holding the bounding boxes of the tiles, under the ids they are added with
+        get_full_data) function of a tile id returning its full resolution pixels
+        get_overview_data) function of a tile id returning a downsampled copy of its pixels to repaint the
+        overview from, defaults to get_full_data
+        clim) the (min,max) of the colormap
+        cmap) the colormap name
+        max_side) never show a tile with more than this many pixels a side, None for no limit
+        area) Rectangle of the stage area the overview buffer starts out covering, it grows to take in
+        tiles outside it. defaults to the first tile
+        overview_max_side) the number of pixels along the longest side of area in the overview buffer
+        viewport_max_side) the most pixels a side of the viewport buffer, whatever the size of the axis
+        level_cache_mb) the most memory to keep downsampled levels of tiles in
+
+        """
+        self.axis = axis
+        self.index = index
+        self.get_full_data = get_full_data
+        self.get_overview_data = get_overview_data if get_overview_data is not None else get_full_data
+        self.clim = clim
+        self.cmap = cmap
+        self.max_side = max_side
+        self.area = area
+        self.overview_max_side = overview_max_side
+        self.viewport_max_side = viewport_max_side
+        #tile id -> full (height,width)
+        self.shapes = {}
+        #(tile id,level) -> the downsampled pixels of that level
+        self.levels = TileCache(max_bytes=int(level_cache_mb*1024*1024))
+        #the order tiles were added in, which is the order they are painted in
+        self.order = []
+        #the overview buffer, its coverage mask, the Rectangle it covers and its microns per pixel
+        self.overview = None
+        self.overview_covered = None
+        self.overview_box = None
+        self.overview_um = None
+        #the one AxesImage everything is drawn in, and the view, grid and extent of its buffer
+        self.image = None
+        self.viewport = None
+        self.viewport_covered = None
+        self.viewport_grid = None
+        self.extent = None
+        #whether the axis limits have changed since the viewport was built
+        self.view_stale = False
+        #whether the viewport has changed since its data was last handed to the image
+        self.image_stale = False
+        self.axis.callbacks.connect('xlim_changed',self.on_limits_changed)
+        self.axis.callbacks.connect('ylim_changed',self.on_limits_changed)
+
+    def add_tile(self, tile_id, data, shape=None):
+        """paste the pixels data of a tile already in the index into the overview and the view
+
+        data can be a downsampled copy of the tile (covering the same box), in which case shape is the
+        (height,width) of the full resolution tile, which is only fetched if it is drawn zoomed in
+        """
+        self.shapes[tile_id] = tuple(shape[:2]) if shape is not None else data.shape[:2]
+        self.order.append(tile_id)
+        #what imshow would have done
+        self.axis.set_aspect('equal')
+        self.paste_overview(tile_id,data)
+        if self.viewport is None:
+            self.update_view()
+            return
+        if self.view_stale:
+            #the viewport is rebuilt from the overview and tiles, this one included, when next drawn
+            return
+        if not self.in_view(tile_id):
+            return
+        #just repaint the part of the viewport under the new tile
+        (view,xs,ys,from_overview) = self.viewport_grid
+        if from_overview:
+            box = self.index.boxes[tile_id]
+            cols = np.nonzero((xs>box.left)&(xs<box.right))[0]
+            rows = np.nonzero((ys>box.top)&(ys<box.bottom))[0]
+            if len(cols) > 0 and len(rows) > 0:
+                (c0,c1,r0,r1) = (cols[0],cols[-1]+1,rows[0],rows[-1]+1)
+                covered = self.viewport_covered[r0:r1,c0:c1]
+                paste(self.viewport[r0:r1,c0:c1],covered,xs[c0:c1],ys[r0:r1],self.overview,self.overview_box)
+                covered &= self.sample_overview_covered(xs[c0:c1],ys[r0:r1])
+        else:
+            self.paste_tile(self.viewport,self.viewport_covered,xs,ys,tile_id,self.choose_level(tile_id,xs,ys))
+        self.image_stale = True
+        self.image.stale = True
+
+    def remove_tile(self, tile_id):
+        box = self.index.boxes[tile_id]
+        for level in range(1,level_count(self.shapes[tile_id])+1):
+            self.levels.invalidate((tile_id,level))
+        del self.shapes[tile_id]
+        self.order.remove(tile_id)
+        self.repaint_overview(box)
+        self.update_view()
+
+    def clear(self):
+        self.shapes = {}
+        self.levels.clear()
+        self.order = []
+        self.overview = None
+        self.overview_covered = None
+        self.overview_box = None
+        self.update_view()
+
+    def get_view(self):
+        (x0,x1) = self.axis.get_xlim()
+        (y0,y1) = self.axis.get_ylim()
+        return Rectangle(x0,x1,y0,y1)
+
+    def in_view(self, tile_id):
+        (view,xs,ys,from_overview) = self.viewport_grid
+        box = self.index.boxes[tile_id]
+        return (box.left<view.right) and (view.left<box.right) and (box.top<view.bottom) and (view.top<box.bottom)
+
+    def choose_level(self, tile_id, xs, ys):
+        """the coarsest level of the tile with at least one of its pixels per pixel of the grid xs,ys"""
+        (height,width) = self.shapes[tile_id]
+        box = self.index.boxes[tile_id]
+        grid_um = min(abs(xs[1]-xs[0]) if len(xs)>1 else np.inf,abs(ys[1]-ys[0]) if len(ys)>1 else np.inf)
+        ratio = grid_um*width/box.get_width()
+        level = 0
+        if ratio > 1:
+            level = int(math.floor(math.log(ratio,2)))
+        if self.max_side:
+            level = max(level,int(math.ceil(math.log(max(height,width)/float(self.max_side),2))))
+        return min(level,level_count((height,width)))
+
+    def get_level(self, tile_id, level):
+        """the pixels of level of a tile and the Rectangle they cover"""
+        (height,width) = self.shapes[tile_id]
+        if level == 0:
+            data = self.get_full_data(tile_id)
+        else:
+            data = self.levels.get((tile_id,level),lambda: downsample(self.get_full_data(tile_id),level))
+        box = self.index.boxes[tile_id]
+        #odd rows/columns get dropped on the way down, so the level may cover slightly less than the box
+        right = box.left + box.get_width()*data.shape[1]*2**level/float(width)
+        bottom = box.top + box.get_height()*data.shape[0]*2**level/float(height)
+        return (data,Rectangle(box.left,right,box.top,bottom))
+
+    def paste_tile(self, buf, covered, xs, ys, tile_id, level):
+        (data,box) = self.get_level(tile_id,level)
+        paste(buf,covered,xs,ys,data,box)
+
+    def grid(self, box, um_per_pixel):
+        """the pixel centres of a grid over box"""
+        nx = max(int(math.ceil(box.get_width()/um_per_pixel)),1)
+        ny = max(int(math.ceil(box.get_height()/um_per_pixel)),1)
+        xs = box.left + (np.arange(nx)+0.5)*um_per_pixel
+        ys = box.top + (np.arange(ny)+0.5)*um_per_pixel
+        return (xs,ys)
+
+    def paste_overview(self, tile_id, data):
+        """sample the tile's pixels data into the overview, which for a memory mapped tile only reads the
+        rows and columns that land on overview pixels"""
+        box = self.index.boxes[tile_id]
+        if self.overview is None:
+            area = self.area if self.area is not None else box
+            self.overview_um = max(area.get_width(),area.get_height())/float(self.overview_max_side)
+            self.overview_box = Rectangle(area.left,area.right,area.top,area.bottom)
+            self.allocate_overview(data.dtype)
+        if not self.overview_box.contains_rect(box):
+            self.grow_overview(box)
+        (xs,ys) = self.grid(self.overview_box,self.overview_um)
+        paste(self.overview,self.overview_covered,xs,ys,data,box)
+
+    def allocate_overview(self, dtype):
+        (xs,ys) = self.grid(self.overview_box,self.overview_um)
+        self.overview = np.zeros((len(ys),len(xs)),dtype)
+        self.overview_covered = np.zeros((len(ys),len(xs)),np.bool)
+
+    def grow_overview(self, box):
+        """make the overview big enough for box, keeping its pixel grid"""
+        old = (self.overview,self.overview_covered,self.overview_box)
+        um = self.overview_um
+        left = old[2].left - um*math.ceil(max(old[2].left-box.left,0)/um)
+        top = old[2].top - um*math.ceil(max(old[2].top-box.top,0)/um)
+        right = max(old[2].right,box.right)
+        bottom = max(old[2].bottom,box.bottom)
+        self.overview_box = Rectangle(left,right,top,bottom)
+        self.allocate_overview(old[0].dtype)
+        c0 = int(round((old[2].left-left)/um))
+        r0 = int(round((old[2].top-top)/um))
+        (h,w) = old[0].shape
+        self.overview[r0:r0+h,c0:c0+w] = old[0]
+        self.overview_covered[r0:r0+h,c0:c0+w] = old[1]
+
+    def repaint_overview(self, box):
+        """paint the part of the overview under box again from the tiles"""
+        if self.overview is None:
+            return
+        (xs,ys) = self.grid(self.overview_box,self.overview_um)
+        cols = np.nonzero((xs>box.left)&(xs<box.right))[0]
+        rows = np.nonzero((ys>box.top)&(ys<box.bottom))[0]
+        if len(cols) == 0 or len(rows) == 0:
+            return
+        (xs,ys) = (xs[cols[0]:cols[-1]+1],ys[rows[0]:rows[-1]+1])
+        buf = self.overview[rows[0]:rows[-1]+1,cols[0]:cols[-1]+1]
+        covered = self.overview_covered[rows[0]:rows[-1]+1,cols[0]:cols[-1]+1]
+        buf[:] = 0
+        covered[:] = False
+        ids = set(self.index.overlapping(box))
+        for tile_id in self.order:
+            if tile_id in ids:
+                paste(buf,covered,xs,ys,self.get_overview_data(tile_id),self.index.boxes[tile_id])
+
+    def update_view(self):
+        """rebuild the viewport buffer for the current axis limits"""
+        if self.overview is None:
+            if self.image is not None:
+                self.image.remove()
+                self.image = None
+            self.viewport = None
+            return
+        view = self.get_view()
+        extent = self.axis.get_window_extent()
+        um = max(view.get_width()/max(extent.width,1),view.get_height()/max(extent.height,1),
+                 max(view.get_width(),view.get_height())/float(self.viewport_max_side))
+        (xs,ys) = self.grid(view,um)
+        self.viewport = np.zeros((len(ys),len(xs)),self.overview.dtype)
+        self.viewport_covered = np.zeros((len(ys),len(xs)),np.bool)
+        from_overview = um >= self.overview_um
+        if from_overview:
+            #zoomed out, the overview has all the detail the screen can show
+            paste(self.viewport,self.viewport_covered,xs,ys,self.overview,self.overview_box)
+            self.viewport_covered &= self.sample_overview_covered(xs,ys)
+        else:
+            ids = set(self.index.overlapping(view))
+            for tile_id in self.order:
+                if tile_id in ids:
+                    self.paste_tile(self.viewport,self.viewport_covered,xs,ys,tile_id,self.choose_level(tile_id,xs,ys))
+        self.viewport_grid = (view,xs,ys,from_overview)
+        self.view_stale = False
+        self.set_image()
+
+    def sample_overview_covered(self, xs, ys):
+        covered = np.zeros((len(ys),len(xs)),np.bool)
+        paste(covered,np.zeros_like(covered),xs,ys,self.overview_covered,self.overview_box)
+        return covered
+
+    def set_image(self):
+        """show the viewport buffer, with the pixels no tile covers left transparent"""
+        (view,xs,ys,from_overview) = self.viewport_grid
+        um_x = xs[1]-xs[0] if len(xs)>1 else view.get_width()
+        um_y = ys[1]-ys[0] if len(ys)>1 else view.get_height()
+        self.extent = (xs[0]-um_x/2,xs[-1]+um_x/2,ys[-1]+um_y/2,ys[0]-um_y/2)
+        self.image_stale = True
+        if self.image is None:
+            self.image = ViewportImage(self,self.axis,cmap=self.cmap)
+            self.image.set_clip_path(self.axis.patch)
+            self.refresh_image()
+            self.image.set_clim(*self.clim)
+            self.axis.add_image(self.image)
+        else:
+            self.image.stale = True
+
+    def refresh_image(self):
+        """bring the image up to date, rebuilding the viewport if the axis limits have changed and handing
+        it the viewport buffer if that has changed, with the pixels no tile covers masked"""
+        if self.view_stale and self.overview is not None:
+            self.update_view()
+        if self.image_stale:
+            self.image.set_data(np.ma.array(self.viewport,mask=~self.viewport_covered))
+            self.image_stale = False
+
+    def on_limits_changed(self, axis):
+        #the x and y limits usually change one after the other, so only rebuild once, when next drawn
+        self.view_stale = True
+        if self.image is not None:
+            self.image.stale = True
+
+    def set_clim(self, vmin, vmax):
+        self.clim = (vmin,vmax)
+        if self.image is not None:
+            self.image.set_clim(vmin,vmax)
+
+    def get_stats(self):
+        """how many tiles there are, how many pixels matplotlib has to resample to draw them and how much
+        memory the downsampled levels take"""
+        pixels = 0
+        if self.viewport is not None:
+            pixels = self.viewport.size
+        return {'tiles':len(self.order),'drawn':1 if self.image is not None else 0,'pixels':pixels,
+                'level_mb':self.levels.nbytes/(1024.0*1024.0)}
@@ -0,0 +1,263 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import os
+import time
+import ctypes
+import Queue
+import multiprocessing as mp
+
+import numpy as np
+
+from FrameStore import FRAME_WRITERS, FrameJournal
+
+STOP_TOKEN = 'STOP!!!'
+#how long (sec) put waits for a free buffer before checking that the writers are still running
+SLOT_TIMEOUT = 5.0
+#how often (sec) close checks on the writers while they finish up
+CLOSE_POLL = 0.1
+
+
+def counter_value(shared):
+    """the value of one of the shared counters, read without its lock, which a terminated writer may still hold"""
+    return shared.get_obj().value
+
+
+def file_save_process(buffers, free_slots, queue, stop_token, metadata_dictionary, stats, backend='tiles',
+                      journal_dir=None, writer_index=0):
+    """body of a writer process, pulls (slot,shape,dtype,token) work items off queue and writes them out
+
+    keywords)
+    buffers) the list of shared memory buffers frames are handed over in
+    free_slots) queue to return a buffer index to once the frame in it has been written
+    queue) the work queue
+    stop_token) the item which tells this writer to quit
+    metadata_dictionary) passed to the frame writer
+    stats) the SavePipeline shared counters (frames_written,bytes_written,in_flight,frames_failed)
+    backend) which of FrameStore.FRAME_WRITERS to write with
+    journal_dir) where to keep this writer's FrameJournal of saved frames, None for no journal
+    writer_index) which writer this is, used to name the journal
+
+    """
+    (frames_written,bytes_written,in_flight,frames_failed) = stats
+    writer = FRAME_WRITERS[backend](metadata_dictionary)
+    journal = None
+    if journal_dir is not None:
+        journal = FrameJournal(journal_dir, writer_index)
+    while True:
+        item = queue.get()
+        if item == stop_token:
+            writer.close()
+            if journal is not None:
+                journal.close()
+            return
+        (slot,shape,dtype,token) = item
+        data = np.frombuffer(buffers[slot], dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+        nbytes = data.nbytes
+        #a frame which can't be written is reported and counted, but its buffer always goes back
+        #so that put doesn't wait forever for it
+        try:
+            writer.write(token, data)
+            if journal is not None:
+                journal.record(token, data)
+            written = True
+        except Exception as e:
+            print "writer %d failed to save %s: %s"%(writer_index,token[4],e)
+            written = False
+        finally:
+            del data
+            free_slots.put(slot)
+        if written:
+            with frames_written.get_lock():
+                frames_written.value += 1
+            with bytes_written.get_lock():
+                bytes_written.value += nbytes
+        else:
+            with frames_failed.get_lock():
+                frames_failed.value += 1
+        with in_flight.get_lock():
+            in_flight.value -= 1
+
+
+class SavePipeline():
+    """a pool of writer processes fed through a fixed number of shared memory frame buffers
+
+    frames are copied into a free shared buffer and only the small (slot,shape,dtype,metadata)
+    description is pickled through the work queue.  when all the buffers are full, put blocks
+    until a writer frees one up, so a stalled disk slows the acquisition down rather than
+    letting the backlog grow until we run out of memory.
+
+    each writer has its own work queue.  for backends which need the frames of a section/channel
+    written in order (e.g. SectionStackWriter) every section/channel is sent to the same writer,
+    otherwise frames are dealt out to the writers in turn.
+    """
+    def __init__(self, metadata_dictionary, frame_bytes, num_writers=2, num_buffers=32, backend='tiles',
+                 journal_dir=None):
+        """
+        keywords)
+        metadata_dictionary) passed through to the frame writer for each frame
+        frame_bytes) the size in bytes of each shared buffer, put refuses frames larger than this
+        num_writers) how many writer processes to run
+        num_buffers) how many frames can be waiting to be written before put blocks
+        backend) which of FrameStore.FRAME_WRITERS to save the frames with
+        journal_dir) the directory to keep a FrameJournal of saved frames in, so an interrupted
+        acquisition can be resumed, None to not keep one
+
+        """
+        self.metadata_dictionary = metadata_dictionary
+        self.frame_bytes = frame_bytes
+        self.num_writers = num_writers
+        self.num_buffers = num_buffers
+        self.buffers = [mp.RawArray(ctypes.c_char, frame_bytes) for i in range(num_buffers)]
+        self.free_slots = mp.Queue()
+        for i in range(num_buffers):
+            self.free_slots.put(i)
+        self.backend = backend
+        self.journal_dir = journal_dir
+        self.queues = [mp.Queue() for i in range(num_writers)]
+        #(slice_index,prot_name) -> writer, for ordered backends
+        self.routes = {}
+        self.next_writer = 0
+        self.frames_written = mp.Value('i',0)
+        self.bytes_written = mp.Value('d',0.0)
+        self.in_flight = mp.Value('i',0)
+        self.frames_failed = mp.Value('i',0)
+        self.max_queue_depth = 0
+        self.blocked_time = 0.0
+        self.writers = []
+        self.start_time = None
+
+    def start(self):
+        """start up the writer processes"""
+        stats = (self.frames_written,self.bytes_written,self.in_flight,self.frames_failed)
+        for i in range(self.num_writers):
+            writer = mp.Process(target=file_save_process,
+                                args=(self.buffers,self.free_slots,self.queues[i],STOP_TOKEN,
+                                      self.metadata_dictionary,stats,self.backend,self.journal_dir,i))
+            writer.daemon = True
+            writer.start()
+            self.writers.append(writer)
+        self.start_time = time.time()
+
+    def put(self, item):
+        """hand a (slice_index,frame_index,z_index,prot_name,path,data,ch,x,y,z) tuple over to be written,
+        blocks while every shared buffer is waiting to be written, raises IOError if a writer has died
+        and ValueError if the frame is bigger than the buffers"""
+        (slice_index,frame_index,z_index,prot_name,path,data,ch,x,y,z) = item
+        token = (slice_index,frame_index,z_index,prot_name,path,ch,x,y,z)
+        data = np.ascontiguousarray(data)
+        if data.nbytes > self.frame_bytes:
+            raise ValueError("a %s frame of %d bytes does not fit in the %d byte buffers of the save pipeline"%
+                             (str(data.shape),data.nbytes,self.frame_bytes))
+        t0 = time.time()
+        while True:
+            try:
+                slot = self.free_slots.get(True,SLOT_TIMEOUT)
+                break
+            except Queue.Empty:
+                self.check_writers()
+        self.blocked_time += time.time()-t0
+        self.count_in()
+        shared = np.frombuffer(self.buffers[slot], dtype=data.dtype, count=data.size).reshape(data.shape)
+        shared[:] = data
+        self.route(token).put((slot,data.shape,data.dtype.str,token))
+
+    def check_writers(self):
+        """raise IOError if any of the writer processes has died, as the frames sent to it will never be
+        written and the buffers they are in never freed"""
+        for (i,writer) in enumerate(self.writers):
+            if not writer.is_alive():
+                raise IOError("frame writer %d stopped unexpectedly (exit code %s)"%(i,writer.exitcode))
+
+    def route(self, token):
+        """pick the work queue of the writer which should save the frame described by token"""
+        if FRAME_WRITERS[self.backend].ordered:
+            key = (token[0],token[3])
+            if key not in self.routes:
+                self.routes[key] = self.next_writer
+                self.next_writer = (self.next_writer+1)%self.num_writers
+            return self.queues[self.routes[key]]
+        queue = self.queues[self.next_writer]
+        self.next_writer = (self.next_writer+1)%self.num_writers
+        return queue
+
+    def count_in(self):
+        """record that one more frame has been handed over to the writers"""
+        with self.in_flight.get_lock():
+            self.in_flight.value += 1
+            self.max_queue_depth = max(self.max_queue_depth,self.in_flight.value)
+
+    def get_queue_depth(self):
+        """the number of frames handed over but not yet written"""
+        return counter_value(self.in_flight)
+
+    def get_stats(self):
+        """returns a dictionary describing the throughput of the pipeline so far"""
+        if self.start_time is None:
+            elapsed = 0.0
+        else:
+            elapsed = time.time()-self.start_time
+        mb_written = counter_value(self.bytes_written)/(1024.0*1024.0)
+        if elapsed > 0:
+            mb_per_sec = mb_written/elapsed
+            frames_per_sec = counter_value(self.frames_written)/elapsed
+        else:
+            mb_per_sec = 0.0
+            frames_per_sec = 0.0
+        return {'frames_written':counter_value(self.frames_written),
+                'frames_failed':counter_value(self.frames_failed),
+                'mb_written':mb_written,
+                'mb_per_sec':mb_per_sec,
+                'frames_per_sec':frames_per_sec,
+                'queue_depth':self.get_queue_depth(),
+                'max_queue_depth':self.max_queue_depth,
+                'blocked_time':self.blocked_time,
+                'elapsed':elapsed}
+
+    def close(self, timeout=None):
+        """let the writers finish what has been queued, then stop them
+
+        keywords)
+        timeout) give up once no frame has been finished for this long (sec), terminating the writers,
+        None waits for as long as they take
+
+        returns the number of frames which were handed over but never written, e.g. because a writer stalled
+        """
+        for queue in self.queues:
+            queue.put(STOP_TOKEN)
+        done = counter_value(self.frames_written)+counter_value(self.frames_failed)
+        last_progress = time.time()
+        while any([writer.is_alive() for writer in self.writers]):
+            for writer in self.writers:
+                writer.join(CLOSE_POLL)
+            now_done = counter_value(self.frames_written)+counter_value(self.frames_failed)
+            if now_done != done:
+                done = now_done
+                last_progress = time.time()
+            elif timeout is not None and time.time()-last_progress > timeout:
+                print "writers saved nothing for %.0f sec, terminating them"%timeout
+                for writer in self.writers:
+                    if writer.is_alive():
+                        writer.terminate()
+                        writer.join()
+                break
+        self.writers = []
+        dropped = self.get_queue_depth()
+        if dropped > 0:
+            print "%d frames were handed over but not saved"%dropped
+        return dropped
@@ -1,553 +1,854 @@
-#===============================================================================
-# 
-#  License: GPL
-# 
-#  This program is free software; you can redistribute it and/or
-#  modify it under the terms of the GNU General Public License 2
-#  as published by the Free Software Foundation.
-# 
-#  This program is distributed in the hope that it will be useful,
-#  but WITHOUT ANY WARRANTY; without even the implied warranty of
-#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
-#  GNU General Public License for more details.
-# 
-#   You should have received a copy of the GNU General Public License
-#  along with this program; if not, write to the Free Software
-#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
-# 
-#===============================================================================
-import wx
-
-class ZstackSettings():
-
-    def __init__(self,zstack_delta = 1.0, zstack_number = 3.0, zstack_flag = True):
-        self.zstack_flag = zstack_flag
-        self.zstack_delta = zstack_delta
-        self.zstack_number = int(zstack_number + (1 - zstack_number % 2))
-
-    def save_settings(self,cfg):
-        cfg.WriteFloat('zstack_delta/',self.zstack_delta)
-        cfg.WriteBool('zstack_flag/',self.zstack_flag)
-        cfg.WriteInt('zstack_number/',self.zstack_number)
-
-    def load_settings(self,cfg):
-        self.zstack_delta = cfg.ReadFloat('zstack_delta/')
-        self.zstack_flag = cfg.ReadBool('zstack_flag/')
-        self.zstack_number = cfg.ReadInt('zstack_number/')
-
-class ChangeZstackSettings(wx.Dialog):
-    def __init__(self, parent, id, title, settings,style):
-        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
-        vbox =wx.BoxSizer(wx.VERTICAL)
-
-        self.settings = settings
-        self.zflagtxt = wx.StaticText(self,label="Take Z stacks?")
-        self.checkBox = wx.CheckBox(self)
-        self.checkBox.SetValue(settings.zstack_flag)
-        self.znumberTxt = wx.StaticText(self,label="number of images to take (forced to be odd for middle=current)")
-        self.znumberIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.zstack_number,size=(50,-1))
-        self.zdeltaTxt = wx.StaticText(self,label="z step between images (microns)")
-        self.zdeltaFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self,
-                                       value=settings.zstack_delta,
-                                       min_val=0,
-                                       max_val=10.0,
-                                       increment=.01,
-                                       digits=2,
-                                       name='',
-                                       size=(95,-1))
-        ok_button = wx.Button(self,wx.ID_OK,'OK')
-        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
-        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
-        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
-        hbox3 = wx.BoxSizer(wx.HORIZONTAL)
-        hbox4 = wx.BoxSizer(wx.HORIZONTAL)
-        hbox1.Add(self.zflagtxt)
-        hbox1.Add(self.checkBox)
-        hbox2.Add(self.znumberIntCtrl)
-        hbox2.Add(self.znumberTxt)
-        hbox3.Add(self.zdeltaFloatCtrl)
-        hbox3.Add(self.zdeltaTxt)
-        hbox4.Add(ok_button)
-        hbox4.Add(cancel_button)
-        vbox.Add(hbox1)
-        vbox.Add(hbox2)
-        vbox.Add(hbox3)
-        vbox.Add(hbox4)
-        self.SetSizer(vbox)
-
-    def GetSettings(self):
-        flag        = self.checkBox.GetValue()
-        stacksize   = self.znumberIntCtrl.GetValue()
-        delta       = self.zdeltaFloatCtrl.GetValue()
-        return ZstackSettings(zstack_delta = delta,zstack_number = stacksize,zstack_flag = flag)
-
-class CorrSettings():
-
-    def __init__(self,window=100,delta=75,skip = 3,corr_thresh = .3):
-    
-        self.window = window
-        self.delta = delta
-        self.skip = skip
-        self.corr_thresh  = corr_thresh
-        
-    def save_settings(self,cfg):
-        cfg.WriteInt('CorrTool_window',self.window)
-        cfg.WriteInt('CorrTool_delta',self.delta)
-        cfg.WriteInt('CorrTool_skip',self.skip)
-        cfg.WriteFloat('CorrTool_corr_thresh',self.corr_thresh)
-    
-    def load_settings(self,cfg):
-        self.window=cfg.ReadInt('CorrTool_window',100)
-        self.delta=cfg.ReadInt('CorrTool_delta',75)
-        self.skip = cfg.ReadInt('CorrTool_skip',3)
-        self.corr_thresh = cfg.ReadFloat('CorrTool_corr_thresh',.3)
-
-class ChangeCorrSettings(wx.Dialog):
-    def __init__(self, parent, id, title, settings,style):
-        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
-        vbox =wx.BoxSizer(wx.VERTICAL)
-        
-        self.settings = settings
-        self.windowTxt = wx.StaticText(self,label="window in microns to cutout")
-        self.windowIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.window,size=(50,-1))
-        #self.deltaTxt = wx.StaticText(self,label="delta (in pixels) to search for maximum")
-        #self.deltaIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.delta,size=(50,-1))
-        #self.skipTxt = wx.StaticText(self,label="number of pixels to skip when searching")
-        #self.skipIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.skip,size=(50,-1))
-        
-
-        self.corr_threshThresholdTxt = wx.StaticText(self,label="correlation threshold to accept match (0.0-1.0)")
-        self.corr_threshThresholdFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self, 
-                                       value=settings.corr_thresh,
-                                       min_val=0,
-                                       max_val=1.0,
-                                       increment=.01,
-                                       digits=2,
-                                       name='',
-                                       size=(95,-1)) 
-        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
-        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
-        
-        hbox1.Add(self.windowIntCtrl)
-        hbox1.Add(self.windowTxt)
-        #hbox1.Add(self.deltaIntCtrl)
-        #hbox1.Add(self.skipIntCtrl)
-
-        #hbox2.Add(self.deltaTxt)
-        #hbox2.Add(self.skipTxt)
-        hbox2.Add(self.corr_threshThresholdFloatCtrl)
-        hbox2.Add(self.corr_threshThresholdTxt)   
-
-        hbox3 = wx.BoxSizer(wx.HORIZONTAL)      
-        ok_button = wx.Button(self,wx.ID_OK,'OK')
-        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
-        hbox3.Add(ok_button)
-        hbox3.Add(cancel_button)
-        
-        vbox.Add(hbox1)
-        vbox.Add(hbox2)
-        vbox.Add(hbox3)
-
-        self.SetSizer(vbox)
-        
-    def GetSettings(self):
-        window=self.windowIntCtrl.GetValue()
-        #delta=self.deltaIntCtrl.GetValue()
-        #skip=self.skipIntCtrl.GetValue()
-        corr_thresh=self.corr_threshThresholdFloatCtrl.GetValue()
-
-        return CorrSettings(window=window,corr_thresh=corr_thresh)
-
-class SiftSettings():
-
-    def __init__(self,contrastThreshold=.05,numFeatures=1000,inlier_thresh = 12):
-    
-        self.contrastThreshold=contrastThreshold
-        self.numFeatures=numFeatures
-        self.inlier_thresh = inlier_thresh
-        
-    def save_settings(self,cfg):
-        cfg.WriteInt('numFeatures',self.numFeatures)
-        cfg.WriteInt('inlier_thresh',self.inlier_thresh)
-        cfg.WriteFloat('contrastThreshold',self.contrastThreshold)
-    
-    def load_settings(self,cfg):
-        self.numFeatures=cfg.ReadInt('numFeatures',1000)
-        self.contrastThreshold=cfg.ReadFloat('contrastThreshold',0.5)
-        self.inlier_thresh = cfg.ReadInt('inlier_thresh',12)
-        
-class ChangeSiftSettings(wx.Dialog):
-    def __init__(self, parent, id, title, settings,style):
-        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))   
-        vbox =wx.BoxSizer(wx.VERTICAL)
-        
-        self.settings=settings
-        self.numFeatureTxt=wx.StaticText(self,label="max features")
-        self.numFeatureIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.numFeatures,size=(50,-1))
-        self.inlierThreshTxt=wx.StaticText(self,label="minimum inliers for match")
-        self.inlierThreshIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.inlier_thresh,size=(50,-1))
-
-        self.contrastThresholdTxt = wx.StaticText(self,label="contrast threshold")
-        self.contrastThresholdFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self, 
-                                       value=settings.contrastThreshold,
-                                       min_val=0,
-                                       max_val=12.0,
-                                       increment=.01,
-                                       digits=2,
-                                       name='',
-                                       size=(95,-1)) 
-        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
-        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
-        
-        hbox1.Add(self.numFeatureTxt)
-        hbox1.Add(self.numFeatureIntCtrl)
-        hbox1.Add(self.inlierThreshIntCtrl)
-        
-        hbox2.Add(self.contrastThresholdTxt)
-        hbox2.Add(self.contrastThresholdFloatCtrl)
-        hbox2.Add(self.inlierThreshTxt)
-
-        
-       
-
-        hbox3 = wx.BoxSizer(wx.HORIZONTAL)      
-        ok_button = wx.Button(self,wx.ID_OK,'OK')
-        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
-        hbox3.Add(ok_button)
-        hbox3.Add(cancel_button)
-        
-        vbox.Add(hbox1)
-        vbox.Add(hbox2)
-        vbox.Add(hbox3)
-
-        self.SetSizer(vbox)
-        
-    def GetSettings(self):
-        numFeatures = self.numFeatureIntCtrl.GetValue()
-        contrastThreshold = self.contrastThresholdFloatCtrl.GetValue()
-        inlier_thresh = self.inlierThreshIntCtrl.GetValue()
-        return SiftSettings(contrastThreshold,numFeatures,inlier_thresh)
-        
-        
-class CameraSettings():
-    """simple struct for containing the parameters for the camera"""
-    def __init__(self,sensor_height=1040,sensor_width=1388,pix_width=6.5,pix_height=6.5):
-        #in pixels        
-        self.sensor_height=sensor_height
-        self.sensor_width=sensor_width
-        #in microns
-        self.pix_width=pix_width
-        self.pix_height=pix_height
-    def save_settings(self,cfg):
-        cfg.WriteInt('sensor_height',self.sensor_height)
-        cfg.WriteInt('sensor_width',self.sensor_width)
-        cfg.WriteFloat('pix_width',self.pix_width)
-        cfg.WriteFloat('pix_height',self.pix_height)
-    def load_settings(self,cfg):
-        self.sensor_height=cfg.ReadInt('sensor_height',1040)
-        self.sensor_width=cfg.ReadInt('sensor_width',1388)
-        self.pix_width=cfg.ReadFloat('pix_width',6.5)
-        self.pix_height=cfg.ReadFloat('pix_height',6.5)
-
-class ChannelSettings():
-    """simple struct for containing the parameters for the microscope"""
-    def __init__(self,channels,exposure_times=dict([]),zoffsets=dict([]),usechannels=dict([]),prot_names=dict([]),map_chan=None,def_exposure=100,def_offset=0.0,):
-        #def_exposure is default exposure time in msec
-       
-        
-        self.channels= channels
-        self.def_exposure=def_exposure
-        self.def_offset=0.0
-        
-        self.exposure_times=exposure_times
-        self.zoffsets=zoffsets
-        self.usechannels=usechannels
-        self.prot_names=prot_names
-
-        if map_chan is None:
-            for ch in self.channels:
-                if 'dapi' in ch.lower():
-                    map_chan = ch
-        if map_chan is None:
-            map_chan = channels[0]
-            
-        self.map_chan = map_chan
-        
-    def save_settings(self,cfg):    
-        
-        cfg.Write('map_chan',self.map_chan)
-        for ch in self.channels:
-            cfg.WriteInt('Exposures/'+ch,self.exposure_times[ch])
-            cfg.WriteFloat('ZOffsets/'+ch,self.zoffsets[ch])
-            cfg.WriteBool('UseChannel/'+ch,self.usechannels[ch])
-            cfg.Write('ProteinNames/'+ch,self.prot_names[ch])
-
-
-    def load_settings(self,cfg):
-        for ch in self.channels:
-            self.exposure_times[ch]=cfg.ReadInt('Exposures/'+ch, self.def_exposure)
-            self.zoffsets[ch]=cfg.ReadFloat('ZOffsets/'+ch,self.def_offset)
-            self.usechannels[ch]=cfg.ReadBool('UseChannel/'+ch,True)
-            self.prot_names[ch]=cfg.Read('ProteinNames/'+ch,ch)
-        self.map_chan=str(cfg.Read('map_chan','DAPI'))
-
-class ChangeChannelSettings(wx.Dialog):
-    """simple dialog for changing the channel settings"""
-    def __init__(self, parent, id, title, settings,style):
-        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
-        
-        self.settings=settings
-        vbox = wx.BoxSizer(wx.VERTICAL)   
-        Nch=len(settings.channels)
-        print Nch
-        
-        gridSizer=wx.FlexGridSizer(rows=Nch+3,cols=6,vgap=5,hgap=5)
-        
-      
-        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="chan"),border=5)
-        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="protein"),border=5)     
-        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="use?"),border=5)
-        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="exposure"),border=5)
-        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="map?"),border=5)
-        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="zoffset     "),border=5)
-
-        self.ProtNameCtrls=[]
-        self.UseCtrls=[]
-        self.ExposureCtrls=[]
-        self.MapRadCtrls=[]
-        self.ZOffCtrls=[]
-        
-        for ch in settings.channels:
-            hbox =wx.BoxSizer(wx.HORIZONTAL)
-            Txt=wx.StaticText(self,label=ch)
-            ProtText=wx.TextCtrl(self,value=settings.prot_names[ch])
-            ChBox = wx.CheckBox(self)
-            ChBox.SetValue(settings.usechannels[ch])
-            IntCtrl=wx.lib.intctrl.IntCtrl( self, value=settings.exposure_times[ch],size=(50,-1))
-            FloatCtrl=wx.lib.agw.floatspin.FloatSpin(self, 
-                                       value=settings.zoffsets[ch],
-                                       min_val=-3.0,
-                                       max_val=3.0,
-                                       increment=.1,
-                                       digits=2,
-                                       name='',
-                                       size=(95,-1)) 
-               
-            if ch is settings.channels[0]:
-                RadBut = wx.RadioButton(self,-1,'',style=wx.RB_GROUP)
-            else:
-                RadBut = wx.RadioButton(self,-1,'')
-            if ch == settings.map_chan:
-                RadBut.SetValue(True)
-                
-            gridSizer.Add(Txt,0,flag=wx.ALL|wx.EXPAND,border=5)
-            gridSizer.Add(ProtText,1,flag=wx.ALL|wx.EXPAND,border=5)
-            gridSizer.Add(ChBox,0,flag=wx.ALL|wx.EXPAND,border=5)
-            gridSizer.Add(IntCtrl,0,border=5)
-            gridSizer.Add(RadBut,0,flag=wx.ALL|wx.EXPAND,border=5)
-            gridSizer.Add(FloatCtrl,0,flag=wx.ALL|wx.EXPAND,border=5)
-            
-            self.ProtNameCtrls.append(ProtText)
-            self.UseCtrls.append(ChBox)
-            self.ExposureCtrls.append(IntCtrl)
-            self.MapRadCtrls.append(RadBut)
-            self.ZOffCtrls.append(FloatCtrl)
-        
-           
-        hbox = wx.BoxSizer(wx.HORIZONTAL)      
-        ok_button = wx.Button(self,wx.ID_OK,'OK')
-        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
-        hbox.Add(ok_button)
-        hbox.Add(cancel_button)
-        
-        vbox.Add(gridSizer)
-        vbox.Add(hbox)
-        
-        self.SetSizer(vbox)
-    
-        
-    def GetSettings(self):
-        prot_names=dict([])
-        usechannels=dict([])
-        exposure_times=dict([])
-        zoffsets=dict([])
-        
-        for i,ch in enumerate(self.settings.channels):
-            prot_names[ch]=self.ProtNameCtrls[i].GetValue()
-            usechannels[ch]=self.UseCtrls[i].GetValue()
-            exposure_times[ch]=self.ExposureCtrls[i].GetValue()
-            if self.MapRadCtrls[i].GetValue():
-                map_chan=ch
-            zoffsets[ch]=self.ZOffCtrls[i].GetValue()
-        return ChannelSettings(self.settings.channels,exposure_times=exposure_times,zoffsets=zoffsets,usechannels=usechannels,prot_names=prot_names,map_chan=map_chan)
-        
- 
-class MosaicSettings:
-    def __init__(self,mag=65.486,mx=1,my=1,overlap=10,show_box=False,show_frames=False):
-        """a simple struct class for encoding settings about mosaics
-        
-        keywords)
-        mag=magnification of objective
-        mx=integer number of columns in a rectangular mosaic
-        my=integer number of rows in a rectangular mosaic
-        overlap=percentage overlap of individual frames (0-100)
-        show_box=boolean as to whether to display the box
-        show_frames=Boolean as to whether to display the individual frames
-        
-        """
-        self.mx=mx
-        self.my=my
-        self.overlap=overlap
-        self.show_box=show_box
-        self.show_frames=show_frames
-        self.mag=mag
-    def save_settings(self,cfg):
-        cfg.WriteFloat('mosaic_mag',self.mag)
-        cfg.WriteInt('mosaic_mx',self.mx)
-        cfg.WriteInt('mosaic_my',self.my)
-        cfg.WriteInt('mosaic_overlap',self.overlap)
-        cfg.WriteBool('mosaic_show_box',self.show_box)
-        cfg.WriteBool('mosaic_show_frames',self.show_frames)
-        
-    def load_settings(self,cfg):
-        self.mag=cfg.ReadFloat('mosaic_mag',65.486)
-        self.mx=cfg.ReadInt('mosaic_mx',1)
-        self.my=cfg.ReadInt('mosaic_my',1)
-        self.overlap=cfg.ReadInt('mosaic_overlap',10)
-        self.show_box=cfg.WriteBool('mosaic_show_box',False)
-        self.show_frames=cfg.WriteBool('mosaic_show_frames',False)
-        
-  
-class ChangeCameraSettings(wx.Dialog):
-    """simple dialog for changing the camera settings"""
-    def __init__(self, parent, id, title, settings):
-        wx.Dialog.__init__(self, parent, id, title, size=(230, 210))
-        panel = wx.Panel(self, -1)
-        vbox = wx.BoxSizer(wx.VERTICAL)       
-        self.widthIntCtrl=wx.lib.intctrl.IntCtrl( panel, value=settings.sensor_width,pos=(95,5),size=( 90, -1 ) )
-        self.heightIntCtrl=wx.lib.intctrl.IntCtrl( panel, value=settings.sensor_height,pos=(95,35),size=( 90, -1 ) )
-        self.pixwidthFloatCtrl=wx.lib.agw.floatspin.FloatSpin(panel, pos=(95,65),size=( 90, -1 ),
-                                       value=settings.pix_width,
-                                       min_val=0.1,
-                                       max_val=100,
-                                       increment=.1,
-                                       digits=2,
-                                       name='pix_width')
-        self.pixheightFloatCtrl=wx.lib.agw.floatspin.FloatSpin(panel, pos=(95,95),size=( 90, -1 ),
-                                       value=settings.pix_height,
-                                       min_val=0.1,
-                                       max_val=100,
-                                       increment=.1,
-                                       digits=2,
-                                       name='pix_height')                             
-                                         
-        wx.StaticText(panel,id=wx.ID_ANY,label="Width (pixels)",pos=(5,8))
-        wx.StaticText(panel,id=wx.ID_ANY,label="Height (pixels)",pos=(5,38))  
-        wx.StaticText(panel,id=wx.ID_ANY,label="Pixel Width (um)",pos=(5,68))  
-        wx.StaticText(panel,id=wx.ID_ANY,label="Pixel Height (um)",pos=(5,98)) 
-                                         
-        hbox = wx.BoxSizer(wx.HORIZONTAL)
-        okButton = wx.Button(self, wx.ID_OK, 'Ok', size=(70, 30))
-       # closeButton = wx.Button(self, wx.ID_CLOSE, 'Close', size=(70, 30))
-        hbox.Add(okButton, 1)
-        #hbox.Add(closeButton, 1, wx.LEFT, 5)
-        vbox.Add(panel)
-        vbox.Add(hbox, 1, wx.ALIGN_CENTER | wx.TOP | wx.BOTTOM, 10)
-        self.SetSizer(vbox)
-    def GetSettings(self):
-        """extracts the Camera Settings from the controls"""
-        return CameraSettings(sensor_width=self.widthIntCtrl.GetValue(),
-                              sensor_height=self.heightIntCtrl.GetValue(),
-                              pix_width=self.pixwidthFloatCtrl.GetValue(),
-                              pix_height=self.pixheightFloatCtrl.GetValue())
-        
-class ImageSettings():
-    def __init__(self,extent=[0,10,10,0]):
-        self.extent=extent
-        
-class ChangeImageMetadata(wx.Dialog):
-    """simple dialog for edchanging the camera settings"""
-    def __init__(self, parent, id, title, settings=ImageSettings()):
-        wx.Dialog.__init__(self, parent, id, title, size=(230, 210))
-        panel = wx.Panel(self, -1)
-        vbox = wx.BoxSizer(wx.VERTICAL)       
-        self.minXIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[0],pos=(125,5),size=( 90, -1 ),increment=1,digits=2 )
-        self.maxXIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[1],pos=(125,35),size=( 90, -1 ),increment=1,digits=2 )
-        self.minYIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[3],pos=(125,65),size=( 90, -1 ),increment=1,digits=2 )
-        self.maxYIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[2],pos=(125,95),size=( 90, -1 ),increment=1,digits=2 )
-                                                           
-        wx.StaticText(panel,id=wx.ID_ANY,label="Minimum X (um)",pos=(5,8))
-        wx.StaticText(panel,id=wx.ID_ANY,label="Maximum X (um)",pos=(5,38))  
-        wx.StaticText(panel,id=wx.ID_ANY,label="Minimum Y (um) (bottom)",pos=(5,68))  
-        wx.StaticText(panel,id=wx.ID_ANY,label="Maximum Y (um) (top)",pos=(5,98)) 
-                                         
-        hbox = wx.BoxSizer(wx.HORIZONTAL)
-        okButton = wx.Button(self, wx.ID_OK, 'Ok', size=(70, 30))
-       # closeButton = wx.Button(self, wx.ID_CLOSE, 'Close', size=(70, 30))
-        hbox.Add(okButton, 1)
-        #hbox.Add(closeButton, 1, wx.LEFT, 5)
-        vbox.Add(panel)
-        vbox.Add(hbox, 1, wx.ALIGN_CENTER | wx.TOP | wx.BOTTOM, 10)
-        self.SetSizer(vbox)
-    def GetSettings(self):
-        """extracts the Camera Settings from the controls"""
-        return ImageSettings(extent=[self.minXIntCtrl.GetValue(),
-                                     self.maxXIntCtrl.GetValue(),
-                                     self.maxYIntCtrl.GetValue(),
-                                     self.minYIntCtrl.GetValue()])
-        
-
-class SmartSEMSettings():
-    def __init__(self,mag=1200,tilt=0.33,rot=0,Z=0.0125,WD=0.00632568):
-        self.mag=mag
-        self.tilt=tilt
-        self.rot=rot
-        self.Z=Z
-        self.WD=WD
-    def save_settings(self,cfg):
-        cfg.WriteInt('SEM_mag',self.mag)
-        cfg.WriteFloat('SEM_tilt',self.tilt)
-        cfg.WriteFloat('SEM_rot',self.rot)
-        cfg.WriteFloat('SEM_Z',self.Z)
-        cfg.WriteFloat('SEM_WD',self.WD)
-    def load_settings(self,cfg):
-        self.mag=cfg.ReadInt('SEM_mag',1200)
-        self.tilt=cfg.ReadFloat('SEM_tilt',0.33)
-        self.rot=cfg.ReadFloat('SEM_rot',0)
-        self.Z=cfg.ReadFloat('SEM_Z',0.0125)
-        self.WD=cfg.ReadFloat('SEM_WD',0.00632568)
-        
-class ChangeSEMSettings(wx.Dialog):
-    """simple dialog for edchanging the camera settings"""
-    def __init__(self, parent, id, title, settings=SmartSEMSettings()):
-        wx.Dialog.__init__(self, parent, id, title, size=(230, 210))
-        panel = wx.Panel(self, -1)
-        vbox = wx.BoxSizer(wx.VERTICAL)       
-        self.magCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.mag,pos=(125,5),size=( 90, -1 ),increment=100,digits=2 )
-        self.tiltCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.tilt,pos=(125,35),size=( 90, -1 ),increment=1,digits=4 )
-        self.rotCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.rot,pos=(125,65),size=( 90, -1 ),increment=1,digits=4 )
-        self.ZCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.Z,pos=(125,95),size=( 90, -1 ),increment=1,digits=4 )
-        self.WDCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.WD,pos=(125,125),size=( 90, -1 ),increment=1,digits=4 )
-        
-        wx.StaticText(panel,id=wx.ID_ANY,label="magnification (prop. area)",pos=(5,8))
-        wx.StaticText(panel,id=wx.ID_ANY,label="tilt (radians)",pos=(5,38))  
-        wx.StaticText(panel,id=wx.ID_ANY,label="rotation (radians)",pos=(5,68))  
-        wx.StaticText(panel,id=wx.ID_ANY,label="Z location (mm)",pos=(5,98))
-        wx.StaticText(panel,id=wx.ID_ANY,label="WD working distance? (mm)",pos=(5,128))
-                                         
-        hbox = wx.BoxSizer(wx.HORIZONTAL)
-        okButton = wx.Button(self, wx.ID_OK, 'Ok', size=(70, 30))
-       # closeButton = wx.Button(self, wx.ID_CLOSE, 'Close', size=(70, 30))
-        hbox.Add(okButton, 1)
-        #hbox.Add(closeButton, 1, wx.LEFT, 5)
-        vbox.Add(panel)
-        vbox.Add(hbox, 1, wx.ALIGN_CENTER | wx.TOP | wx.BOTTOM, 10)
-        self.SetSizer(vbox)
-    def GetSettings(self):
-        """extracts the Camera Settings from the controls"""
-        return SmartSEMSettings(mag=self.magCtrl.GetValue(),
-                                     tilt=self.tiltCtrl.GetValue(),
-                                     rot=self.rotCtrl.GetValue(),
-                                     Z=self.ZCtrl.GetValue(),
-                                     WD=self.WDCtrl)
+#===============================================================================
+# 
+#  License: GPL
+# 
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+# 
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+# 
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+# 
+#===============================================================================
+import wx
+import multiprocessing
+
+class ZstackSettings():
+
+    def __init__(self,zstack_delta = 1.0, zstack_number = 3.0, zstack_flag = True):
+        self.zstack_flag = zstack_flag
+        self.zstack_delta = zstack_delta
+        self.zstack_number = int(zstack_number + (1 - zstack_number % 2))
+
+    def save_settings(self,cfg):
+        cfg.WriteFloat('zstack_delta/',self.zstack_delta)
+        cfg.WriteBool('zstack_flag/',self.zstack_flag)
+        cfg.WriteInt('zstack_number/',self.zstack_number)
+
+    def load_settings(self,cfg):
+        self.zstack_delta = cfg.ReadFloat('zstack_delta/')
+        self.zstack_flag = cfg.ReadBool('zstack_flag/')
+        self.zstack_number = cfg.ReadInt('zstack_number/')
+
+class ChangeZstackSettings(wx.Dialog):
+    def __init__(self, parent, id, title, settings,style):
+        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
+        vbox =wx.BoxSizer(wx.VERTICAL)
+
+        self.settings = settings
+        self.zflagtxt = wx.StaticText(self,label="Take Z stacks?")
+        self.checkBox = wx.CheckBox(self)
+        self.checkBox.SetValue(settings.zstack_flag)
+        self.znumberTxt = wx.StaticText(self,label="number of images to take (forced to be odd for middle=current)")
+        self.znumberIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.zstack_number,size=(50,-1))
+        self.zdeltaTxt = wx.StaticText(self,label="z step between images (microns)")
+        self.zdeltaFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self,
+                                       value=settings.zstack_delta,
+                                       min_val=0,
+                                       max_val=10.0,
+                                       increment=.01,
+                                       digits=2,
+                                       name='',
+                                       size=(95,-1))
+        ok_button = wx.Button(self,wx.ID_OK,'OK')
+        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
+        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox3 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox4 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox1.Add(self.zflagtxt)
+        hbox1.Add(self.checkBox)
+        hbox2.Add(self.znumberIntCtrl)
+        hbox2.Add(self.znumberTxt)
+        hbox3.Add(self.zdeltaFloatCtrl)
+        hbox3.Add(self.zdeltaTxt)
+        hbox4.Add(ok_button)
+        hbox4.Add(cancel_button)
+        vbox.Add(hbox1)
+        vbox.Add(hbox2)
+        vbox.Add(hbox3)
+        vbox.Add(hbox4)
+        self.SetSizer(vbox)
+
+    def GetSettings(self):
+        flag        = self.checkBox.GetValue()
+        stacksize   = self.znumberIntCtrl.GetValue()
+        delta       = self.zdeltaFloatCtrl.GetValue()
+        return ZstackSettings(zstack_delta = delta,zstack_number = stacksize,zstack_flag = flag)
+
+class AcquisitionSettings():
+
+    def __init__(self,use_sequencing=False,num_writers=2,num_buffers=32,output_format='tiles'):
+        self.use_sequencing = use_sequencing
+        self.num_writers = num_writers
+        self.num_buffers = num_buffers
+        self.output_format = output_format
+
+    def save_settings(self,cfg):
+        cfg.WriteBool('acq_use_sequencing',self.use_sequencing)
+        cfg.WriteInt('acq_num_writers',self.num_writers)
+        cfg.WriteInt('acq_num_buffers',self.num_buffers)
+        cfg.Write('acq_output_format',self.output_format)
+
+    def load_settings(self,cfg):
+        self.use_sequencing = cfg.ReadBool('acq_use_sequencing',False)
+        self.num_writers = cfg.ReadInt('acq_num_writers',2)
+        self.num_buffers = cfg.ReadInt('acq_num_buffers',32)
+        self.output_format = cfg.Read('acq_output_format','tiles')
+
+class ChangeAcquisitionSettings(wx.Dialog):
+    def __init__(self, parent, id, title, settings,style):
+        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
+        vbox =wx.BoxSizer(wx.VERTICAL)
+
+        self.settings = settings
+        self.sequenceTxt = wx.StaticText(self,label="Use hardware sequencing for channels/z (when supported)?")
+        self.sequenceCheckBox = wx.CheckBox(self)
+        self.sequenceCheckBox.SetValue(settings.use_sequencing)
+        self.writersTxt = wx.StaticText(self,label="number of processes writing frames to disk")
+        self.writersIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.num_writers,size=(50,-1),min=1,limited=True)
+        self.buffersTxt = wx.StaticText(self,label="frames waiting to be written before acquisition waits")
+        self.buffersIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.num_buffers,size=(50,-1),min=1,limited=True)
+        self.formatTxt = wx.StaticText(self,label="output format (tiles: one tif per frame, stacks: one BigTIFF per section/channel)")
+        self.formatChoice = wx.Choice(self,choices=['tiles','stacks'])
+        self.formatChoice.SetStringSelection(settings.output_format)
+        ok_button = wx.Button(self,wx.ID_OK,'OK')
+        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
+        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox3 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox4 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox5 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox1.Add(self.sequenceCheckBox)
+        hbox1.Add(self.sequenceTxt)
+        hbox3.Add(self.writersIntCtrl)
+        hbox3.Add(self.writersTxt)
+        hbox4.Add(self.buffersIntCtrl)
+        hbox4.Add(self.buffersTxt)
+        hbox5.Add(self.formatChoice)
+        hbox5.Add(self.formatTxt)
+        hbox2.Add(ok_button)
+        hbox2.Add(cancel_button)
+        vbox.Add(hbox1)
+        vbox.Add(hbox3)
+        vbox.Add(hbox4)
+        vbox.Add(hbox5)
+        vbox.Add(hbox2)
+        self.SetSizer(vbox)
+
+    def GetSettings(self):
+        use_sequencing = self.sequenceCheckBox.GetValue()
+        num_writers = self.writersIntCtrl.GetValue()
+        num_buffers = self.buffersIntCtrl.GetValue()
+        output_format = self.formatChoice.GetStringSelection()
+        return AcquisitionSettings(use_sequencing = use_sequencing,num_writers = num_writers,num_buffers = num_buffers,
+                                   output_format = output_format)
+
+class PathSettings():
+
+    def __init__(self,serpentine=False,order_sections=False,limit_step=False,max_step=5000.0,stage_speed=2000.0,stage_settle=0.1):
+        self.serpentine = serpentine
+        self.order_sections = order_sections
+        self.limit_step = limit_step
+        self.max_step = max_step
+        self.stage_speed = stage_speed
+        self.stage_settle = stage_settle
+
+    def save_settings(self,cfg):
+        cfg.WriteBool('path_serpentine',self.serpentine)
+        cfg.WriteBool('path_order_sections',self.order_sections)
+        cfg.WriteBool('path_limit_step',self.limit_step)
+        cfg.WriteFloat('path_max_step',self.max_step)
+        cfg.WriteFloat('path_stage_speed',self.stage_speed)
+        cfg.WriteFloat('path_stage_settle',self.stage_settle)
+
+    def load_settings(self,cfg):
+        self.serpentine = cfg.ReadBool('path_serpentine',False)
+        self.order_sections = cfg.ReadBool('path_order_sections',False)
+        self.limit_step = cfg.ReadBool('path_limit_step',False)
+        self.max_step = cfg.ReadFloat('path_max_step',5000.0)
+        self.stage_speed = cfg.ReadFloat('path_stage_speed',2000.0)
+        self.stage_settle = cfg.ReadFloat('path_stage_settle',0.1)
+
+class ChangePathSettings(wx.Dialog):
+    def __init__(self, parent, id, title, settings,style):
+        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
+        vbox =wx.BoxSizer(wx.VERTICAL)
+
+        self.settings = settings
+        self.serpentineTxt = wx.StaticText(self,label="Visit the frames of each section in serpentine order?")
+        self.serpentineCheckBox = wx.CheckBox(self)
+        self.serpentineCheckBox.SetValue(settings.serpentine)
+        self.orderTxt = wx.StaticText(self,label="Reorder the sections to shorten stage travel?")
+        self.orderCheckBox = wx.CheckBox(self)
+        self.orderCheckBox.SetValue(settings.order_sections)
+        self.limitTxt = wx.StaticText(self,label="Break stage moves longer than the longest move below into steps?")
+        self.limitCheckBox = wx.CheckBox(self)
+        self.limitCheckBox.SetValue(settings.limit_step)
+        self.maxstepTxt = wx.StaticText(self,label="longest single stage move (microns, 0 for no limit)")
+        self.maxstepFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self,
+                                       value=settings.max_step,
+                                       min_val=0,
+                                       max_val=100000.0,
+                                       increment=100,
+                                       digits=0,
+                                       name='',
+                                       size=(95,-1))
+        self.speedTxt = wx.StaticText(self,label="stage speed (microns/sec), for predicting travel time")
+        self.speedFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self,
+                                       value=settings.stage_speed,
+                                       min_val=1,
+                                       max_val=100000.0,
+                                       increment=100,
+                                       digits=0,
+                                       name='',
+                                       size=(95,-1))
+        self.settleTxt = wx.StaticText(self,label="stage settling time after each move (sec)")
+        self.settleFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self,
+                                       value=settings.stage_settle,
+                                       min_val=0,
+                                       max_val=10.0,
+                                       increment=.01,
+                                       digits=2,
+                                       name='',
+                                       size=(95,-1))
+        ok_button = wx.Button(self,wx.ID_OK,'OK')
+        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
+        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox3 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox4 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox5 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox6 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox7 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox1.Add(self.serpentineCheckBox)
+        hbox1.Add(self.serpentineTxt)
+        hbox2.Add(self.orderCheckBox)
+        hbox2.Add(self.orderTxt)
+        hbox7.Add(self.limitCheckBox)
+        hbox7.Add(self.limitTxt)
+        hbox3.Add(self.maxstepFloatCtrl)
+        hbox3.Add(self.maxstepTxt)
+        hbox4.Add(self.speedFloatCtrl)
+        hbox4.Add(self.speedTxt)
+        hbox5.Add(self.settleFloatCtrl)
+        hbox5.Add(self.settleTxt)
+        hbox6.Add(ok_button)
+        hbox6.Add(cancel_button)
+        vbox.Add(hbox1)
+        vbox.Add(hbox2)
+        vbox.Add(hbox7)
+        vbox.Add(hbox3)
+        vbox.Add(hbox4)
+        vbox.Add(hbox5)
+        vbox.Add(hbox6)
+        self.SetSizer(vbox)
+
+    def GetSettings(self):
+        serpentine = self.serpentineCheckBox.GetValue()
+        order_sections = self.orderCheckBox.GetValue()
+        limit_step = self.limitCheckBox.GetValue()
+        max_step = self.maxstepFloatCtrl.GetValue()
+        stage_speed = self.speedFloatCtrl.GetValue()
+        stage_settle = self.settleFloatCtrl.GetValue()
+        return PathSettings(serpentine = serpentine,order_sections = order_sections,limit_step = limit_step,
+                            max_step = max_step,
+                            stage_speed = stage_speed,stage_settle = stage_settle)
+
+class TileStorageSettings():
+
+    def __init__(self,cache_mb=256,tile_format='.tif',display_max_side=0):
+        self.cache_mb = cache_mb
+        self.tile_format = tile_format
+        self.display_max_side = display_max_side
+
+    def save_settings(self,cfg):
+        cfg.WriteInt('tile_cache_mb',self.cache_mb)
+        cfg.Write('tile_format',self.tile_format)
+        cfg.WriteInt('tile_display_max_side',self.display_max_side)
+
+    def load_settings(self,cfg):
+        self.cache_mb = cfg.ReadInt('tile_cache_mb',256)
+        self.tile_format = cfg.Read('tile_format','.tif')
+        self.display_max_side = cfg.ReadInt('tile_display_max_side',0)
+
+class ChangeTileStorageSettings(wx.Dialog):
+    def __init__(self, parent, id, title, settings,style,stats=""):
+        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
+        vbox =wx.BoxSizer(wx.VERTICAL)
+
+        self.settings = settings
+        self.cacheTxt = wx.StaticText(self,label="memory for decoded overview tiles (MB, 0 to turn off)")
+        self.cacheIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.cache_mb,size=(50,-1),min=0,limited=True)
+        self.statsTxt = wx.StaticText(self,label="currently: %s"%stats)
+        self.formatTxt = wx.StaticText(self,label="format of new overview tiles (both are saved uncompressed and memory mapped)")
+        self.formatChoice = wx.Choice(self,choices=['.tif','.npy'])
+        self.formatChoice.SetStringSelection(settings.tile_format)
+        self.displayTxt = wx.StaticText(self,label="largest side of a tile on screen (pixels, 0 for full resolution)")
+        self.displayIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.display_max_side,size=(50,-1),min=0,limited=True)
+        ok_button = wx.Button(self,wx.ID_OK,'OK')
+        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
+        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox3 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox4 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox1.Add(self.cacheIntCtrl)
+        hbox1.Add(self.cacheTxt)
+        hbox3.Add(self.formatChoice)
+        hbox3.Add(self.formatTxt)
+        hbox4.Add(self.displayIntCtrl)
+        hbox4.Add(self.displayTxt)
+        hbox2.Add(ok_button)
+        hbox2.Add(cancel_button)
+        vbox.Add(hbox1)
+        vbox.Add(self.statsTxt)
+        vbox.Add(hbox3)
+        vbox.Add(hbox4)
+        vbox.Add(hbox2)
+        self.SetSizer(vbox)
+
+    def GetSettings(self):
+        cache_mb = self.cacheIntCtrl.GetValue()
+        tile_format = self.formatChoice.GetStringSelection()
+        display_max_side = self.displayIntCtrl.GetValue()
+        return TileStorageSettings(cache_mb = cache_mb,tile_format = tile_format,display_max_side = display_max_side)
+
+#by default align with a process on every core but one, which is left for the GUI
+DEFAULT_ALIGN_WORKERS = max(multiprocessing.cpu_count()-1,0)
+
+class CorrSettings():
+
+    def __init__(self,window=100,delta=75,skip = 3,corr_thresh = .3,num_workers = DEFAULT_ALIGN_WORKERS,upsample_factor = 10,pyramid_levels = 0,pyramid_dim = 256,
+                 score_thresh = 0.0):
+    
+        self.window = window
+        self.delta = delta
+        self.skip = skip
+        self.corr_thresh  = corr_thresh
+        self.num_workers = num_workers
+        self.upsample_factor = upsample_factor
+        self.pyramid_levels = pyramid_levels
+        self.pyramid_dim = pyramid_dim
+        self.score_thresh = score_thresh
+        
+    def save_settings(self,cfg):
+        cfg.WriteInt('CorrTool_window',self.window)
+        cfg.WriteInt('CorrTool_delta',self.delta)
+        cfg.WriteInt('CorrTool_skip',self.skip)
+        cfg.WriteFloat('CorrTool_corr_thresh',self.corr_thresh)
+        cfg.WriteInt('CorrTool_num_workers',self.num_workers)
+        cfg.WriteInt('CorrTool_upsample_factor',self.upsample_factor)
+        cfg.WriteInt('CorrTool_pyramid_levels',self.pyramid_levels)
+        cfg.WriteInt('CorrTool_pyramid_dim',self.pyramid_dim)
+        cfg.WriteFloat('CorrTool_score_thresh',self.score_thresh)
+    
+    def load_settings(self,cfg):
+        self.window=cfg.ReadInt('CorrTool_window',100)
+        self.delta=cfg.ReadInt('CorrTool_delta',75)
+        self.skip = cfg.ReadInt('CorrTool_skip',3)
+        self.corr_thresh = cfg.ReadFloat('CorrTool_corr_thresh',.3)
+        self.num_workers = cfg.ReadInt('CorrTool_num_workers',DEFAULT_ALIGN_WORKERS)
+        self.upsample_factor = cfg.ReadInt('CorrTool_upsample_factor',10)
+        self.pyramid_levels = cfg.ReadInt('CorrTool_pyramid_levels',0)
+        self.pyramid_dim = cfg.ReadInt('CorrTool_pyramid_dim',256)
+        self.score_thresh = cfg.ReadFloat('CorrTool_score_thresh',0.0)
+
+class ChangeCorrSettings(wx.Dialog):
+    def __init__(self, parent, id, title, settings,style):
+        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
+        vbox =wx.BoxSizer(wx.VERTICAL)
+        
+        self.settings = settings
+        self.windowTxt = wx.StaticText(self,label="window in microns to cutout")
+        self.windowIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.window,size=(50,-1))
+        #self.deltaTxt = wx.StaticText(self,label="delta (in pixels) to search for maximum")
+        #self.deltaIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.delta,size=(50,-1))
+        #self.skipTxt = wx.StaticText(self,label="number of pixels to skip when searching")
+        #self.skipIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.skip,size=(50,-1))
+        
+
+        self.corr_threshThresholdTxt = wx.StaticText(self,label="correlation threshold to accept match (0.0-1.0)")
+        self.corr_threshThresholdFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self, 
+                                       value=settings.corr_thresh,
+                                       min_val=0,
+                                       max_val=1.0,
+                                       increment=.01,
+                                       digits=2,
+                                       name='',
+                                       size=(95,-1)) 
+        self.score_threshTxt = wx.StaticText(self,label="combined peak score to accept match instead (0.0-1.0, 0 to use the correlation)")
+        self.score_threshFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self,
+                                       value=settings.score_thresh,
+                                       min_val=0,
+                                       max_val=1.0,
+                                       increment=.01,
+                                       digits=2,
+                                       name='',
+                                       size=(95,-1))
+        self.workersTxt = wx.StaticText(self,label="number of processes aligning the ribbon (0 to align in this one)")
+        self.workersIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.num_workers,size=(50,-1),min=0,limited=True)
+        self.upsampleTxt = wx.StaticText(self,label="fractions of a pixel to find the shift to (1 for whole pixels)")
+        self.upsampleIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.upsample_factor,size=(50,-1),min=1,limited=True)
+        self.pyramidLevelsTxt = wx.StaticText(self,label="coarse to fine levels to search through (0 to correlate the whole window)")
+        self.pyramidLevelsIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.pyramid_levels,size=(50,-1),min=0,max=6,limited=True)
+        self.pyramidDimTxt = wx.StaticText(self,label="size in pixels of the windows refined at the finer levels")
+        self.pyramidDimIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.pyramid_dim,size=(50,-1),min=32,limited=True)
+        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox4 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox5 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox6 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox7 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox8 = wx.BoxSizer(wx.HORIZONTAL)
+        
+        hbox1.Add(self.windowIntCtrl)
+        hbox1.Add(self.windowTxt)
+        #hbox1.Add(self.deltaIntCtrl)
+        #hbox1.Add(self.skipIntCtrl)
+
+        #hbox2.Add(self.deltaTxt)
+        #hbox2.Add(self.skipTxt)
+        hbox2.Add(self.corr_threshThresholdFloatCtrl)
+        hbox2.Add(self.corr_threshThresholdTxt)   
+        hbox8.Add(self.score_threshFloatCtrl)
+        hbox8.Add(self.score_threshTxt)
+        hbox4.Add(self.workersIntCtrl)
+        hbox4.Add(self.workersTxt)
+        hbox5.Add(self.upsampleIntCtrl)
+        hbox5.Add(self.upsampleTxt)
+        hbox6.Add(self.pyramidLevelsIntCtrl)
+        hbox6.Add(self.pyramidLevelsTxt)
+        hbox7.Add(self.pyramidDimIntCtrl)
+        hbox7.Add(self.pyramidDimTxt)
+
+        hbox3 = wx.BoxSizer(wx.HORIZONTAL)      
+        ok_button = wx.Button(self,wx.ID_OK,'OK')
+        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
+        hbox3.Add(ok_button)
+        hbox3.Add(cancel_button)
+        
+        vbox.Add(hbox1)
+        vbox.Add(hbox2)
+        vbox.Add(hbox8)
+        vbox.Add(hbox5)
+        vbox.Add(hbox6)
+        vbox.Add(hbox7)
+        vbox.Add(hbox4)
+        vbox.Add(hbox3)
+
+        self.SetSizer(vbox)
+        
+    def GetSettings(self):
+        window=self.windowIntCtrl.GetValue()
+        #delta=self.deltaIntCtrl.GetValue()
+        #skip=self.skipIntCtrl.GetValue()
+        corr_thresh=self.corr_threshThresholdFloatCtrl.GetValue()
+        score_thresh=self.score_threshFloatCtrl.GetValue()
+
+        num_workers=self.workersIntCtrl.GetValue()
+        upsample_factor=self.upsampleIntCtrl.GetValue()
+        pyramid_levels=self.pyramidLevelsIntCtrl.GetValue()
+        pyramid_dim=self.pyramidDimIntCtrl.GetValue()
+
+        return CorrSettings(window=window,corr_thresh=corr_thresh,num_workers=num_workers,upsample_factor=upsample_factor,
+                            pyramid_levels=pyramid_levels,pyramid_dim=pyramid_dim,score_thresh=score_thresh)
+
+class SiftSettings():
+
+    def __init__(self,contrastThreshold=.05,numFeatures=1000,inlier_thresh = 12):
+    
+        self.contrastThreshold=contrastThreshold
+        self.numFeatures=numFeatures
+        self.inlier_thresh = inlier_thresh
+        
+    def save_settings(self,cfg):
+        cfg.WriteInt('numFeatures',self.numFeatures)
+        cfg.WriteInt('inlier_thresh',self.inlier_thresh)
+        cfg.WriteFloat('contrastThreshold',self.contrastThreshold)
+    
+    def load_settings(self,cfg):
+        self.numFeatures=cfg.ReadInt('numFeatures',1000)
+        self.contrastThreshold=cfg.ReadFloat('contrastThreshold',0.5)
+        self.inlier_thresh = cfg.ReadInt('inlier_thresh',12)
+        
+class ChangeSiftSettings(wx.Dialog):
+    def __init__(self, parent, id, title, settings,style):
+        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))   
+        vbox =wx.BoxSizer(wx.VERTICAL)
+        
+        self.settings=settings
+        self.numFeatureTxt=wx.StaticText(self,label="max features")
+        self.numFeatureIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.numFeatures,size=(50,-1))
+        self.inlierThreshTxt=wx.StaticText(self,label="minimum inliers for match")
+        self.inlierThreshIntCtrl = wx.lib.intctrl.IntCtrl( self, value=settings.inlier_thresh,size=(50,-1))
+
+        self.contrastThresholdTxt = wx.StaticText(self,label="contrast threshold")
+        self.contrastThresholdFloatCtrl = wx.lib.agw.floatspin.FloatSpin(self, 
+                                       value=settings.contrastThreshold,
+                                       min_val=0,
+                                       max_val=12.0,
+                                       increment=.01,
+                                       digits=2,
+                                       name='',
+                                       size=(95,-1)) 
+        hbox1 = wx.BoxSizer(wx.HORIZONTAL)
+        hbox2 = wx.BoxSizer(wx.HORIZONTAL)
+        
+        hbox1.Add(self.numFeatureTxt)
+        hbox1.Add(self.numFeatureIntCtrl)
+        hbox1.Add(self.inlierThreshIntCtrl)
+        
+        hbox2.Add(self.contrastThresholdTxt)
+        hbox2.Add(self.contrastThresholdFloatCtrl)
+        hbox2.Add(self.inlierThreshTxt)
+
+        
+       
+
+        hbox3 = wx.BoxSizer(wx.HORIZONTAL)      
+        ok_button = wx.Button(self,wx.ID_OK,'OK')
+        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
+        hbox3.Add(ok_button)
+        hbox3.Add(cancel_button)
+        
+        vbox.Add(hbox1)
+        vbox.Add(hbox2)
+        vbox.Add(hbox3)
+
+        self.SetSizer(vbox)
+        
+    def GetSettings(self):
+        numFeatures = self.numFeatureIntCtrl.GetValue()
+        contrastThreshold = self.contrastThresholdFloatCtrl.GetValue()
+        inlier_thresh = self.inlierThreshIntCtrl.GetValue()
+        return SiftSettings(contrastThreshold,numFeatures,inlier_thresh)
+        
+        
+class CameraSettings():
+    """simple struct for containing the parameters for the camera"""
+    def __init__(self,sensor_height=1040,sensor_width=1388,pix_width=6.5,pix_height=6.5):
+        #in pixels        
+        self.sensor_height=sensor_height
+        self.sensor_width=sensor_width
+        #in microns
+        self.pix_width=pix_width
+        self.pix_height=pix_height
+    def save_settings(self,cfg):
+        cfg.WriteInt('sensor_height',self.sensor_height)
+        cfg.WriteInt('sensor_width',self.sensor_width)
+        cfg.WriteFloat('pix_width',self.pix_width)
+        cfg.WriteFloat('pix_height',self.pix_height)
+    def load_settings(self,cfg):
+        self.sensor_height=cfg.ReadInt('sensor_height',1040)
+        self.sensor_width=cfg.ReadInt('sensor_width',1388)
+        self.pix_width=cfg.ReadFloat('pix_width',6.5)
+        self.pix_height=cfg.ReadFloat('pix_height',6.5)
+
+class ChannelSettings():
+    """simple struct for containing the parameters for the microscope"""
+    def __init__(self,channels,exposure_times=dict([]),zoffsets=dict([]),usechannels=dict([]),prot_names=dict([]),map_chan=None,def_exposure=100,def_offset=0.0,):
+        #def_exposure is default exposure time in msec
+       
+        
+        self.channels= channels
+        self.def_exposure=def_exposure
+        self.def_offset=0.0
+        
+        self.exposure_times=exposure_times
+        self.zoffsets=zoffsets
+        self.usechannels=usechannels
+        self.prot_names=prot_names
+
+        if map_chan is None:
+            for ch in self.channels:
+                if 'dapi' in ch.lower():
+                    map_chan = ch
+        if map_chan is None:
+            map_chan = channels[0]
+            
+        self.map_chan = map_chan
+        
+    def save_settings(self,cfg):    
+        
+        cfg.Write('map_chan',self.map_chan)
+        for ch in self.channels:
+            cfg.WriteInt('Exposures/'+ch,self.exposure_times[ch])
+            cfg.WriteFloat('ZOffsets/'+ch,self.zoffsets[ch])
+            cfg.WriteBool('UseChannel/'+ch,self.usechannels[ch])
+            cfg.Write('ProteinNames/'+ch,self.prot_names[ch])
+
+
+    def load_settings(self,cfg):
+        for ch in self.channels:
+            self.exposure_times[ch]=cfg.ReadInt('Exposures/'+ch, self.def_exposure)
+            self.zoffsets[ch]=cfg.ReadFloat('ZOffsets/'+ch,self.def_offset)
+            self.usechannels[ch]=cfg.ReadBool('UseChannel/'+ch,True)
+            self.prot_names[ch]=cfg.Read('ProteinNames/'+ch,ch)
+        self.map_chan=str(cfg.Read('map_chan','DAPI'))
+
+class ChangeChannelSettings(wx.Dialog):
+    """simple dialog for changing the channel settings"""
+    def __init__(self, parent, id, title, settings,style):
+        wx.Dialog.__init__(self, parent, id, title,style=wx.DEFAULT_DIALOG_STYLE, size=(420, -1))
+        
+        self.settings=settings
+        vbox = wx.BoxSizer(wx.VERTICAL)   
+        Nch=len(settings.channels)
+        print Nch
+        
+        gridSizer=wx.FlexGridSizer(rows=Nch+3,cols=6,vgap=5,hgap=5)
+        
+      
+        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="chan"),border=5)
+        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="protein"),border=5)     
+        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="use?"),border=5)
+        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="exposure"),border=5)
+        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="map?"),border=5)
+        gridSizer.Add(wx.StaticText(self,id=wx.ID_ANY,label="zoffset     "),border=5)
+
+        self.ProtNameCtrls=[]
+        self.UseCtrls=[]
+        self.ExposureCtrls=[]
+        self.MapRadCtrls=[]
+        self.ZOffCtrls=[]
+        
+        for ch in settings.channels:
+            hbox =wx.BoxSizer(wx.HORIZONTAL)
+            Txt=wx.StaticText(self,label=ch)
+            ProtText=wx.TextCtrl(self,value=settings.prot_names[ch])
+            ChBox = wx.CheckBox(self)
+            ChBox.SetValue(settings.usechannels[ch])
+            IntCtrl=wx.lib.intctrl.IntCtrl( self, value=settings.exposure_times[ch],size=(50,-1))
+            FloatCtrl=wx.lib.agw.floatspin.FloatSpin(self, 
+                                       value=settings.zoffsets[ch],
+                                       min_val=-3.0,
+                                       max_val=3.0,
+                                       increment=.1,
+                                       digits=2,
+                                       name='',
+                                       size=(95,-1)) 
+               
+            if ch is settings.channels[0]:
+                RadBut = wx.RadioButton(self,-1,'',style=wx.RB_GROUP)
+            else:
+                RadBut = wx.RadioButton(self,-1,'')
+            if ch == settings.map_chan:
+                RadBut.SetValue(True)
+                
+            gridSizer.Add(Txt,0,flag=wx.ALL|wx.EXPAND,border=5)
+            gridSizer.Add(ProtText,1,flag=wx.ALL|wx.EXPAND,border=5)
+            gridSizer.Add(ChBox,0,flag=wx.ALL|wx.EXPAND,border=5)
+            gridSizer.Add(IntCtrl,0,border=5)
+            gridSizer.Add(RadBut,0,flag=wx.ALL|wx.EXPAND,border=5)
+            gridSizer.Add(FloatCtrl,0,flag=wx.ALL|wx.EXPAND,border=5)
+            
+            self.ProtNameCtrls.append(ProtText)
+            self.UseCtrls.append(ChBox)
+            self.ExposureCtrls.append(IntCtrl)
+            self.MapRadCtrls.append(RadBut)
+            self.ZOffCtrls.append(FloatCtrl)
+        
+           
+        hbox = wx.BoxSizer(wx.HORIZONTAL)      
+        ok_button = wx.Button(self,wx.ID_OK,'OK')
+        cancel_button = wx.Button(self,wx.ID_CANCEL,'Cancel')
+        hbox.Add(ok_button)
+        hbox.Add(cancel_button)
+        
+        vbox.Add(gridSizer)
+        vbox.Add(hbox)
+        
+        self.SetSizer(vbox)
+    
+        
+    def GetSettings(self):
+        prot_names=dict([])
+        usechannels=dict([])
+        exposure_times=dict([])
+        zoffsets=dict([])
+        
+        for i,ch in enumerate(self.settings.channels):
+            prot_names[ch]=self.ProtNameCtrls[i].GetValue()
+            usechannels[ch]=self.UseCtrls[i].GetValue()
+            exposure_times[ch]=self.ExposureCtrls[i].GetValue()
+            if self.MapRadCtrls[i].GetValue():
+                map_chan=ch
+            zoffsets[ch]=self.ZOffCtrls[i].GetValue()
+        return ChannelSettings(self.settings.channels,exposure_times=exposure_times,zoffsets=zoffsets,usechannels=usechannels,prot_names=prot_names,map_chan=map_chan)
+        
+ 
+class MosaicSettings:
+    def __init__(self,mag=65.486,mx=1,my=1,overlap=10,show_box=False,show_frames=False):
+        """a simple struct class for encoding settings about mosaics
+        
+        keywords)
+        mag=magnification of objective
+        mx=integer number of columns in a rectangular mosaic
+        my=integer number of rows in a rectangular mosaic
+        overlap=percentage overlap of individual frames (0-100)
+        show_box=boolean as to whether to display the box
+        show_frames=Boolean as to whether to display the individual frames
+        
+        """
+        self.mx=mx
+        self.my=my
+        self.overlap=overlap
+        self.show_box=show_box
+        self.show_frames=show_frames
+        self.mag=mag
+    def save_settings(self,cfg):
+        cfg.WriteFloat('mosaic_mag',self.mag)
+        cfg.WriteInt('mosaic_mx',self.mx)
+        cfg.WriteInt('mosaic_my',self.my)
+        cfg.WriteInt('mosaic_overlap',self.overlap)
+        cfg.WriteBool('mosaic_show_box',self.show_box)
+        cfg.WriteBool('mosaic_show_frames',self.show_frames)
+        
+    def load_settings(self,cfg):
+        self.mag=cfg.ReadFloat('mosaic_mag',65.486)
+        self.mx=cfg.ReadInt('mosaic_mx',1)
+        self.my=cfg.ReadInt('mosaic_my',1)
+        self.overlap=cfg.ReadInt('mosaic_overlap',10)
+        self.show_box=cfg.WriteBool('mosaic_show_box',False)
+        self.show_frames=cfg.WriteBool('mosaic_show_frames',False)
+        
+  
+class ChangeCameraSettings(wx.Dialog):
+    """simple dialog for changing the camera settings"""
+    def __init__(self, parent, id, title, settings):
+        wx.Dialog.__init__(self, parent, id, title, size=(230, 210))
+        panel = wx.Panel(self, -1)
+        vbox = wx.BoxSizer(wx.VERTICAL)       
+        self.widthIntCtrl=wx.lib.intctrl.IntCtrl( panel, value=settings.sensor_width,pos=(95,5),size=( 90, -1 ) )
+        self.heightIntCtrl=wx.lib.intctrl.IntCtrl( panel, value=settings.sensor_height,pos=(95,35),size=( 90, -1 ) )
+        self.pixwidthFloatCtrl=wx.lib.agw.floatspin.FloatSpin(panel, pos=(95,65),size=( 90, -1 ),
+                                       value=settings.pix_width,
+                                       min_val=0.1,
+                                       max_val=100,
+                                       increment=.1,
+                                       digits=2,
+                                       name='pix_width')
+        self.pixheightFloatCtrl=wx.lib.agw.floatspin.FloatSpin(panel, pos=(95,95),size=( 90, -1 ),
+                                       value=settings.pix_height,
+                                       min_val=0.1,
+                                       max_val=100,
+                                       increment=.1,
+                                       digits=2,
+                                       name='pix_height')                             
+                                         
+        wx.StaticText(panel,id=wx.ID_ANY,label="Width (pixels)",pos=(5,8))
+        wx.StaticText(panel,id=wx.ID_ANY,label="Height (pixels)",pos=(5,38))  
+        wx.StaticText(panel,id=wx.ID_ANY,label="Pixel Width (um)",pos=(5,68))  
+        wx.StaticText(panel,id=wx.ID_ANY,label="Pixel Height (um)",pos=(5,98)) 
+                                         
+        hbox = wx.BoxSizer(wx.HORIZONTAL)
+        okButton = wx.Button(self, wx.ID_OK, 'Ok', size=(70, 30))
+       # closeButton = wx.Button(self, wx.ID_CLOSE, 'Close', size=(70, 30))
+        hbox.Add(okButton, 1)
+        #hbox.Add(closeButton, 1, wx.LEFT, 5)
+        vbox.Add(panel)
+        vbox.Add(hbox, 1, wx.ALIGN_CENTER | wx.TOP | wx.BOTTOM, 10)
+        self.SetSizer(vbox)
+    def GetSettings(self):
+        """extracts the Camera Settings from the controls"""
+        return CameraSettings(sensor_width=self.widthIntCtrl.GetValue(),
+                              sensor_height=self.heightIntCtrl.GetValue(),
+                              pix_width=self.pixwidthFloatCtrl.GetValue(),
+                              pix_height=self.pixheightFloatCtrl.GetValue())
+        
+class ImageSettings():
+    def __init__(self,extent=[0,10,10,0]):
+        self.extent=extent
+        
+class ChangeImageMetadata(wx.Dialog):
+    """simple dialog for edchanging the camera settings"""
+    def __init__(self, parent, id, title, settings=ImageSettings()):
+        wx.Dialog.__init__(self, parent, id, title, size=(230, 210))
+        panel = wx.Panel(self, -1)
+        vbox = wx.BoxSizer(wx.VERTICAL)       
+        self.minXIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[0],pos=(125,5),size=( 90, -1 ),increment=1,digits=2 )
+        self.maxXIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[1],pos=(125,35),size=( 90, -1 ),increment=1,digits=2 )
+        self.minYIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[3],pos=(125,65),size=( 90, -1 ),increment=1,digits=2 )
+        self.maxYIntCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.extent[2],pos=(125,95),size=( 90, -1 ),increment=1,digits=2 )
+                                                           
+        wx.StaticText(panel,id=wx.ID_ANY,label="Minimum X (um)",pos=(5,8))
+        wx.StaticText(panel,id=wx.ID_ANY,label="Maximum X (um)",pos=(5,38))  
+        wx.StaticText(panel,id=wx.ID_ANY,label="Minimum Y (um) (bottom)",pos=(5,68))  
+        wx.StaticText(panel,id=wx.ID_ANY,label="Maximum Y (um) (top)",pos=(5,98)) 
+                                         
+        hbox = wx.BoxSizer(wx.HORIZONTAL)
+        okButton = wx.Button(self, wx.ID_OK, 'Ok', size=(70, 30))
+       # closeButton = wx.Button(self, wx.ID_CLOSE, 'Close', size=(70, 30))
+        hbox.Add(okButton, 1)
+        #hbox.Add(closeButton, 1, wx.LEFT, 5)
+        vbox.Add(panel)
+        vbox.Add(hbox, 1, wx.ALIGN_CENTER | wx.TOP | wx.BOTTOM, 10)
+        self.SetSizer(vbox)
+    def GetSettings(self):
+        """extracts the Camera Settings from the controls"""
+        return ImageSettings(extent=[self.minXIntCtrl.GetValue(),
+                                     self.maxXIntCtrl.GetValue(),
+                                     self.maxYIntCtrl.GetValue(),
+                                     self.minYIntCtrl.GetValue()])
+        
+
+class SmartSEMSettings():
+    def __init__(self,mag=1200,tilt=0.33,rot=0,Z=0.0125,WD=0.00632568):
+        self.mag=mag
+        self.tilt=tilt
+        self.rot=rot
+        self.Z=Z
+        self.WD=WD
+    def save_settings(self,cfg):
+        cfg.WriteInt('SEM_mag',self.mag)
+        cfg.WriteFloat('SEM_tilt',self.tilt)
+        cfg.WriteFloat('SEM_rot',self.rot)
+        cfg.WriteFloat('SEM_Z',self.Z)
+        cfg.WriteFloat('SEM_WD',self.WD)
+    def load_settings(self,cfg):
+        self.mag=cfg.ReadInt('SEM_mag',1200)
+        self.tilt=cfg.ReadFloat('SEM_tilt',0.33)
+        self.rot=cfg.ReadFloat('SEM_rot',0)
+        self.Z=cfg.ReadFloat('SEM_Z',0.0125)
+        self.WD=cfg.ReadFloat('SEM_WD',0.00632568)
+        
+class ChangeSEMSettings(wx.Dialog):
+    """simple dialog for edchanging the camera settings"""
+    def __init__(self, parent, id, title, settings=SmartSEMSettings()):
+        wx.Dialog.__init__(self, parent, id, title, size=(230, 210))
+        panel = wx.Panel(self, -1)
+        vbox = wx.BoxSizer(wx.VERTICAL)       
+        self.magCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.mag,pos=(125,5),size=( 90, -1 ),increment=100,digits=2 )
+        self.tiltCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.tilt,pos=(125,35),size=( 90, -1 ),increment=1,digits=4 )
+        self.rotCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.rot,pos=(125,65),size=( 90, -1 ),increment=1,digits=4 )
+        self.ZCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.Z,pos=(125,95),size=( 90, -1 ),increment=1,digits=4 )
+        self.WDCtrl=wx.lib.agw.floatspin.FloatSpin( panel, value=settings.WD,pos=(125,125),size=( 90, -1 ),increment=1,digits=4 )
+        
+        wx.StaticText(panel,id=wx.ID_ANY,label="magnification (prop. area)",pos=(5,8))
+        wx.StaticText(panel,id=wx.ID_ANY,label="tilt (radians)",pos=(5,38))  
+        wx.StaticText(panel,id=wx.ID_ANY,label="rotation (radians)",pos=(5,68))  
+        wx.StaticText(panel,id=wx.ID_ANY,label="Z location (mm)",pos=(5,98))
+        wx.StaticText(panel,id=wx.ID_ANY,label="WD working distance? (mm)",pos=(5,128))
+                                         
+        hbox = wx.BoxSizer(wx.HORIZONTAL)
+        okButton = wx.Button(self, wx.ID_OK, 'Ok', size=(70, 30))
+       # closeButton = wx.Button(self, wx.ID_CLOSE, 'Close', size=(70, 30))
+        hbox.Add(okButton, 1)
+        #hbox.Add(closeButton, 1, wx.LEFT, 5)
+        vbox.Add(panel)
+        vbox.Add(hbox, 1, wx.ALIGN_CENTER | wx.TOP | wx.BOTTOM, 10)
+        self.SetSizer(vbox)
+    def GetSettings(self):
+        """extracts the Camera Settings from the controls"""
+        return SmartSEMSettings(mag=self.magCtrl.GetValue(),
+                                     tilt=self.tiltCtrl.GetValue(),
+                                     rot=self.rotCtrl.GetValue(),
+                                     Z=self.ZCtrl.GetValue(),
+                                     WD=self.WDCtrl)
                                      
\ No newline at end of file
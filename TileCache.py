@@ -0,0 +1,122 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_MB = 256
+
+
+class TileCache():
+    """a least recently used cache of decoded tile arrays, holding at most max_bytes of pixels
+
+    entries are keyed by the path of the file they were decoded from, and are made read only so
+    that whoever gets them can't change what the next caller sees.  counts hits, misses and evictions
+    so the budget can be sized for a collection.
+    """
+    def __init__(self,max_bytes=DEFAULT_CACHE_MB*1024*1024,max_entries=None):
+        """
+        keywords)
+        max_bytes) the most bytes of decoded pixels to hold on to, 0 turns the cache off, None for no limit
+        max_entries) the most arrays to hold on to, None for no limit
+
+        """
+        self.max_bytes=max_bytes
+        self.max_entries=max_entries
+        self.entries=OrderedDict()
+        self.nbytes=0
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+        self.lock=threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self,key):
+        return key in self.entries
+
+    def get(self,key,loader):
+        """the array cached under key, calling loader() to decode it on a miss"""
+        with self.lock:
+            if key in self.entries:
+                arr=self.entries.pop(key)
+                self.entries[key]=arr
+                self.hits+=1
+                return arr
+            self.misses+=1
+        arr=loader()
+        arr.flags.writeable=False
+        with self.lock:
+            if key not in self.entries and (self.max_bytes is None or arr.nbytes<=self.max_bytes):
+                self.entries[key]=arr
+                self.nbytes+=arr.nbytes
+                self.evict()
+        return arr
+
+    def evict(self):
+        while len(self.entries)>0 and ((self.max_bytes is not None and self.nbytes>self.max_bytes) or
+                                       (self.max_entries is not None and len(self.entries)>self.max_entries)):
+            (key,arr)=self.entries.popitem(last=False)
+            self.nbytes-=arr.nbytes
+            self.evictions+=1
+
+    def invalidate(self,key):
+        """forget key, e.g. because its file has been rewritten"""
+        with self.lock:
+            arr=self.entries.pop(key,None)
+            if arr is not None:
+                self.nbytes-=arr.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries=OrderedDict()
+            self.nbytes=0
+
+    def set_max_bytes(self,max_bytes):
+        with self.lock:
+            self.max_bytes=max_bytes
+            self.evict()
+
+    def reset_stats(self):
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+
+    def get_stats(self):
+        lookups=self.hits+self.misses
+        return {'hits':self.hits,
+                'misses':self.misses,
+                'evictions':self.evictions,
+                'hit_rate':float(self.hits)/lookups if lookups>0 else 0.0,
+                'entries':len(self.entries),
+                'mb_used':self.nbytes/(1024.0*1024.0),
+                'mb_budget':self.max_bytes/(1024.0*1024.0) if self.max_bytes is not None else float('inf')}
+
+    def __str__(self):
+        s=self.get_stats()
+        return "%d tiles, %.1f of %.0f MB, %d hits, %d misses (%.0f%% hit rate), %d evictions"%(
+               s['entries'],s['mb_used'],s['mb_budget'],s['hits'],s['misses'],100*s['hit_rate'],s['evictions'])
+
+
+#the cache shared by every MyImage in this process
+tile_cache = TileCache()
+
+#memory mapped tiles don't take up memory until they're read, but each map holds a file handle open
+MAX_MAPPED_TILES = 256
+mapped_tiles = TileCache(max_bytes=None,max_entries=MAX_MAPPED_TILES)
@@ -0,0 +1,145 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import math
+
+
+def rects_intersect(a,b):
+    """whether the Rectangles a and b share some area"""
+    return (a.left<b.right) and (b.left<a.right) and (a.top<b.bottom) and (b.top<a.bottom)
+
+
+class TileIndex():
+    """a uniform grid over the stage for finding which of a collection of tiles cover a point or a box
+
+    every tile is registered in each grid cell its bounding box touches, so with cells about the size
+    of a tile a lookup only has to check the handful of tiles registered in one or a few cells,
+    however many tiles there are.  tiles are referred to by the integer ids they were added with,
+    and queries return ids in the order they were added, so the first id returned is the one a linear
+    scan through the collection would have found first.
+    """
+    def __init__(self,cell_size=None):
+        """
+        keywords)
+        cell_size) the width and height of a grid cell in microns, defaults to the larger
+        side of the first tile added
+
+        """
+        self.cell_size=cell_size
+        self.cells={}
+        self.boxes={}
+        #the range of cells which have ever had a tile in them (imin,imax,jmin,jmax)
+        self.extent=None
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def cell_of(self,x,y):
+        return (int(math.floor(x/self.cell_size)),int(math.floor(y/self.cell_size)))
+
+    def cells_of(self,box):
+        (i0,j0)=self.cell_of(box.left,box.top)
+        (i1,j1)=self.cell_of(box.right,box.bottom)
+        return [(i,j) for i in range(i0,i1+1) for j in range(j0,j1+1)]
+
+    def insert(self,tile_id,box):
+        """add a tile with bounding Rectangle box under the integer tile_id"""
+        if self.cell_size is None:
+            self.cell_size=max(box.get_width(),box.get_height(),1e-6)
+        self.boxes[tile_id]=box
+        cells=self.cells_of(box)
+        for cell in cells:
+            self.cells.setdefault(cell,[]).append(tile_id)
+        (i0,j0)=cells[0]
+        (i1,j1)=cells[-1]
+        if self.extent is None:
+            self.extent=(i0,i1,j0,j1)
+        else:
+            (imin,imax,jmin,jmax)=self.extent
+            self.extent=(min(imin,i0),max(imax,i1),min(jmin,j0),max(jmax,j1))
+
+    def remove(self,tile_id):
+        box=self.boxes.pop(tile_id)
+        for cell in self.cells_of(box):
+            self.cells[cell].remove(tile_id)
+            if len(self.cells[cell])==0:
+                del self.cells[cell]
+
+    def clear(self):
+        self.cells={}
+        self.boxes={}
+        self.extent=None
+
+    def containing_point(self,x,y):
+        """ids of the tiles whose bounding box contains x,y"""
+        if self.cell_size is None:
+            return []
+        ids=self.cells.get(self.cell_of(x,y),[])
+        return sorted([k for k in ids if self.boxes[k].contains_point(x,y)])
+
+    def containing_rect(self,box):
+        """ids of the tiles whose bounding box contains the Rectangle box"""
+        if self.cell_size is None:
+            return []
+        #any tile containing the box has to contain its centre
+        (x,y)=box.get_center()
+        ids=self.cells.get(self.cell_of(x,y),[])
+        return sorted([k for k in ids if self.boxes[k].contains_rect(box)])
+
+    def overlapping(self,box):
+        """ids of the tiles whose bounding box shares some area with the Rectangle box"""
+        if self.cell_size is None:
+            return []
+        ids=set()
+        for cell in self.cells_of(box):
+            ids.update(self.cells.get(cell,[]))
+        return sorted([k for k in ids if rects_intersect(self.boxes[k],box)])
+
+    def nearest(self,x,y):
+        """id of the tile whose centre is closest to x,y, None if there are no tiles
+
+        searches outwards ring by ring of cells from the one x,y is in, stopping once the
+        edge of the searched cells is further away than the closest centre found so far
+        """
+        if len(self.boxes)==0:
+            return None
+        (ci,cj)=self.cell_of(x,y)
+        #no point searching further out than the furthest occupied cell
+        (imin,imax,jmin,jmax)=self.extent
+        maxring=max(abs(imin-ci),abs(imax-ci),abs(jmin-cj),abs(jmax-cj))
+        best=None
+        for ring in range(maxring+1):
+            if ring==0:
+                ringcells=[(ci,cj)]
+            else:
+                ringcells=([(ci+di,cj-ring) for di in range(-ring,ring+1)]+
+                           [(ci+di,cj+ring) for di in range(-ring,ring+1)]+
+                           [(ci-ring,cj+dj) for dj in range(-ring+1,ring)]+
+                           [(ci+ring,cj+dj) for dj in range(-ring+1,ring)])
+            for cell in ringcells:
+                for k in self.cells.get(cell,[]):
+                    (tx,ty)=self.boxes[k].get_center()
+                    d=(tx-x)**2+(ty-y)**2
+                    if best is None or (d,k)<best:
+                        best=(d,k)
+            #every tile not seen yet lies wholly outside the square of cells searched so far
+            cs=self.cell_size
+            edge=min(x-(ci-ring)*cs,(ci+ring+1)*cs-x,y-(cj-ring)*cs,(cj+ring+1)*cs-y)
+            if best is not None and best[0]<=edge**2:
+                break
+        return best[1]
@@ -0,0 +1,217 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+"""end to end acquisition throughput benchmark, run against imageSourceSim
+
+runs the same AcquisitionEngine/SavePipeline/PathPlanner combination as MosaicPanel.run_acquisition
+for every combination of the swept settings and writes a JSON report, e.g.
+
+python benchmark_acquisition.py --channels 1 4 --zplanes 1 3 --mosaic 1x1 3x3 --backends tiles stacks --out report.json
+python benchmark_acquisition.py --compare report.json --out new_report.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+import itertools
+import multiprocessing as mp
+
+import numpy as np
+
+from imageSourceSim import imageSource
+from AcquisitionEngine import AcquisitionEngine, TIMING_FIELDS
+from SavePipeline import SavePipeline
+from PathPlanner import plan_path
+
+PERCENTILES = [50,90,99]
+#the settings which have to match for --compare to pair up two runs, reports without one of them only match reports without it
+CONFIG_KEY_FIELDS = ['channels','zplanes','mosaic','backend','sections','sequencing','serpentine','writers','buffers']
+
+
+def mosaic_positions(nsections, mx, my, frame_size, overlap=10.0, pitch=800.0, origin=(400.0,500.0)):
+    """lay out nsections along a line with a mx by my grid of frames each, in the column by column
+    order posList uses, returns a list of (slice_index,frame_index,x,y)"""
+    (fw,fh) = frame_size
+    alpha = overlap/100.0
+    positions = []
+    for i in range(nsections):
+        cx = origin[0] + i*pitch
+        cy = origin[1]
+        j = 0
+        for x in range(mx):
+            for y in range(my):
+                positions.append((i,j,cx+(x-(mx-1)/2.0)*fw*(1-alpha),cy+(y-(my-1)/2.0)*fh*(1-alpha)))
+                j += 1
+    return positions
+
+
+def percentiles(values):
+    """the PERCENTILES of values (seconds), in milliseconds"""
+    if len(values) == 0:
+        return dict([("p%d"%p,0.0) for p in PERCENTILES])
+    return dict([("p%d"%p,1000.0*np.percentile(values,p)) for p in PERCENTILES])
+
+
+def run_config(args, nchannels, nzplanes, mosaic, backend):
+    """run one acquisition with the given settings, returns its entry for the report"""
+    src = imageSource(ribbon_file=args.ribbon, sensor_size=(args.sensor,args.sensor), pixel_size=args.pixel_size,
+                      stage_speed=args.stage_speed, stage_settle=args.stage_settle, exposure_scale=args.exposure_scale,
+                      readout_time=args.readout_time, autofocus_time=args.autofocus_time,
+                      sequenceable=args.sequencing, noise=args.noise)
+    channels = [(ch,ch,args.exposure,0.0) for ch in src.get_channels()[:nchannels]]
+    zplanes = [(k-(nzplanes-1)/2.0)*args.zstep for k in range(nzplanes)]
+    (mx,my) = mosaic
+    positions = mosaic_positions(args.sections, mx, my, src.get_frame_size_um())
+    plan = plan_path(positions, serpentine=args.serpentine, order_sections=False,
+                     speed=args.stage_speed, settle=args.stage_settle)
+
+    outdir = tempfile.mkdtemp(prefix='mosaic_benchmark_', dir=args.workdir)
+    for (ch,prot_name,exposure,zoffset) in channels:
+        os.makedirs(os.path.join(outdir,prot_name))
+    metadata_dictionary = {
+    'channelname'    : dict([(ch,ch) for ch in src.get_channels()]),
+    '(height,width)' : src.get_sensor_size(),
+    'ScaleFactorX'   : src.get_pixel_size(),
+    'ScaleFactorY'   : src.get_pixel_size(),
+    'exp_time'       : dict([(ch,args.exposure) for ch in src.get_channels()]),
+    }
+    (height,width) = src.get_sensor_size()
+    pipeline = SavePipeline(metadata_dictionary, frame_bytes=height*width*src.get_bytes_per_pixel(),
+                            num_writers=args.writers, num_buffers=args.buffers, backend=backend, journal_dir=outdir)
+    pipeline.start()
+    engine = AcquisitionEngine(src, pipeline, outdir, channels, zplanes=zplanes, use_sequencing=args.sequencing)
+    t0 = time.time()
+    try:
+        engine.run(plan.positions, waypoints=plan.waypoints)
+        t_acquired = time.time()
+    finally:
+        pipeline.close()
+    t_saved = time.time()
+    stats = pipeline.get_stats()
+    shutil.rmtree(outdir, ignore_errors=True)
+
+    nframes = len(plan.positions)*len(channels)*len(zplanes)
+    latencies = {}
+    for field in TIMING_FIELDS:
+        latencies[field] = percentiles([t.times[field] for t in engine.timings])
+    return {'config':{'channels':nchannels,
+                      'zplanes':nzplanes,
+                      'mosaic':"%dx%d"%(mx,my),
+                      'backend':backend,
+                      'sections':args.sections,
+                      'writers':args.writers,
+                      'buffers':args.buffers,
+                      'sequencing':args.sequencing,
+                      'serpentine':args.serpentine},
+            'frames':nframes,
+            'positions':len(plan.positions),
+            'acquire_sec':t_acquired-t0,
+            'total_sec':t_saved-t0,
+            'frames_per_sec':nframes/(t_saved-t0),
+            'sec_per_section':(t_saved-t0)/args.sections,
+            'writer_mb_per_sec':stats['mb_written']/(t_saved-t0),
+            'writer_max_queue_depth':stats['max_queue_depth'],
+            'writer_blocked_sec':stats['blocked_time'],
+            'predicted_travel_sec':plan.after.time,
+            'latency_ms':latencies}
+
+
+def config_key(entry):
+    c = entry['config']
+    return tuple([c.get(field) for field in CONFIG_KEY_FIELDS])
+
+
+def compare(old_report, new_report):
+    """print how the throughput of each configuration in new_report changed from old_report"""
+    old = dict([(config_key(entry),entry) for entry in old_report['results']])
+    print "%-60s %12s %12s %8s"%(",".join(CONFIG_KEY_FIELDS),"old frames/s","new frames/s","change")
+    unmatched = 0
+    for entry in new_report['results']:
+        key = config_key(entry)
+        if key not in old:
+            unmatched += 1
+            continue
+        before = old[key]['frames_per_sec']
+        after = entry['frames_per_sec']
+        print "%-60s %12.2f %12.2f %+7.1f%%"%(",".join([str(k) for k in key]),before,after,100.0*(after-before)/before)
+    if unmatched > 0:
+        print "%d configurations were not run with the same settings in the old report"%unmatched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark acquisition throughput against a simulated microscope")
+    parser.add_argument('--channels', type=int, nargs='+', default=[1,2,4], help="numbers of channels to sweep")
+    parser.add_argument('--zplanes', type=int, nargs='+', default=[1,3], help="z stack depths to sweep")
+    parser.add_argument('--mosaic', nargs='+', default=['1x1','3x3'], help="mosaic sizes to sweep, as MXxMY")
+    parser.add_argument('--backends', nargs='+', default=['tiles','stacks'], help="writer backends to sweep")
+    parser.add_argument('--sections', type=int, default=5, help="number of sections per run")
+    parser.add_argument('--writers', type=int, default=2, help="number of writer processes")
+    parser.add_argument('--buffers', type=int, default=32, help="number of shared frame buffers")
+    parser.add_argument('--sequencing', action='store_true', help="use hardware sequencing")
+    parser.add_argument('--serpentine', action='store_true', help="visit frames in serpentine order")
+    parser.add_argument('--ribbon', default=None, help="image to use as the ribbon, otherwise a synthetic one")
+    parser.add_argument('--sensor', type=int, default=1024, help="camera width and height in pixels")
+    parser.add_argument('--pixel-size', type=float, default=0.5, help="camera pixel size in microns")
+    parser.add_argument('--exposure', type=float, default=20.0, help="exposure time in msec")
+    parser.add_argument('--exposure-scale', type=float, default=1.0, help="fraction of each exposure to wait for")
+    parser.add_argument('--readout-time', type=float, default=0.03, help="camera readout time in sec")
+    parser.add_argument('--autofocus-time', type=float, default=0.05, help="autofocus lock time in sec")
+    parser.add_argument('--stage-speed', type=float, default=2000.0, help="stage speed in microns/sec")
+    parser.add_argument('--stage-settle', type=float, default=0.05, help="stage settling time in sec")
+    parser.add_argument('--zstep', type=float, default=0.5, help="z stack step in microns")
+    parser.add_argument('--noise', type=float, default=20.0, help="noise added to the simulated frames")
+    parser.add_argument('--workdir', default=None, help="directory to write the frames in, defaults to the system temp dir")
+    parser.add_argument('--out', default='acquisition_benchmark.json', help="where to write the JSON report")
+    parser.add_argument('--compare', default=None, help="an earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    mosaics = [tuple([int(n) for n in m.lower().split('x')]) for m in args.mosaic]
+    results = []
+    for (nchannels,nzplanes,mosaic,backend) in itertools.product(args.channels,args.zplanes,mosaics,args.backends):
+        print "channels %d, z planes %d, mosaic %dx%d, %s backend"%(nchannels,nzplanes,mosaic[0],mosaic[1],backend)
+        entry = run_config(args,nchannels,nzplanes,mosaic,backend)
+        print "  %.2f frames/sec, %.2f sec/section, writers %.1f MB/s"%(entry['frames_per_sec'],entry['sec_per_section'],
+                                                                       entry['writer_mb_per_sec'])
+        results.append(entry)
+
+    report = {'created':time.strftime('%Y-%m-%d %H:%M:%S'),
+              'machine':{'platform':platform.platform(),
+                         'processor':platform.processor(),
+                         'cpus':mp.cpu_count(),
+                         'python':platform.python_version(),
+                         'numpy':np.__version__},
+              'settings':vars(args),
+              'results':results}
+    f = open(args.out,'w')
+    json.dump(report,f,indent=2,sort_keys=True)
+    f.close()
+    print "wrote",args.out
+
+    if args.compare is not None:
+        f = open(args.compare,'r')
+        old_report = json.load(f)
+        f.close()
+        compare(old_report,report)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,125 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+"""benchmark of aligning pairs of cutouts in the AlignmentPool, for how the batch alignment scales with the number of workers
+
+python benchmark_alignment.py --pairs 200 --side 400 --workers 1 2 4 8 --out alignment_benchmark.json
+"""
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+from AlignmentPool import AlignmentPool
+from CutoutAlignment import correlation_shift
+
+
+def synthetic_pairs(npairs, side, max_shift=20, seed=0):
+    """pairs of side x side cutouts of a smooth random texture, the second shifted by a random whole number of pixels,
+    returns a list of (one_cut,two_cut,(dx,dy)) with the shift correlation_shift should find"""
+    rng = np.random.RandomState(seed)
+    texture = gaussian_filter(rng.normal(size=(side+2*max_shift,side+2*max_shift)),3)
+    texture = (255*(texture-texture.min())/(texture.max()-texture.min())).astype(np.uint8)
+    pairs = []
+    for k in range(npairs):
+        (dx,dy) = rng.randint(-max_shift,max_shift+1,2)
+        one_cut = texture[max_shift:max_shift+side,max_shift:max_shift+side]
+        two_cut = texture[max_shift+dy:max_shift+dy+side,max_shift+dx:max_shift+dx+side]
+        pairs.append((one_cut,two_cut,(dx,dy)))
+    return pairs
+
+
+def benchmark_serial(pairs, params):
+    """align the pairs one after another in this process, as the batch alignment does with no workers"""
+    #like the workers, the first pair isn't counted
+    correlation_shift(pairs[0][0],pairs[0][1],*params)
+    t0 = time.time()
+    results = [correlation_shift(one_cut,two_cut,*params) for (one_cut,two_cut,shift) in pairs]
+    elapsed = time.time()-t0
+    return {'workers':0,'sec':elapsed,'pairs_per_sec':len(pairs)/elapsed,'errors':count_errors(pairs,results)}
+
+
+def benchmark_pool(pairs, params, num_workers):
+    """align the pairs in a pool of num_workers processes, not counting starting the workers up"""
+    side = max([one_cut.shape[0] for (one_cut,two_cut,shift) in pairs])
+    pool = AlignmentPool(2*side*side*np.dtype(np.float64).itemsize,num_workers=num_workers)
+    pool.start()
+    #one job per worker first, so the imports and plans they make are not counted
+    list(pool.align([(k,one_cut,two_cut,'corr',params) for k,(one_cut,two_cut,shift) in enumerate(pairs[:num_workers])]))
+    t0 = time.time()
+    results = dict(pool.align([(k,one_cut,two_cut,'corr',params) for k,(one_cut,two_cut,shift) in enumerate(pairs)]))
+    elapsed = time.time()-t0
+    pool.close()
+    results = [results.get(k) for k in range(len(pairs))]
+    return {'workers':num_workers,'sec':elapsed,'pairs_per_sec':len(pairs)/elapsed,'errors':count_errors(pairs,results)}
+
+
+def count_errors(pairs, results):
+    """the number of pairs not aligned to within half a pixel of the shift they were made with"""
+    errors = 0
+    for ((one_cut,two_cut,(dx,dy)),result) in zip(pairs,results):
+        if result is None:
+            errors += 1
+            continue
+        (corrval,dx_pix,dy_pix,quality) = result
+        if abs(dx_pix-dx)>0.5 or abs(dy_pix-dy)>0.5:
+            errors += 1
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark aligning pairs of cutouts in the AlignmentPool")
+    parser.add_argument('--pairs', type=int, default=200, help="number of pairs to align")
+    parser.add_argument('--side', type=int, default=400, help="side in pixels of the cutouts")
+    parser.add_argument('--upsample', type=int, default=10, help="fractions of a pixel to find the shift to")
+    parser.add_argument('--workers', type=int, nargs='+', default=None,
+                        help="numbers of worker processes to try, defaults to 1 up to the number of cores")
+    parser.add_argument('--out', default=None, help="where to write a JSON report")
+    args = parser.parse_args(argv)
+
+    workers = args.workers
+    if workers is None:
+        workers = range(1,mp.cpu_count()+1)
+    pairs = synthetic_pairs(args.pairs,args.side)
+    params = (args.upsample,0,128)
+
+    report = {'created':time.strftime('%Y-%m-%d %H:%M:%S'),'cores':mp.cpu_count(),'pairs':args.pairs,'side':args.side,
+              'upsample':args.upsample,'runs':[]}
+    serial = benchmark_serial(pairs,params)
+    report['runs'].append(serial)
+    print "%d cores, %d pairs of %dx%d cutouts"%(mp.cpu_count(),args.pairs,args.side,args.side)
+    print "%8s %10s %12s %8s %8s"%("workers","sec","pairs/sec","speedup","errors")
+    print "%8s %10.2f %12.1f %8.2f %8d"%("serial",serial['sec'],serial['pairs_per_sec'],1.0,serial['errors'])
+    for num_workers in workers:
+        result = benchmark_pool(pairs,params,num_workers)
+        result['speedup'] = serial['sec']/result['sec']
+        report['runs'].append(result)
+        print "%8d %10.2f %12.1f %8.2f %8d"%(num_workers,result['sec'],result['pairs_per_sec'],result['speedup'],result['errors'])
+    if args.out is not None:
+        f = open(args.out,'w')
+        json.dump(report,f,indent=2,sort_keys=True)
+        f.close()
+        print "wrote",args.out
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,318 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+"""benchmarks for the overview ImageCollection, comparing against the old ways of doing things
+
+python benchmark_collection.py --tiles 100 1000 10000 --cache-mb 1 16 --display-tiles 100 1000 --out collection_benchmark.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+
+import numpy as np
+
+from Rectangle import Rectangle
+from TileIndex import TileIndex, rects_intersect
+from ImageCollection import MyImage
+from TileCache import tile_cache, mapped_tiles
+from PyramidDisplay import PyramidDisplay
+from ContrastLUT import apply_lut, ContrastMapper
+
+
+def overview_tiles(ntiles, frame_size=(400.0,300.0), overlap=0.1, seed=0):
+    """MyImages (with no pixels) laid out like an overview of a ribbon, a grid of overlapping frames"""
+    (fw,fh) = frame_size
+    ncols = int(np.ceil(np.sqrt(ntiles*4)))
+    rng = np.random.RandomState(seed)
+    images = []
+    for k in range(ntiles):
+        x = (k%ncols)*fw*(1-overlap) + rng.uniform(-5,5)
+        y = (k//ncols)*fh*(1-overlap) + rng.uniform(-5,5)
+        images.append(MyImage(None,Rectangle(x-fw/2,x+fw/2,y-fh/2,y+fh/2)))
+    return images
+
+
+def random_boxes(images, nqueries, size=50.0, seed=1):
+    rng = np.random.RandomState(seed)
+    left = min([im.boundBox.left for im in images])
+    right = max([im.boundBox.right for im in images])
+    top = min([im.boundBox.top for im in images])
+    bottom = max([im.boundBox.bottom for im in images])
+    boxes = []
+    for k in range(nqueries):
+        x = rng.uniform(left,right)
+        y = rng.uniform(top,bottom)
+        boxes.append(Rectangle(x-size/2,x+size/2,y-size/2,y+size/2))
+    return boxes
+
+
+def timeit(func, queries):
+    t0 = time.time()
+    results = [func(q) for q in queries]
+    return ((time.time()-t0)/len(queries), results)
+
+
+def benchmark_index(ntiles, nqueries):
+    """time linear scans through the images against TileIndex lookups, returns a dict of usec per query"""
+    images = overview_tiles(ntiles)
+    boxes = random_boxes(images, nqueries)
+    index = TileIndex()
+    t0 = time.time()
+    for k,im in enumerate(images):
+        index.insert(k,im.boundBox)
+    build = time.time()-t0
+
+    def linear_rect(box):
+        for k,im in enumerate(images):
+            if im.contains_rect(box):
+                return k
+        return None
+    def index_rect(box):
+        ids = index.containing_rect(box)
+        return ids[0] if len(ids)>0 else None
+    def linear_point(box):
+        (x,y) = box.get_center()
+        return [k for k,im in enumerate(images) if im.contains_point(x,y)]
+    def index_point(box):
+        (x,y) = box.get_center()
+        return index.containing_point(x,y)
+    def linear_overlap(box):
+        return [k for k,im in enumerate(images) if rects_intersect(im.boundBox,box)]
+    def index_overlap(box):
+        return index.overlapping(box)
+    centres = np.array([im.boundBox.get_center() for im in images])
+    def linear_nearest(box):
+        (x,y) = box.get_center()
+        d = (centres[:,0]-x)**2+(centres[:,1]-y)**2
+        return int(np.argmin(d))
+    def index_nearest(box):
+        (x,y) = box.get_center()
+        return index.nearest(x,y)
+
+    result = {'tiles':ntiles,'queries':nqueries,'index_build_usec_per_tile':1e6*build/ntiles}
+    for (name,linear,indexed) in [('contains_rect',linear_rect,index_rect),
+                                  ('contains_point',linear_point,index_point),
+                                  ('overlapping',linear_overlap,index_overlap),
+                                  ('nearest',linear_nearest,index_nearest)]:
+        (t_linear,r_linear) = timeit(linear,boxes)
+        (t_index,r_index) = timeit(indexed,boxes)
+        assert r_linear == r_index, "index disagrees with linear scan for %s"%name
+        result[name] = {'linear_usec':1e6*t_linear,'index_usec':1e6*t_index,'speedup':t_linear/t_index}
+    return result
+
+
+def write_tiles(images, outdir, pixels=(300,400), tile_format=".tif", seed=2):
+    """give the images of overview_tiles random pixels saved in outdir"""
+    rng = np.random.RandomState(seed)
+    for k,im in enumerate(images):
+        im.imagePath = os.path.join(outdir,"%010d%s"%(k,tile_format))
+        im.format = tile_format
+        im.save_data(rng.randint(0,255,pixels).astype(np.uint8))
+
+
+def benchmark_cache(ntiles, nqueries, cache_mb, tile_format=".tif"):
+    """time get_cutout with the tile cache off and with a budget of cache_mb, the boxes wander
+    between neighbouring tiles the way fast forward does, returns a dict of usec per cutout.
+    memory mapped tiles (.npy, and the uncompressed .tif that save_data writes) don't go through the cache,
+    so for them both times should match"""
+    images = overview_tiles(ntiles)
+    outdir = tempfile.mkdtemp(prefix='collection_benchmark_')
+    try:
+        write_tiles(images,outdir,tile_format=tile_format)
+        #a random walk of small steps, revisiting the same few tiles
+        rng = np.random.RandomState(3)
+        boxes = []
+        (x,y) = images[0].boundBox.get_center()
+        for k in range(nqueries):
+            x += rng.uniform(-150,200)
+            y += rng.uniform(-100,100)
+            boxes.append(Rectangle(x-25,x+25,y-25,y+25))
+        index = TileIndex()
+        for k,im in enumerate(images):
+            index.insert(k,im.boundBox)
+        def cutout(box):
+            ids = index.containing_rect(box)
+            return images[ids[0]].get_cutout(box) if len(ids)>0 else None
+
+        result = {'tiles':ntiles,'queries':nqueries,'cache_mb':cache_mb,'format':tile_format}
+        runs = {}
+        for (name,budget) in [('uncached',0),('cached',cache_mb)]:
+            tile_cache.clear()
+            mapped_tiles.clear()
+            tile_cache.set_max_bytes(int(budget*1024*1024))
+            tile_cache.reset_stats()
+            (t,cuts) = timeit(cutout,boxes)
+            runs[name] = cuts
+            result[name] = dict(tile_cache.get_stats(),usec=1e6*t)
+        for (a,b) in zip(runs['uncached'],runs['cached']):
+            assert (a is None and b is None) or np.array_equal(a,b), "cached cutout differs"
+        result['speedup'] = result['uncached']['usec']/result['cached']['usec']
+        return result
+    finally:
+        tile_cache.clear()
+        mapped_tiles.clear()
+        shutil.rmtree(outdir,ignore_errors=True)
+
+
+def draw_time(canvas, view, repeats=3):
+    """the average time to redraw the figure of canvas with its axis showing the Rectangle view"""
+    axis = canvas.figure.axes[0]
+    axis.set_xlim(view.left,view.right)
+    axis.set_ylim(view.bottom,view.top)
+    canvas.draw()
+    t0 = time.time()
+    for k in range(repeats):
+        axis.set_xlim(view.left,view.right)
+        axis.set_ylim(view.bottom,view.top)
+        canvas.draw()
+    return (time.time()-t0)/repeats
+
+
+def benchmark_display(ntiles, pixels=(300,400)):
+    """time redrawing an overview with one full resolution imshow per tile against the composited
+    PyramidDisplay, zoomed out to the whole collection, zoomed in on a couple of tiles and
+    after changing the contrast"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    images = overview_tiles(ntiles)
+    rng = np.random.RandomState(4)
+    tiles = [rng.randint(0,255,pixels).astype(np.uint8) for im in images]
+    bigbox = Rectangle(0,0,0,0)
+    images[0].boundBox.copyTo(bigbox)
+    for im in images:
+        bigbox.expand_to_include(im.boundBox)
+    (x,y) = images[ntiles//2].boundBox.get_center()
+    views = [('all',bigbox),('zoomed',Rectangle(x-400,x+400,y-300,y+300))]
+
+    result = {'tiles':ntiles}
+    for method in ['imshow','pyramid']:
+        figure = Figure(figsize=(10,8),dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        axis = figure.add_subplot(111)
+        axis.set_xlim(bigbox.left,bigbox.right)
+        axis.set_ylim(bigbox.bottom,bigbox.top)
+        t0 = time.time()
+        if method == 'imshow':
+            for (im,data) in zip(images,tiles):
+                b = im.boundBox
+                axis.imshow(data,cmap='gray',extent=[b.left,b.right,b.bottom,b.top]).set_clim(0,255)
+        else:
+            index = TileIndex()
+            display = PyramidDisplay(axis,index,lambda k: tiles[k],clim=(0,255),area=bigbox)
+            for (k,(im,data)) in enumerate(zip(images,tiles)):
+                index.insert(k,im.boundBox)
+                display.add_tile(k,data)
+        result[method] = {'add_msec':1e3*(time.time()-t0)}
+        for (name,view) in views:
+            result[method][name+'_draw_msec'] = 1e3*draw_time(canvas,view)
+            if method == 'pyramid':
+                result[method][name+'_pixels'] = display.get_stats()['pixels']
+            else:
+                result[method][name+'_pixels'] = sum([d.size for d in tiles])
+        #change the contrast zoomed out, the way MosaicPanel.on_slider_change does
+        draw_time(canvas,bigbox,repeats=1)
+        t0 = time.time()
+        for vmax in [100,200,255]:
+            if method == 'imshow':
+                for theimg in axis.images:
+                    theimg.set_clim(0,vmax)
+            else:
+                display.set_clim(0,vmax)
+            canvas.draw()
+        result[method]['clim_draw_msec'] = 1e3*(time.time()-t0)/3
+    return result
+
+
+def old_lut_convert(image, display_min, display_max):
+    """how 16 bit frames used to be mapped to 8 bits, building a float lookup table every call"""
+    lut = np.arange(2**16, dtype='uint16')
+    lut = np.array(lut, copy=True)
+    lut.clip(display_min, display_max, out=lut)
+    lut -= display_min
+    lut = lut / ((display_max - display_min + 1) / 256.)
+    return np.take(lut.astype(np.uint8), image)
+
+
+def benchmark_contrast(shape=(1040,1388), repeats=50, bit_depth=14):
+    """time mapping a 16 bit camera frame to 8 bits the old way and through ContrastLUT"""
+    frame = np.random.RandomState(5).randint(0,2**bit_depth,shape).astype(np.uint16)
+    assert np.array_equal(old_lut_convert(frame,0,15000),apply_lut(frame,0,15000)), "lookup tables disagree"
+    out = np.empty(shape,np.uint8)
+    mapper = ContrastMapper(bit_depth)
+    result = {'shape':list(shape)}
+    for (name,func) in [('old',lambda: old_lut_convert(frame,0,15000)),
+                        ('cached_lut',lambda: apply_lut(frame,0,15000,out=out)),
+                        ('auto_levels',lambda: mapper.convert(frame,auto=True))]:
+        t0 = time.time()
+        for k in range(repeats):
+            func()
+        result[name+'_msec'] = 1e3*(time.time()-t0)/repeats
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark ImageCollection lookups")
+    parser.add_argument('--tiles', type=int, nargs='+', default=[100,1000,10000], help="collection sizes to try")
+    parser.add_argument('--queries', type=int, default=500, help="number of lookups to time at each size")
+    parser.add_argument('--cache-mb', type=float, nargs='+', default=[1,16], help="tile cache budgets to try")
+    parser.add_argument('--formats', nargs='+', default=['.tif','.npy'], help="tile formats to try")
+    parser.add_argument('--cache-tiles', type=int, default=1000, help="collection size for the tile cache benchmark")
+    parser.add_argument('--display-tiles', type=int, nargs='+', default=[100,1000], help="collection sizes for the display benchmark")
+    parser.add_argument('--out', default=None, help="where to write a JSON report")
+    args = parser.parse_args(argv)
+
+    report = {'created':time.strftime('%Y-%m-%d %H:%M:%S'),'index':[],'cache':[],'display':[],'contrast':None}
+    print "%8s %-15s %12s %12s %8s"%("tiles","query","linear usec","index usec","speedup")
+    for ntiles in args.tiles:
+        result = benchmark_index(ntiles,args.queries)
+        report['index'].append(result)
+        for name in ['contains_rect','contains_point','overlapping','nearest']:
+            r = result[name]
+            print "%8d %-15s %12.1f %12.1f %8.1f"%(ntiles,name,r['linear_usec'],r['index_usec'],r['speedup'])
+    print
+    print "%8s %6s %10s %14s %14s %8s %10s %10s"%("tiles","format","cache MB","uncached usec","cached usec","speedup","hit rate","evictions")
+    for (tile_format,cache_mb) in [(f,mb) for f in args.formats for mb in args.cache_mb]:
+        result = benchmark_cache(args.cache_tiles,args.queries,cache_mb,tile_format)
+        report['cache'].append(result)
+        print "%8d %6s %10.0f %14.1f %14.1f %8.1f %9.0f%% %10d"%(args.cache_tiles,tile_format,cache_mb,result['uncached']['usec'],
+              result['cached']['usec'],result['speedup'],100*result['cached']['hit_rate'],result['cached']['evictions'])
+    print
+    print "%8s %8s %12s %16s %16s %16s %14s"%("tiles","display","add msec","zoomed out msec","zoomed in msec","contrast msec","pixels drawn")
+    for ntiles in args.display_tiles:
+        result = benchmark_display(ntiles)
+        report['display'].append(result)
+        for method in ['imshow','pyramid']:
+            r = result[method]
+            print "%8d %8s %12.1f %16.1f %16.1f %16.1f %14d"%(ntiles,method,r['add_msec'],r['all_draw_msec'],r['zoomed_draw_msec'],
+                                                            r['clim_draw_msec'],r['all_pixels'])
+    print
+    report['contrast'] = benchmark_contrast()
+    print "16 bit to 8 bit, %(old_msec).2f msec per frame before, %(cached_lut_msec).2f msec with cached LUT, %(auto_levels_msec).2f msec with auto levels"%report['contrast']
+    if args.out is not None:
+        f = open(args.out,'w')
+        json.dump(report,f,indent=2,sort_keys=True)
+        f.close()
+        print "wrote",args.out
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,119 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+"""circular cross correlation of real images through FFTs, planned once per image shape
+
+with pyFFTW installed each shape is planned with FFTW once, in single precision, and the aligned work
+buffers are kept and reused for every image of that shape.  without it numpy's real FFTs are used,
+which always work in double precision.  either way only the half spectra of the real images are computed.
+
+the plans and buffers are module state, so this is not thread safe, each worker process gets its own.
+"""
+from collections import OrderedDict
+
+import numpy as np
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+#how many transform shapes to keep plans and buffers for
+MAX_PLANS = 8
+#how hard FFTW looks for a fast plan, FFTW_MEASURE pays for itself after a few dozen transforms of a shape
+FFTW_PLANNER_EFFORT = 'FFTW_MEASURE'
+
+
+class XCorrPlan():
+    """the forward and inverse real FFTs over the last two axes of arrays of one shape, with their work buffers
+
+    also remembers the last fixed image it transformed, so the spectrum of point 1 is reused as long
+    as the cutout around it has not changed
+    """
+    def __init__(self,shape,use_fftw=True):
+        """
+        keywords)
+        shape) the shape of the arrays to transform, (h,w) or a stack (n,h,w)
+        use_fftw) whether to use pyFFTW if it is installed
+
+        """
+        self.shape = tuple(shape)
+        self.spectrum_shape = self.shape[:-1]+(self.shape[-1]/2+1,)
+        self.fft = None
+        self.ifft = None
+        if use_fftw and pyfftw is not None:
+            self.dtype = np.float32
+            real_in = pyfftw.empty_aligned(self.shape,dtype='float32')
+            spectrum_out = pyfftw.empty_aligned(self.spectrum_shape,dtype='complex64')
+            spectrum_in = pyfftw.empty_aligned(self.spectrum_shape,dtype='complex64')
+            real_out = pyfftw.empty_aligned(self.shape,dtype='float32')
+            self.fft = pyfftw.FFTW(real_in,spectrum_out,axes=(-2,-1),direction='FFTW_FORWARD',
+                                   flags=(FFTW_PLANNER_EFFORT,))
+            self.ifft = pyfftw.FFTW(spectrum_in,real_out,axes=(-2,-1),direction='FFTW_BACKWARD',
+                                    flags=(FFTW_PLANNER_EFFORT,))
+        else:
+            self.dtype = np.float64
+        self.last_fixed = None
+        self.last_fixed_spectrum = None
+
+    def forward(self,image):
+        """the half spectrum of image, as a new array"""
+        if self.fft is None:
+            return np.fft.rfft2(image)
+        self.fft.input_array[:] = image
+        self.fft()
+        return self.fft.output_array.copy()
+
+    def fixed_spectrum(self,image):
+        """the half spectrum of image, reusing the last one if image is the same as last time"""
+        if self.last_fixed is None or not np.array_equal(self.last_fixed,image):
+            self.last_fixed_spectrum = self.forward(image)
+            self.last_fixed = np.array(image,copy=True)
+        return self.last_fixed_spectrum
+
+    def correlate(self,fixed_spectrum,moved_spectrum):
+        """the circular cross correlation of the images with the two half spectra, unnormalized with zero shift at [0,0]
+
+        the result lives in the plan's output buffer when using FFTW, so it is overwritten by the next call
+        """
+        if self.ifft is None:
+            return np.fft.irfft2(fixed_spectrum*moved_spectrum.conj(),s=self.shape[-2:])
+        product = self.ifft.input_array
+        np.conjugate(moved_spectrum,out=product)
+        np.multiply(product,fixed_spectrum,out=product)
+        #calling the FFTW object scales the inverse transform by 1/N like numpy
+        self.ifft()
+        return self.ifft.output_array
+
+
+_plans = OrderedDict()
+
+
+def get_plan(shape):
+    """the XCorrPlan for arrays of shape, made the first time and kept for the MAX_PLANS most recent shapes"""
+    shape = tuple(shape)
+    plan = _plans.pop(shape,None)
+    if plan is None:
+        plan = XCorrPlan(shape)
+        while len(_plans) >= MAX_PLANS:
+            _plans.popitem(last=False)
+    _plans[shape] = plan
+    return plan
+
+
+def clear_plans():
+    _plans.clear()
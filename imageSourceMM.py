@@ -1,341 +1,511 @@
-import numpy as np
-import MMCorePy
-from PIL import Image
-import time
-from Rectangle import Rectangle
-import wx
-
-class imageSource():
-    
-    def __init__(self,configFile,channelGroupName='Channels',use_focus_plane  = False,focus_points=None,transpose_xy = False):
-      #NEED TO IMPLEMENT IF NOT MICROMANAGER
-     
-        self.configFile=configFile
-        self.mmc = MMCorePy.CMMCore() 
-        self.mmc.enableStderrLog(False)
-        self.mmc.enableDebugLog(True)
-        self.mmc.setPrimaryLogFile('CoreLogProcessSpeed_newfirm.txt')
-        self.mmc.loadSystemConfiguration(self.configFile)
-       
-        self.channelGroupName=channelGroupName
-        self.transpose_xy = transpose_xy
-        auto_dev = self.mmc.getAutoFocusDevice()
-        assert(auto_dev is not None)
-
-        dev_name = self.mmc.getDeviceName(auto_dev)
-        print "dev_name",dev_name
-
-        if 'SimpleAutofocus' == dev_name:
-            self.has_continuous_focus = False
-        else:
-            self.has_continuous_focus = True
-       
-        print "has_continuous_focus",self.has_continuous_focus
-
-        self.focus_points = focus_points
-        self.plane_tuple = None
-        self.use_focus_plane = use_focus_plane
-        if use_focus_plane:
-            assert (focus_points is not None)
-            self.define_focal_plane(points)
-
-        #set the exposure to use
-    def define_focal_plane(self,points):
-        if points.shape[1]>3:
-            self.plane_tuple = self.planeFit(points)
-
-    def get_focal_z(self,x,y):
-        if self.plane_tuple is not None:
-            ax,ay,b = self.plane_tuple
-            return ax*x + ay*y + b
-        else:
-            return self.get_z()
-
-    def planeFit(self,points):
-        """
-        p, n = planeFit(points)
-
-        Fit an n-dimensional plane to the points.
-        Return a point on the plane and the normal.
-        """
-        from numpy.linalg import svd
-        points = np.reshape(points, (points.shape[0], -1))
-        assert points.shape[0] < points.shape[1]
-        ctr = points.mean(axis=1)
-        x = points - ctr[:,None]
-        M = np.dot(x, x.T)
-        pt_on_plane = ctr
-        norm =  svd(M)[0][:,-1]
-        d=norm[0]*pt_on_plane[0]+norm[1]*pt_on_plane[1]+norm[2]*pt_on_plane[2]
-        ax=-norm[0]/norm[2]
-        ay=-norm[1]/norm[2]
-        b = -d/norm[2]
-        return ax,ay,b
-
-    def image_based_autofocus(self,chan=None):
-        if chan is not None:
-            self.set_channel(chan)
-        self.mmc.fullFocus()
-        return self.mmc.getLastFocusScore()
-
-    def get_max_pixel_value(self):
-        bit_depth=self.mmc.getImageBitDepth()
-        return np.power(2,bit_depth)-1
-        
-    def set_exposure(self,exp_msec):
-      #NEED TO IMPLEMENT IF NOT MICROMANAGER
-        self.mmc.setExposure(exp_msec)
-    
-    def reset_focus_offset(self):
-        if self.has_hardware_autofocus():
-            focusDevice=self.mmc.getAutoFocusDevice()
-            self.mmc.setProperty(focusDevice,"CRISP State","Reset Focus Offset")
-  
-    def get_hardware_autofocus_state(self):
-        if self.has_hardware_autofocus():
-            return self.mmc.isContinuousFocusLocked()
-           
-    def set_hardware_autofocus_state(self,state):
-        if self.has_hardware_autofocus():
-            self.mmc.enableContinuousFocus(state)
-        
-    def has_hardware_autofocus(self):
-        #NEED TO IMPLEMENT IF NOT MICROMANAGER
-        return self.has_continuous_focus
-        
-        
-    def is_hardware_autofocus_done(self):
-      #NEED TO IMPLEMENT IF NOT MICROMANAGER
-        #hardware autofocus assumes the focus score is <1 when focused
-        #score=self.mmc.getCurrentFocusScore()
-        #if abs(score)<1:
-        #    print "locked on"
-        #    return True
-        #else:
-        #    print "score %f not locked on"%score
-        #    return False
-        return self.mmc.isContinuousFocusLocked()
-        
-
-    
-    def take_image(self,x,y):
-        #do not need to re-implement
-        #moves scope to x,y - focus scope - snap picture
-        #using the configured exposure time
-
-        #print "is continuous focus enabled",self.mmc.isContinuousFocusEnabled()
-        #print "is continuous focus locked",self.mmc.isContinuousFocusLocked()
-        if not self.mmc.isContinuousFocusLocked():
-            print 'CRISP is not locked'
-            wx.MessageBox('CRISP is not locked, Help me',)
-            return
-
-
-        #move stage to x,y
-        self.set_xy(x,y)
-        if self.use_focus_plane:
-            z = self.get_focal_z(x,y)
-            self.set_z(z)
-        else:
-            if not self.has_hardware_autofocus():
-                self.image_based_autofocus()
-            else:
-                #make sure hardware autofocus worked
-                attempts=0
-                failure=False
-                while not self.is_hardware_autofocus_done():
-                    attempts+=1
-                    if attempts>100:
-                        failure=True
-                        break
-                        print "not autofocusing correctly.. giving up after 10 seconds"
-                if failure:
-                    return None
-
-        #get the image data       
-        data=self.snap_image()
-       
-        #check whether it is in focus 
-        #if not self.meets_focus_spec(data):
-        #if not, attempt image based autofocus
-        #self.image_based_autofocus()
-        #data=self.snap_image()
-            
-        #check whether it is in focus
-        #if not self.meets_focus_spec(data):
-        #if not take a small stack around current point
-        #and return most in focus image of that
-        #data=self.take_best_of_stack()
-        
-        #calculate bounding box for data
-        bbox=self.calc_bbox(x,y)
-        
-        print "todo get some real metadata"
-        metadata=None
-        return data,bbox
-    def set_xy(self,x,y,use_focus_plane=False):
-        flipx,flipy = self.get_xy_flip()
-
-        if use_focus_plane:
-            z  = self.get_focal_z(x,y)
-            self.set_z(z)
-        if self.transpose_xy:
-            xt = x
-            x = y
-            y = xt
-        #if flipx==1:
-        #    x = -x
-        #if flipy == 1:
-        #    y = -y
-        
-        stg=self.mmc.getXYStageDevice()
-        self.mmc.setXYPosition(stg,x,y)
-        self.mmc.waitForDevice(stg)
-        #print self.get_xy()
-        
-
-
-    def get_xy_flip(self):
-        xystg=self.mmc.getXYStageDevice()
-        flipx=int(self.mmc.getProperty(xystg,"TransposeMirrorX"))==1
-        flipy=int(self.mmc.getProperty(xystg,"TransposeMirrorY"))==1
-
-        return flipx,flipy
-    def get_xy(self):
-        #NEED TO IMPLEMENT IF NOT MICROMANAGER
-        xystg=self.mmc.getXYStageDevice()
-        
-        flipx,flipy = self.get_xy_flip()
-
-        x=self.mmc.getXPosition(xystg)
-        y=self.mmc.getYPosition(xystg)
-
-        if self.transpose_xy:
-            xt = x
-            x = y
-            y = xt
-
-        #if flipx:
-        #    x = -x
-        #if flipy:
-        #    y = -y
-
-        return (x,y)
-    def get_z(self):
-        focus_stage=self.mmc.getFocusDevice()
-        return self.mmc.getPosition(focus_stage)
-    def set_z(self,z):
-        focus_stage=self.mmc.getFocusDevice()
-        self.mmc.setPosition (focus_stage,z)
-        self.mmc.waitForDevice(focus_stage)
-        
-    def get_pixel_size(self):
-        #NEED TO IMPLEMENT IF NOT MICROMANAGER
-        return self.mmc.getPixelSizeUm()
-    
-    def get_frame_size_um(self):
-        (sensor_width,sensor_height)=self.get_sensor_size()
-        pixsize = self.get_pixel_size()
-        flipx,flipy,trans = self.get_image_flip()
-        if trans:
-            temp = sensor_width
-            sensor_width = sensor_height
-            sensor_height = temp
-
-        return (sensor_width*pixsize,sensor_height*pixsize)
-        
-        
-    def calc_bbox(self,x,y):
-        #do not need to implement
-        (fw,fh)=self.get_frame_size_um()
-        
-        #we are going to follow the convention of upper left being 0,0 
-        #and lower right being X,X where X is positive
-        left = x - fw/2;
-        right = x + fw/2;
-        
-        top = y - fh/2;
-        bottom = y + fh/2;
-        print "fw,fh",fw,fh
-       
-        return Rectangle(left,right,top,bottom)
-
-    def snap_image(self):
-        #NEED TO IMPLEMENT IF NOT MICROMANAGER
-        #with microscope in current configuration
-        #snap a picture, and return the data as a numpy 2d array
-
-        for attempt in range(5):
-            try:
-                # do thing
-                self.mmc.snapImage()
-            except:
-                # perhaps reconnect, etc.
-                print "snap failed.. cleaning up buffer"
-                data=self.mmc.getImage()
-            else:
-              break
-        else:
-            # we failed all the attempts - deal with the consequences.
-            print "we failed on 5 attempts to snap properly... freakout!"
-            return None
-        data = self.mmc.getImage()
-
-
-
-
-        (flipx,flipy,trans) = self.get_image_flip()
-        if trans:
-            data = np.transpose(data)
-        if flipx:
-            data=np.fliplr(data)
-        if flipy:
-            data=np.flipud(data)
-        return data
-
-    
-    
-    def get_sensor_size(self):
-        #NEED TO IMPLEMENT IF NOT MICROMANAGER
-        #get the sensor size in pixels
-        height = self.mmc.getImageHeight()
-        width = self.mmc.getImageWidth()
-    
-        #return the height and width in pixels
-        return (width,height)
-        
-    def move_stage(self,x,y):
-        #need to implement if not MICROMANAGER
-        #move the stage to position x,y
-
-        self.set_xy(x,y)
-        
-        
-    def set_channel(self,channel):
-        if channel not in self.get_channels():
-            print "no such channel:" + channel
-            return False
-        
-        self.mmc.setConfig(self.channelGroupName,channel)
-        self.mmc.waitForConfig(self.channelGroupName,channel)
-        self.mmc.setShutterOpen(False)
-        
-    def get_channels(self):
-        return self.mmc.getAvailableConfigs(self.channelGroupName)
-        
-    def take_best_of_stack(self):
-        print "need to implement take best of stack"
-        return self.snap_image()  
-    def meets_focus_spec(data):
-        print "need to implement focus spec check"
-        return True
-    def get_image_flip(self):
-        #when take_image returns an image
-        #which way is up?
-        
-        cam=self.mmc.getCameraDevice()
-        flip_x = int(self.mmc.getProperty(cam,"TransposeMirrorX"))==1
-        flip_y = int(self.mmc.getProperty(cam,"TransposeMirrorY"))==1
-        trans = int(self.mmc.getProperty(cam,"TransposeXY"))==1
-
+import numpy as np
+import MMCorePy
+from PIL import Image
+import time
+from Rectangle import Rectangle
+import wx
+
+#seconds to allow each frame of a hardware sequence on top of its exposure, for readout and
+#triggering, before giving up on the camera
+SEQUENCE_FRAME_TIMEOUT = 1.0
+
+class imageSource():
+    
+    def __init__(self,configFile,channelGroupName='Channels',use_focus_plane  = False,focus_points=None,transpose_xy = False):
+      #NEED TO IMPLEMENT IF NOT MICROMANAGER
+     
+        self.configFile=configFile
+        self.mmc = MMCorePy.CMMCore() 
+        self.mmc.enableStderrLog(False)
+        self.mmc.enableDebugLog(True)
+        self.mmc.setPrimaryLogFile('CoreLogProcessSpeed_newfirm.txt')
+        self.mmc.loadSystemConfiguration(self.configFile)
+       
+        self.channelGroupName=channelGroupName
+        self.transpose_xy = transpose_xy
+        auto_dev = self.mmc.getAutoFocusDevice()
+        assert(auto_dev is not None)
+
+        dev_name = self.mmc.getDeviceName(auto_dev)
+        print "dev_name",dev_name
+
+        if 'SimpleAutofocus' == dev_name:
+            self.has_continuous_focus = False
+        else:
+            self.has_continuous_focus = True
+       
+        print "has_continuous_focus",self.has_continuous_focus
+
+        self.focus_points = focus_points
+        self.plane_tuple = None
+        self.use_focus_plane = use_focus_plane
+        self.sequenced = []
+        if use_focus_plane:
+            assert (focus_points is not None)
+            self.define_focal_plane(points)
+
+        #set the exposure to use
+    def define_focal_plane(self,points):
+        if points.shape[1]>3:
+            self.plane_tuple = self.planeFit(points)
+
+    def get_focal_z(self,x,y):
+        if self.plane_tuple is not None:
+            ax,ay,b = self.plane_tuple
+            return ax*x + ay*y + b
+        else:
+            return self.get_z()
+
+    def planeFit(self,points):
+        """
+        p, n = planeFit(points)
+
+        Fit an n-dimensional plane to the points.
+        Return a point on the plane and the normal.
+        """
+        from numpy.linalg import svd
+        points = np.reshape(points, (points.shape[0], -1))
+        assert points.shape[0] < points.shape[1]
+        ctr = points.mean(axis=1)
+        x = points - ctr[:,None]
+        M = np.dot(x, x.T)
+        pt_on_plane = ctr
+        norm =  svd(M)[0][:,-1]
+        d=norm[0]*pt_on_plane[0]+norm[1]*pt_on_plane[1]+norm[2]*pt_on_plane[2]
+        ax=-norm[0]/norm[2]
+        ay=-norm[1]/norm[2]
+        b = -d/norm[2]
+        return ax,ay,b
+
+    def image_based_autofocus(self,chan=None):
+        if chan is not None:
+            self.set_channel(chan)
+        self.mmc.fullFocus()
+        return self.mmc.getLastFocusScore()
+
+    def get_max_pixel_value(self):
+        bit_depth=self.mmc.getImageBitDepth()
+        return np.power(2,bit_depth)-1
+
+    def get_bytes_per_pixel(self):
+        #the size of a pixel of the images the camera delivers
+        return self.mmc.getBytesPerPixel()
+        
+    def set_exposure(self,exp_msec):
+      #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        self.mmc.setExposure(exp_msec)
+    
+    def reset_focus_offset(self):
+        if self.has_hardware_autofocus():
+            focusDevice=self.mmc.getAutoFocusDevice()
+            self.mmc.setProperty(focusDevice,"CRISP State","Reset Focus Offset")
+  
+    def get_hardware_autofocus_state(self):
+        if self.has_hardware_autofocus():
+            return self.mmc.isContinuousFocusLocked()
+           
+    def set_hardware_autofocus_state(self,state):
+        if self.has_hardware_autofocus():
+            self.mmc.enableContinuousFocus(state)
+        
+    def has_hardware_autofocus(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        return self.has_continuous_focus
+        
+        
+    def is_hardware_autofocus_done(self):
+      #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #hardware autofocus assumes the focus score is <1 when focused
+        #score=self.mmc.getCurrentFocusScore()
+        #if abs(score)<1:
+        #    print "locked on"
+        #    return True
+        #else:
+        #    print "score %f not locked on"%score
+        #    return False
+        return self.mmc.isContinuousFocusLocked()
+        
+
+    
+    def take_image(self,x,y):
+        #do not need to re-implement
+        #moves scope to x,y - focus scope - snap picture
+        #using the configured exposure time
+
+        #print "is continuous focus enabled",self.mmc.isContinuousFocusEnabled()
+        #print "is continuous focus locked",self.mmc.isContinuousFocusLocked()
+        if not self.mmc.isContinuousFocusLocked():
+            print 'CRISP is not locked'
+            wx.MessageBox('CRISP is not locked, Help me',)
+            return
+
+
+        #move stage to x,y
+        self.set_xy(x,y)
+        if self.use_focus_plane:
+            z = self.get_focal_z(x,y)
+            self.set_z(z)
+        else:
+            if not self.has_hardware_autofocus():
+                self.image_based_autofocus()
+            else:
+                #make sure hardware autofocus worked
+                attempts=0
+                failure=False
+                while not self.is_hardware_autofocus_done():
+                    attempts+=1
+                    if attempts>100:
+                        failure=True
+                        break
+                        print "not autofocusing correctly.. giving up after 10 seconds"
+                if failure:
+                    return None
+
+        #get the image data       
+        data=self.snap_image()
+       
+        #check whether it is in focus 
+        #if not self.meets_focus_spec(data):
+        #if not, attempt image based autofocus
+        #self.image_based_autofocus()
+        #data=self.snap_image()
+            
+        #check whether it is in focus
+        #if not self.meets_focus_spec(data):
+        #if not take a small stack around current point
+        #and return most in focus image of that
+        #data=self.take_best_of_stack()
+        
+        #calculate bounding box for data
+        bbox=self.calc_bbox(x,y)
+        
+        print "todo get some real metadata"
+        metadata=None
+        return data,bbox
+    def set_xy(self,x,y,use_focus_plane=False):
+        flipx,flipy = self.get_xy_flip()
+
+        if use_focus_plane:
+            z  = self.get_focal_z(x,y)
+            self.set_z(z)
+        if self.transpose_xy:
+            xt = x
+            x = y
+            y = xt
+        #if flipx==1:
+        #    x = -x
+        #if flipy == 1:
+        #    y = -y
+        
+        self.start_xy_move(x,y)
+        self.wait_for_xy()
+        #print self.get_xy()
+
+    def start_xy_move(self,x,y):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #start the stage moving to x,y and return without waiting for it to arrive
+        #(x,y are assumed to already have had any transpose applied)
+        stg=self.mmc.getXYStageDevice()
+        self.mmc.setXYPosition(stg,x,y)
+
+    def wait_for_xy(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #block until the xy stage has finished moving
+        stg=self.mmc.getXYStageDevice()
+        self.mmc.waitForDevice(stg)
+        
+
+
+    def get_xy_flip(self):
+        xystg=self.mmc.getXYStageDevice()
+        flipx=int(self.mmc.getProperty(xystg,"TransposeMirrorX"))==1
+        flipy=int(self.mmc.getProperty(xystg,"TransposeMirrorY"))==1
+
+        return flipx,flipy
+    def get_xy(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        xystg=self.mmc.getXYStageDevice()
+        
+        flipx,flipy = self.get_xy_flip()
+
+        x=self.mmc.getXPosition(xystg)
+        y=self.mmc.getYPosition(xystg)
+
+        if self.transpose_xy:
+            xt = x
+            x = y
+            y = xt
+
+        #if flipx:
+        #    x = -x
+        #if flipy:
+        #    y = -y
+
+        return (x,y)
+    def get_z(self):
+        focus_stage=self.mmc.getFocusDevice()
+        return self.mmc.getPosition(focus_stage)
+    def set_z(self,z):
+        focus_stage=self.mmc.getFocusDevice()
+        self.mmc.setPosition (focus_stage,z)
+        self.mmc.waitForDevice(focus_stage)
+        
+    def get_pixel_size(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        return self.mmc.getPixelSizeUm()
+    
+    def get_frame_size_um(self):
+        (sensor_width,sensor_height)=self.get_sensor_size()
+        pixsize = self.get_pixel_size()
+        flipx,flipy,trans = self.get_image_flip()
+        if trans:
+            temp = sensor_width
+            sensor_width = sensor_height
+            sensor_height = temp
+
+        return (sensor_width*pixsize,sensor_height*pixsize)
+        
+        
+    def calc_bbox(self,x,y):
+        #do not need to implement
+        (fw,fh)=self.get_frame_size_um()
+        
+        #we are going to follow the convention of upper left being 0,0 
+        #and lower right being X,X where X is positive
+        left = x - fw/2;
+        right = x + fw/2;
+        
+        top = y - fh/2;
+        bottom = y + fh/2;
+        print "fw,fh",fw,fh
+       
+        return Rectangle(left,right,top,bottom)
+
+    def snap_image(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #with microscope in current configuration
+        #snap a picture, and return the data as a numpy 2d array
+        if not self.start_snap():
+            return None
+        return self.get_snapped_image()
+
+    def start_snap(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #expose the camera, returns once the exposure is over but before the image
+        #has been read out, so the caller can do other things (like move the stage)
+        #before calling get_snapped_image.  Returns False if the snap failed
+        for attempt in range(5):
+            try:
+                # do thing
+                self.mmc.snapImage()
+            except:
+                # perhaps reconnect, etc.
+                print "snap failed.. cleaning up buffer"
+                data=self.mmc.getImage()
+            else:
+              break
+        else:
+            # we failed all the attempts - deal with the consequences.
+            print "we failed on 5 attempts to snap properly... freakout!"
+            return False
+        return True
+
+    def get_snapped_image(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #read out the image from the last start_snap and orient it
+        data = self.mmc.getImage()
+        return self.orient_image(data)
+
+    def orient_image(self,data):
+        #flip and transpose an image from the camera so that up is up
+        (flipx,flipy,trans) = self.get_image_flip()
+        if trans:
+            data = np.transpose(data)
+        if flipx:
+            data=np.fliplr(data)
+        if flipy:
+            data=np.flipud(data)
+        return data
+
+    
+    
+    def can_sequence(self,steps):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #can the hardware run this list of (z,channel,exposure) steps as a single
+        #triggered sequence acquisition rather than one snap per step
+        #returns True only if every property that changes between steps is sequenceable
+        if len(steps)<2:
+            return False
+        cam=self.mmc.getCameraDevice()
+        exposures=[exposure for (z,ch,exposure) in steps]
+        if len(set(exposures))>1:
+            if not self.mmc.isExposureSequenceable(cam):
+                return False
+            if self.mmc.getExposureSequenceMaxLength(cam)<len(steps):
+                return False
+        zs=[z for (z,ch,exposure) in steps]
+        if len(set(zs))>1:
+            focus_stage=self.mmc.getFocusDevice()
+            if not self.mmc.isStageSequenceable(focus_stage):
+                return False
+            if self.mmc.getStageSequenceMaxLength(focus_stage)<len(steps):
+                return False
+        for (dev,prop),values in self.get_channel_property_sequences(steps).items():
+            if len(set(values))>1:
+                if not self.mmc.isPropertySequenceable(dev,prop):
+                    return False
+                if self.mmc.getPropertySequenceMaxLength(dev,prop)<len(steps):
+                    return False
+        return True
+
+    def get_channel_property_sequences(self,steps):
+        #returns a dictionary keyed by (device,property) of the list of values that property
+        #has to take on for each of the (z,channel,exposure) steps.
+        #a channel whose config doesn't set a property leaves it as the step before set it,
+        #as snapping frame by frame would, and steps before any channel sets it keep the device's current value
+        settings=[]
+        keys=[]
+        for (z,ch,exposure) in steps:
+            config=self.mmc.getConfigData(self.channelGroupName,ch)
+            setting_dict=dict([])
+            for i in range(config.size()):
+                setting=config.getSetting(i)
+                key=(setting.getDeviceLabel(),setting.getPropertyName())
+                setting_dict[key]=setting.getPropertyValue()
+                if key not in keys:
+                    keys.append(key)
+            settings.append(setting_dict)
+        props=dict([])
+        for (dev,prop) in keys:
+            value=self.mmc.getProperty(dev,prop)
+            values=[]
+            for setting_dict in settings:
+                value=setting_dict.get((dev,prop),value)
+                values.append(value)
+            props[(dev,prop)]=values
+        return props
+
+    def start_sequence(self,steps):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #load the (z,channel,exposure) steps into the hardware sequencers and start a
+        #sequence acquisition of len(steps) images.  call can_sequence first, and set
+        #the z, exposure and channel of the first step, so the things that don't change are right
+        cam=self.mmc.getCameraDevice()
+        focus_stage=self.mmc.getFocusDevice()
+        self.sequenced=[]
+        self.sequence_timeout=sum([exp for (zz,chan,exp) in steps])/1000.0+SEQUENCE_FRAME_TIMEOUT*len(steps)
+        self.sequence_start=time.time()
+
+        exposures=[exp for (zz,chan,exp) in steps]
+        if len(set(exposures))>1:
+            self.mmc.loadExposureSequence(cam,exposures)
+            self.mmc.startExposureSequence(cam)
+            self.sequenced.append(('exposure',cam,None))
+        zs=[zz for (zz,chan,exp) in steps]
+        if len(set(zs))>1:
+            self.mmc.loadStageSequence(focus_stage,zs)
+            self.mmc.startStageSequence(focus_stage)
+            self.sequenced.append(('stage',focus_stage,None))
+        for (dev,prop),values in self.get_channel_property_sequences(steps).items():
+            if len(set(values))>1:
+                self.mmc.loadPropertySequence(dev,prop,values)
+                self.mmc.startPropertySequence(dev,prop)
+                self.sequenced.append(('property',dev,prop))
+
+        self.mmc.startSequenceAcquisition(len(steps),0,True)
+
+    def wait_for_sequence(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #block until the camera has finished exposing the running sequence, and
+        #stop all the hardware sequences started by start_sequence.
+        #raises IOError if the camera hasn't finished in the time the exposures should take
+        try:
+            while self.mmc.isSequenceRunning():
+                if time.time()-self.sequence_start>self.sequence_timeout:
+                    self.mmc.stopSequenceAcquisition()
+                    self.mmc.clearCircularBuffer()
+                    raise IOError("sequence acquisition did not finish within %.1f sec"%self.sequence_timeout)
+                self.mmc.sleep(1)
+        finally:
+            self.stop_hardware_sequences()
+
+    def stop_hardware_sequences(self):
+        for (kind,dev,prop) in self.sequenced:
+            if kind == 'exposure':
+                self.mmc.stopExposureSequence(dev)
+            elif kind == 'stage':
+                self.mmc.stopStageSequence(dev)
+            else:
+                self.mmc.stopPropertySequence(dev,prop)
+        self.sequenced=[]
+
+    def get_sequence_images(self,n):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #pop the n images of the last sequence out of the circular buffer, oriented like snap_image.
+        #raises IOError if the camera stops or times out before delivering all of them, e.g. having dropped
+        #frames, so the caller can acquire the position again some other way
+        images=[]
+        for i in range(n):
+            while self.mmc.getRemainingImageCount()==0:
+                if not self.mmc.isSequenceRunning() or time.time()-self.sequence_start>self.sequence_timeout:
+                    if self.mmc.isSequenceRunning():
+                        self.mmc.stopSequenceAcquisition()
+                    self.mmc.clearCircularBuffer()
+                    raise IOError("camera delivered %d of %d sequence images"%(i,n))
+                self.mmc.sleep(1)
+            images.append(self.orient_image(self.mmc.popNextImage()))
+        return images
+
+    def get_sensor_size(self):
+        #NEED TO IMPLEMENT IF NOT MICROMANAGER
+        #get the sensor size in pixels
+        height = self.mmc.getImageHeight()
+        width = self.mmc.getImageWidth()
+    
+        #return the height and width in pixels
+        return (width,height)
+        
+    def move_stage(self,x,y):
+        #need to implement if not MICROMANAGER
+        #move the stage to position x,y
+
+        self.set_xy(x,y)
+
+    def start_move_stage(self,x,y):
+        #start moving the stage to position x,y without waiting for it,
+        #pair with wait_for_xy
+        if self.transpose_xy:
+            xt = x
+            x = y
+            y = xt
+        self.start_xy_move(x,y)
+        
+        
+    def set_channel(self,channel):
+        if channel not in self.get_channels():
+            print "no such channel:" + channel
+            return False
+        
+        self.mmc.setConfig(self.channelGroupName,channel)
+        self.mmc.waitForConfig(self.channelGroupName,channel)
+        self.mmc.setShutterOpen(False)
+        
+    def get_channels(self):
+        return self.mmc.getAvailableConfigs(self.channelGroupName)
+        
+    def take_best_of_stack(self):
+        print "need to implement take best of stack"
+        return self.snap_image()  
+    def meets_focus_spec(data):
+        print "need to implement focus spec check"
+        return True
+    def get_image_flip(self):
+        #when take_image returns an image
+        #which way is up?
+        
+        cam=self.mmc.getCameraDevice()
+        flip_x = int(self.mmc.getProperty(cam,"TransposeMirrorX"))==1
+        flip_y = int(self.mmc.getProperty(cam,"TransposeMirrorY"))==1
+        trans = int(self.mmc.getProperty(cam,"TransposeXY"))==1
+
         return (flip_x,flip_y,trans) 
\ No newline at end of file
@@ -0,0 +1,357 @@
+#===============================================================================
+#
+#  License: GPL
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License 2
+#  as published by the Free Software Foundation.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+#===============================================================================
+import time
+
+import numpy as np
+from PIL import Image
+
+from Rectangle import Rectangle
+from PathPlanner import move_time
+
+
+def synthetic_ribbon(shape=(2000,8000), nsections=10, seed=0):
+    """make a uint16 image of a ribbon of textured, slightly rotated rectangular sections on a dark background
+
+    keywords)
+    shape) the (height,width) of the image in pixels
+    nsections) how many sections to put along the ribbon
+    seed) seed for the random texture, so runs are repeatable
+
+    """
+    rng = np.random.RandomState(seed)
+    (height,width) = shape
+    #a blocky random texture plus fine noise, so that correlation based alignment has something to lock on to
+    texture = rng.uniform(0,1,(height//16+1,width//16+1)).astype(np.float32)
+    texture = np.repeat(np.repeat(texture,16,axis=0),16,axis=1)[:height,:width]
+    texture += 0.5*rng.uniform(0,1,shape).astype(np.float32)
+    ribbon = np.zeros(shape,np.float32)
+    pitch = width/float(nsections)
+    for k in range(nsections):
+        cx = (k+0.5)*pitch
+        cy = height/2.0 + rng.uniform(-.05,.05)*height
+        theta = rng.uniform(-.1,.1)
+        #only look at the columns this section can reach
+        left = max(int(cx-pitch/2),0)
+        right = min(int(cx+pitch/2),width)
+        (yy,xx) = np.mgrid[0:height,left:right]
+        dx = (xx-cx)*np.cos(theta)+(yy-cy)*np.sin(theta)
+        dy = -(xx-cx)*np.sin(theta)+(yy-cy)*np.cos(theta)
+        mask = (np.abs(dx)<0.4*pitch) & (np.abs(dy)<0.3*height)
+        ribbon[:,left:right][mask] = 3000*texture[:,left:right][mask]
+    ribbon += 200
+    return ribbon.astype(np.uint16)
+
+
+class imageSource():
+    """a stand in for imageSourceMM.imageSource which needs no microscope
+
+    frames are cut out of a large ribbon image sitting on a virtual stage, and every hardware call
+    takes as long as the configured latencies say it should, so the acquisition and alignment code
+    can be run and timed off the scope.
+    """
+    def __init__(self,configFile=None,channelGroupName='Channels',use_focus_plane  = False,focus_points=None,transpose_xy = False,
+                 ribbon_file=None,ribbon_pixel_size=0.5,ribbon_origin=(0.0,0.0),pixel_size=0.5,sensor_size=(512,512),bit_depth=14,
+                 channels=None,has_continuous_focus=True,sequenceable=False,
+                 stage_speed=2000.0,stage_settle=0.05,exposure_scale=1.0,readout_time=0.02,z_move_time=0.01,
+                 channel_time=0.02,autofocus_time=0.05,noise=20.0,seed=0):
+        """
+        keywords)
+        configFile) the MicroManager configuration, not used, taken so this can stand in for imageSourceMM.imageSource
+        channelGroupName,use_focus_plane,focus_points,transpose_xy) as for imageSourceMM.imageSource
+        ribbon_file) the path to an image to use as the ribbon, otherwise a synthetic_ribbon is made
+        ribbon_pixel_size) the size of a ribbon image pixel in microns
+        ribbon_origin) the stage (x,y) in microns of the upper left corner of the ribbon image
+        pixel_size) the size of a camera pixel in microns
+        sensor_size) the (width,height) of the camera in pixels
+        bit_depth) the camera bit depth
+        channels) a dictionary of channel name -> relative brightness
+        has_continuous_focus) whether to pretend to have a hardware autofocus
+        sequenceable) whether can_sequence should say the devices can run hardware sequences
+        stage_speed,stage_settle) microns/sec and seconds, see PathPlanner.move_time
+        exposure_scale) how much of each exposure time to actually wait, 0 for no waiting
+        readout_time) seconds to read out a frame
+        z_move_time) seconds for the focus drive to settle
+        channel_time) seconds to switch channel
+        autofocus_time) seconds for the focus to lock after a stage move
+        noise) standard deviation of the noise added to each frame
+        seed) seed for the noise
+
+        """
+        self.configFile=configFile
+        self.mmc = None
+        self.channelGroupName=channelGroupName
+        self.transpose_xy = transpose_xy
+        self.has_continuous_focus = has_continuous_focus
+        self.focus_points = focus_points
+        self.plane_tuple = None
+        self.use_focus_plane = use_focus_plane
+        if use_focus_plane:
+            assert (focus_points is not None)
+            self.define_focal_plane(focus_points)
+
+        if ribbon_file is not None:
+            self.ribbon = np.array(Image.open(ribbon_file)).astype(np.uint16)
+        else:
+            self.ribbon = synthetic_ribbon()
+        self.ribbon_pixel_size = ribbon_pixel_size
+        self.ribbon_origin = ribbon_origin
+        self.pixel_size = pixel_size
+        self.sensor_size = sensor_size
+        self.bit_depth = bit_depth
+        if channels is None:
+            channels = {'DAPI':1.0,'GFP':0.6,'Cy3':0.8,'Cy5':0.4}
+        self.channels = channels
+        self.sequenceable = sequenceable
+        self.stage_speed = stage_speed
+        self.stage_settle = stage_settle
+        self.exposure_scale = exposure_scale
+        self.readout_time = readout_time
+        self.z_move_time = z_move_time
+        self.channel_time = channel_time
+        self.autofocus_time = autofocus_time
+        self.noise = noise
+        self.rng = np.random.RandomState(seed)
+
+        #the state of the virtual hardware
+        self.x = 0.0
+        self.y = 0.0
+        self.z = 0.0
+        self.channel = sorted(channels.keys())[0]
+        self.exposure = 10.0
+        self.autofocus_on = False
+        self.move_done_at = time.time()
+        self.snapped = None
+        self.sequence = []
+
+    def define_focal_plane(self,points):
+        if points.shape[1]>3:
+            self.plane_tuple = self.planeFit(points)
+
+    def get_focal_z(self,x,y):
+        if self.plane_tuple is not None:
+            ax,ay,b = self.plane_tuple
+            return ax*x + ay*y + b
+        else:
+            return self.get_z()
+
+    def planeFit(self,points):
+        """
+        p, n = planeFit(points)
+
+        Fit an n-dimensional plane to the points.
+        Return a point on the plane and the normal.
+        """
+        from numpy.linalg import svd
+        points = np.reshape(points, (points.shape[0], -1))
+        assert points.shape[0] < points.shape[1]
+        ctr = points.mean(axis=1)
+        x = points - ctr[:,None]
+        M = np.dot(x, x.T)
+        pt_on_plane = ctr
+        norm =  svd(M)[0][:,-1]
+        d=norm[0]*pt_on_plane[0]+norm[1]*pt_on_plane[1]+norm[2]*pt_on_plane[2]
+        ax=-norm[0]/norm[2]
+        ay=-norm[1]/norm[2]
+        b = -d/norm[2]
+        return ax,ay,b
+
+    def wait(self,dt):
+        if dt > 0:
+            time.sleep(dt)
+
+    def render(self,x,y,ch,exposure):
+        """cut the frame centred on stage position x,y out of the ribbon, as channel ch would see it"""
+        (width,height) = self.sensor_size
+        (x0,y0) = self.ribbon_origin
+        cols = ((x - width*self.pixel_size/2.0 + (np.arange(width)+.5)*self.pixel_size - x0)/self.ribbon_pixel_size).astype(np.int)
+        rows = ((y - height*self.pixel_size/2.0 + (np.arange(height)+.5)*self.pixel_size - y0)/self.ribbon_pixel_size).astype(np.int)
+        colok = (cols>=0) & (cols<self.ribbon.shape[1])
+        rowok = (rows>=0) & (rows<self.ribbon.shape[0])
+        data = np.zeros((height,width),np.float32)
+        data[np.ix_(rowok,colok)] = self.ribbon[np.ix_(rows[rowok],cols[colok])]
+        data *= self.channels.get(ch,1.0)*exposure/10.0
+        if self.noise > 0:
+            data += self.rng.normal(0,self.noise,data.shape).astype(np.float32)
+        return np.clip(data,0,self.get_max_pixel_value()).astype(np.uint16)
+
+    def image_based_autofocus(self,chan=None):
+        if chan is not None:
+            self.set_channel(chan)
+        self.wait(self.autofocus_time)
+        return 1.0
+
+    def get_max_pixel_value(self):
+        return np.power(2,self.bit_depth)-1
+
+    def get_bytes_per_pixel(self):
+        return np.dtype(np.uint16).itemsize
+
+    def set_exposure(self,exp_msec):
+        self.exposure = exp_msec
+
+    def reset_focus_offset(self):
+        pass
+
+    def get_hardware_autofocus_state(self):
+        if self.has_hardware_autofocus():
+            return self.autofocus_on
+
+    def set_hardware_autofocus_state(self,state):
+        if self.has_hardware_autofocus():
+            self.autofocus_on = state
+
+    def has_hardware_autofocus(self):
+        return self.has_continuous_focus
+
+    def is_hardware_autofocus_done(self):
+        #the focus locks autofocus_time after the stage arrives
+        remaining = self.move_done_at + self.autofocus_time - time.time()
+        self.wait(min(remaining,.1))
+        return remaining <= 0
+
+    def take_image(self,x,y):
+        self.set_xy(x,y)
+        if self.use_focus_plane:
+            self.set_z(self.get_focal_z(x,y))
+        elif not self.has_hardware_autofocus():
+            self.image_based_autofocus()
+        else:
+            while not self.is_hardware_autofocus_done():
+                pass
+        data=self.snap_image()
+        bbox=self.calc_bbox(x,y)
+        return data,bbox
+
+    def set_xy(self,x,y,use_focus_plane=False):
+        if use_focus_plane:
+            self.set_z(self.get_focal_z(x,y))
+        if self.transpose_xy:
+            (x,y) = (y,x)
+        self.start_xy_move(x,y)
+        self.wait_for_xy()
+
+    def start_xy_move(self,x,y):
+        #the move takes as long as move_time says, starting from wherever the stage is headed now
+        start = max(time.time(),self.move_done_at)
+        self.move_done_at = start + move_time(x-self.x,y-self.y,self.stage_speed,self.stage_settle)
+        self.x = x
+        self.y = y
+
+    def wait_for_xy(self):
+        self.wait(self.move_done_at-time.time())
+
+    def get_xy_flip(self):
+        return (False,False)
+
+    def get_xy(self):
+        if self.transpose_xy:
+            return (self.y,self.x)
+        return (self.x,self.y)
+
+    def get_z(self):
+        return self.z
+
+    def set_z(self,z):
+        self.z = z
+        self.wait(self.z_move_time)
+
+    def get_pixel_size(self):
+        return self.pixel_size
+
+    def get_frame_size_um(self):
+        (sensor_width,sensor_height)=self.get_sensor_size()
+        pixsize = self.get_pixel_size()
+        return (sensor_width*pixsize,sensor_height*pixsize)
+
+    def calc_bbox(self,x,y):
+        (fw,fh)=self.get_frame_size_um()
+        left = x - fw/2
+        right = x + fw/2
+        top = y - fh/2
+        bottom = y + fh/2
+        return Rectangle(left,right,top,bottom)
+
+    def snap_image(self):
+        if not self.start_snap():
+            return None
+        return self.get_snapped_image()
+
+    def start_snap(self):
+        self.wait_for_xy()
+        self.wait(self.exposure_scale*self.exposure/1000.0)
+        self.snapped = (self.x,self.y,self.channel,self.exposure)
+        return True
+
+    def get_snapped_image(self):
+        self.wait(self.readout_time)
+        (x,y,ch,exposure) = self.snapped
+        return self.render(x,y,ch,exposure)
+
+    def orient_image(self,data):
+        return data
+
+    def can_sequence(self,steps):
+        return self.sequenceable and len(steps)>1
+
+    def start_sequence(self,steps):
+        self.sequence = [(self.x,self.y,ch,exposure) for (z,ch,exposure) in steps]
+        self.sequence_end = steps[-1]
+
+    def wait_for_sequence(self):
+        self.wait(sum([self.exposure_scale*exposure/1000.0 for (x,y,ch,exposure) in self.sequence]))
+        #the sequencers leave the hardware at the last step
+        (z,ch,exposure) = self.sequence_end
+        (self.z,self.channel,self.exposure) = (z,ch,exposure)
+
+    def get_sequence_images(self,n):
+        images = []
+        for (x,y,ch,exposure) in self.sequence[:n]:
+            self.wait(self.readout_time)
+            images.append(self.render(x,y,ch,exposure))
+        self.sequence = []
+        return images
+
+    def get_sensor_size(self):
+        #(width,height) in pixels, in the same order as imageSourceMM
+        return self.sensor_size
+
+    def move_stage(self,x,y):
+        self.set_xy(x,y)
+
+    def start_move_stage(self,x,y):
+        if self.transpose_xy:
+            (x,y) = (y,x)
+        self.start_xy_move(x,y)
+
+    def set_channel(self,channel):
+        if channel not in self.get_channels():
+            print "no such channel:" + channel
+            return False
+        if channel != self.channel:
+            self.channel = channel
+            self.wait(self.channel_time)
+
+    def get_channels(self):
+        return sorted(self.channels.keys())
+
+    def take_best_of_stack(self):
+        return self.snap_image()
+
+    def get_image_flip(self):
+        return (False,False,False)
@@ -1,309 +1,462 @@
-import numpy
-
-## Copyright (c) 2004-2007, Andrew D. Straw. All rights reserved.
-
-## Redistribution and use in source and binary forms, with or without
-## modification, are permitted provided that the following conditions are
-## met:
-
-##     * Redistributions of source code must retain the above copyright
-##       notice, this list of conditions and the following disclaimer.
-
-##     * Redistributions in binary form must reproduce the above
-##       copyright notice, this list of conditions and the following
-##       disclaimer in the documentation and/or other materials provided
-##       with the distribution.
-
-##     * Neither the name of the Andrew D. Straw nor the names of its
-##       contributors may be used to endorse or promote products derived
-##       from this software without specific prior written permission.
-
-## THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
-## "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
-## LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
-## A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
-## OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
-## SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
-## LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
-## DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
-## THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
-## (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
-## OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-
-def ransac(from_points,to_points,model,n,k,t,d,debug=False,return_all=False):
-    """fit model parameters to data using the RANSAC algorithm
-    
-This implementation written from pseudocode found at
-http://en.wikipedia.org/w/index.php?title=RANSAC&oldid=116358182
-
-{{{
-Given:
-    data - a set of observed data points
-    model - a model that can be fitted to data points
-    n - the minimum number of data values required to fit the model
-    k - the maximum number of iterations allowed in the algorithm
-    t - a threshold value for determining when a data point fits a model
-    d - the number of close data values required to assert that a model fits well to data
-Return:
-    bestfit - model parameters which best fit the data (or nil if no good model is found)
-iterations = 0
-bestfit = nil
-besterr = something really large
-while iterations < k {
-    maybeinliers = n randomly selected values from data
-    maybemodel = model parameters fitted to maybeinliers
-    alsoinliers = empty set
-    for every point in data not in maybeinliers {
-        if point fits maybemodel with an error smaller than t
-             add point to alsoinliers
-    }
-    if the number of elements in alsoinliers is > d {
-        % this implies that we may have found a good model
-        % now test how good it is
-        bettermodel = model parameters fitted to all points in maybeinliers and alsoinliers
-        thiserr = a measure of how well model fits these points
-        if thiserr < besterr {
-            bestfit = bettermodel
-            besterr = thiserr
-        }
-    }
-    increment iterations
-}
-return bestfit
-}}}
-"""
-    iterations = 0
-    bestfit = None
-    besterr = numpy.inf
-    bestin = 0
-    best_inlier_idxs = None
-    N=from_points.shape[0]
-    
- 
-    
-    while iterations < k:
-        maybe_idxs, test_idxs = random_partition(n,N)
-    
-        maybeinliers_from = from_points[maybe_idxs,:]
-        maybeinliers_to = to_points[maybe_idxs,:]
-          
-        test_points_from = from_points[test_idxs,:]
-        test_points_to = to_points[test_idxs,:]
-        maybemodel=model.fit(maybeinliers_from,maybeinliers_to)
-        maybe_errs = model.get_error(maybeinliers_from,maybeinliers_to,maybemodel)
-        good_errs=maybe_errs[maybe_errs < t]
-        if len(good_errs)>n-1: # only proceed if each of the test points meets the inlier criteria
-            
-            test_err = model.get_error( test_points_from,test_points_to, maybemodel)
-        
-        
-       
-            also_idxs = test_idxs[test_err < t] # select indices of rows with accepted points
-            alsoinliers_from = from_points[also_idxs,:]
-            alsoinliers_to = to_points[also_idxs,:]
-         
-        
-            if len(alsoinliers_from) > d:
-                if model.is_valid_transform(maybemodel):
-                    #print test_err[test_err < t]
-                    betterdata_from = numpy.concatenate( (maybeinliers_from, alsoinliers_from) )
-                    
-                    betterdata_to = numpy.concatenate( (maybeinliers_to, alsoinliers_to) )
-                    bettermodel=model.fit(betterdata_from,betterdata_to)
-                    better_errs = model.get_error( betterdata_from,betterdata_to, bettermodel)
-                    thiserr = numpy.mean( better_errs )
-                    thisin = len(also_idxs)
-                    if thisin > bestin:
-                        if debug:
-                            print better_errs[0:3]
-                            print maybe_errs
-                            print '\nbetter_errs.min()',better_errs.min()
-                            print 'better_errs.max()',better_errs.max()
-                            print 'numpy.mean(better_errs)',numpy.mean(better_errs)
-                            print 'iteration %d:len(alsoinliers) = %d'%(iterations,len(alsoinliers_from))
-                        bestfit = bettermodel
-                        besterr = thiserr
-                        bestin = thisin
-                        best_inlier_idxs = numpy.concatenate( (maybe_idxs, also_idxs) )
-        iterations+=1
-    if bestfit is None:
-        return None, []
-    if return_all:
-        
-        return bestfit, best_inlier_idxs
-    else:
-        return bestfit
-
-def random_partition(n,n_data):
-    """return n random rows of data (and also the other len(data)-n rows)"""
-    all_idxs = numpy.arange( n_data )
-    numpy.random.shuffle(all_idxs)
-    idxs1 = all_idxs[:n]
-    idxs2 = all_idxs[n:]
-    return idxs1, idxs2
-
-class LinModel:
-    def __init__(self,t=None,R=None):
-        self.t=t
-        self.R=R
-        
-class LinearModel:
-    def __init__(self, debug= False):
-        self.debug = debug
-        
-
-    def fit(self, from_points,to_points):
-      
-        t = numpy.zeros((1,from_points.shape[1]))
-        R = numpy.eye(from_points.shape[1])
-        return LinModel(t,R)
-        
-    def get_error( self, from_points,to_points,model):
-    
-        transformed_from_points=self.transform_points(from_points,model)
-     
-        # sum squared error per row
-        err_per_point = numpy.sqrt(numpy.sum((transformed_from_points-to_points)**2,axis=1))
-        
-        return err_per_point
-        
-    def transform_points(self,from_points,model):
-        N=from_points.shape[0]
-        
-     
-        rot_points=(numpy.dot(model.R,from_points.T)).T
-        transformed_from_points = rot_points + numpy.tile(model.t, (N, 1))
-        return transformed_from_points
-        
-    def calc_angle(self,model):
-        R=model.R;
-        print R
-        
-    def is_valid_transform(self,model):
-        return True
-
-class TranslationModel(LinearModel):
-    """transform between two N dimensional vector spaces using a simple translation"""
-    
-    def __init__(self, debug= False):
-        LinearModel.__init__(self,debug)
-      
-        
-    def fit(self, from_points,to_points):
-        
-        t = numpy.mean(to_points-from_points,0);
-        R = numpy.eye(from_points.shape[1]) 
-        return LinModel(t,R)
-        
-class RigidModel(LinearModel):
-    """transform between two N dimensional vector spaces using a rigid tranformation"""
-    
-    def __init__(self, debug= False):
-        LinearModel.__init__(self,debug)
-            
-    def fit(self, A,B):
-        assert len(A) == len(B)
-
-        N = A.shape[0]; # total points
-
-        centroid_A = numpy.mean(A, axis=0)
-        centroid_B = numpy.mean(B, axis=0)
-        
-        # centre the points
-        AA = A - numpy.tile(centroid_A, (N, 1))
-        BB = B - numpy.tile(centroid_B, (N, 1))
-
-        # dot is matrix multiplication for array
-        H = numpy.dot(numpy.transpose(AA) , BB)
-
-        U, S, Vt = numpy.linalg.svd(H)
-
-        R = numpy.dot( Vt.T , U.T)
-
-        # special reflection case
-        if numpy.linalg.det(R) < 0:
-           #print "Reflection detected"
-           #print Vt.shape
-           Vt[-1,:] *= -1
-           R = numpy.dot( Vt.T , U.T)
-
-        
-        t = -numpy.dot(R,centroid_A.T).T + centroid_B.T
-        #print ("centroid_A",centroid_A)       
-        #print ("t",t)
-        return LinModel(t,R)
-        
-
-       
-       
-class SimilarityModel(LinearModel):
-    """transform between two N dimensional vector spaces using a rigid tranformation"""
-    
-    def __init__(self, debug= False):
-        LinearModel.__init__(self,debug)
-        
-    def fit(self, from_points,to_points):
-        
-        t=numpy.mean(to_points-from_points,1);
-        R = numpy.eye(from_points.shape[1]) 
-        return LinModel(t,R)
-
-
-class AffineModel(LinearModel):
-
-
-    def __init__(self, max_det_change=.25,debug= False):
-        self.max_det_change=max_det_change
-        LinearModel.__init__(self,debug)
-        
-    def fit(self, A,B):
-        assert len(A) == len(B)
-
-        N = A.shape[0]; # total points
-        
-        M= numpy.zeros((2*N,6))
-        Y = numpy.zeros((2*N,1))
-        for i in range(N):
-            M[2*i,:]=[A[i,0],A[i,1],0,0,1,0]
-            M[2*i+1,:]=[0,0,A[i,0],A[i,1],0,1]
-            Y[2*i]=B[i,0]
-            Y[2*i+1]=B[i,1]
-            
-        (Tvec,residuals,rank,s)=numpy.linalg.lstsq(M,Y)
-              
-        
-        t=numpy.array([Tvec[4,0],Tvec[5,0]])
-        R = numpy.array([[Tvec[0,0],Tvec[1,0]],[Tvec[2,0],Tvec[3,0]]])
-        
-        return LinModel(t,R)
-        
-    def is_valid_transform(self,model):
-        if numpy.abs(numpy.linalg.det(model.R)-1)>self.max_det_change:
-            return False
-        else:
-            return True
-        
-        
-class LinearLeastSquaresModel:
-    """linear system solved using linear least squares
-
-    This class serves as an example that fulfills the model interface
-    needed by the ransac() function.
-    
-    """
-    def __init__(self,input_columns,output_columns,debug=False):
-        self.input_columns = input_columns
-        self.output_columns = output_columns
-        self.debug = debug
-    def fit(self, data):
-        A = numpy.vstack([data[:,i] for i in self.input_columns]).T
-        B = numpy.vstack([data[:,i] for i in self.output_columns]).T
-        x,resids,rank,s = scipy.linalg.lstsq(A,B)
-        return x
-    def get_error( self, data, model):
-        A = numpy.vstack([data[:,i] for i in self.input_columns]).T
-        B = numpy.vstack([data[:,i] for i in self.output_columns]).T
-        B_fit = scipy.dot(A,model)
-        err_per_point = numpy.sum((B-B_fit)**2,axis=1) # sum squared error per row
-        return err_per_point
-
+import numpy
+
+## Copyright (c) 2004-2007, Andrew D. Straw. All rights reserved.
+
+## Redistribution and use in source and binary forms, with or without
+## modification, are permitted provided that the following conditions are
+## met:
+
+##     * Redistributions of source code must retain the above copyright
+##       notice, this list of conditions and the following disclaimer.
+
+##     * Redistributions in binary form must reproduce the above
+##       copyright notice, this list of conditions and the following
+##       disclaimer in the documentation and/or other materials provided
+##       with the distribution.
+
+##     * Neither the name of the Andrew D. Straw nor the names of its
+##       contributors may be used to endorse or promote products derived
+##       from this software without specific prior written permission.
+
+## THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+## "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+## LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+## A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+## OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+## SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+## LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+## DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+## THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+## (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+## OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+#how many times batch_ransac refits its result to the inliers of the last fit before settling for it
+REFIT_ROUNDS = 3
+#AffineModel.fit treats points whose spread is flatter than this, the determinant of their scatter matrix over
+#the square of its mean eigenvalue, as lying on a line, and fits them by least squares rather than the normal equations
+AFFINE_MIN_SPREAD = 1e-10
+
+def ransac(from_points,to_points,model,n,k,t,d,debug=False,return_all=False):
+    """fit model parameters to data using the RANSAC algorithm
+    
+This implementation written from pseudocode found at
+http://en.wikipedia.org/w/index.php?title=RANSAC&oldid=116358182
+
+{{{
+Given:
+    data - a set of observed data points
+    model - a model that can be fitted to data points
+    n - the minimum number of data values required to fit the model
+    k - the maximum number of iterations allowed in the algorithm
+    t - a threshold value for determining when a data point fits a model
+    d - the number of close data values required to assert that a model fits well to data
+Return:
+    bestfit - model parameters which best fit the data (or nil if no good model is found)
+iterations = 0
+bestfit = nil
+besterr = something really large
+while iterations < k {
+    maybeinliers = n randomly selected values from data
+    maybemodel = model parameters fitted to maybeinliers
+    alsoinliers = empty set
+    for every point in data not in maybeinliers {
+        if point fits maybemodel with an error smaller than t
+             add point to alsoinliers
+    }
+    if the number of elements in alsoinliers is > d {
+        % this implies that we may have found a good model
+        % now test how good it is
+        bettermodel = model parameters fitted to all points in maybeinliers and alsoinliers
+        thiserr = a measure of how well model fits these points
+        if thiserr < besterr {
+            bestfit = bettermodel
+            besterr = thiserr
+        }
+    }
+    increment iterations
+}
+return bestfit
+}}}
+"""
+    iterations = 0
+    bestfit = None
+    besterr = numpy.inf
+    bestin = 0
+    best_inlier_idxs = None
+    N=from_points.shape[0]
+    
+ 
+    
+    while iterations < k:
+        maybe_idxs, test_idxs = random_partition(n,N)
+    
+        maybeinliers_from = from_points[maybe_idxs,:]
+        maybeinliers_to = to_points[maybe_idxs,:]
+          
+        test_points_from = from_points[test_idxs,:]
+        test_points_to = to_points[test_idxs,:]
+        maybemodel=model.fit(maybeinliers_from,maybeinliers_to)
+        maybe_errs = model.get_error(maybeinliers_from,maybeinliers_to,maybemodel)
+        good_errs=maybe_errs[maybe_errs < t]
+        if len(good_errs)>n-1: # only proceed if each of the test points meets the inlier criteria
+            
+            test_err = model.get_error( test_points_from,test_points_to, maybemodel)
+        
+        
+       
+            also_idxs = test_idxs[test_err < t] # select indices of rows with accepted points
+            alsoinliers_from = from_points[also_idxs,:]
+            alsoinliers_to = to_points[also_idxs,:]
+         
+        
+            if len(alsoinliers_from) > d:
+                if model.is_valid_transform(maybemodel):
+                    #print test_err[test_err < t]
+                    betterdata_from = numpy.concatenate( (maybeinliers_from, alsoinliers_from) )
+                    
+                    betterdata_to = numpy.concatenate( (maybeinliers_to, alsoinliers_to) )
+                    bettermodel=model.fit(betterdata_from,betterdata_to)
+                    better_errs = model.get_error( betterdata_from,betterdata_to, bettermodel)
+                    thiserr = numpy.mean( better_errs )
+                    thisin = len(also_idxs)
+                    if thisin > bestin:
+                        if debug:
+                            print better_errs[0:3]
+                            print maybe_errs
+                            print '\nbetter_errs.min()',better_errs.min()
+                            print 'better_errs.max()',better_errs.max()
+                            print 'numpy.mean(better_errs)',numpy.mean(better_errs)
+                            print 'iteration %d:len(alsoinliers) = %d'%(iterations,len(alsoinliers_from))
+                        bestfit = bettermodel
+                        besterr = thiserr
+                        bestin = thisin
+                        best_inlier_idxs = numpy.concatenate( (maybe_idxs, also_idxs) )
+        iterations+=1
+    if bestfit is None:
+        return None, []
+    if return_all:
+        
+        return bestfit, best_inlier_idxs
+    else:
+        return bestfit
+
+def batch_ransac(from_points,to_points,model,n,k,t,d,batch_size=64,confidence=0.99,debug=False,return_all=False):
+    """fit model parameters to data using RANSAC as ransac does, but fitting and scoring batch_size random
+    samples at a time with a few array operations, and stopping once enough samples have been tried that one of
+    them was all inliers with the given confidence, going by the largest fraction of inliers found so far
+
+    the model has to have fit_batch and transform_batch, as the Translation, Rigid, Similarity and Affine models do,
+    whose fit_batch solves every sample at once in closed form, and n is usually the model's min_points.
+    the best sample's model is finished with a least squares fit to all of its inliers, which is repeated on the
+    inliers of that fit until they stop changing, up to REFIT_ROUNDS times
+
+    keywords)
+    from_points,to_points) N x dim arrays of the corresponding points
+    model) the model to fit
+    n) the minimum number of data values required to fit the model
+    k) the most samples to try
+    t) a threshold value for determining when a data point fits a model
+    d) the number of close data values besides the sample required to assert that a model fits well to data
+    batch_size) the number of samples to fit and score at a time
+    confidence) the probability of having drawn a sample of n inliers at which to stop early
+
+    returns) bestfit, or (bestfit,best_inlier_idxs) if return_all, best_inlier_idxs being the points bestfit was
+    fit to, and bestfit None if no good model is found
+    """
+    N=from_points.shape[0]
+    best_count=0
+    best_inlier_idxs=None
+    iterations=0
+    needed=k
+    while N>=n and iterations<min(k,needed):
+        H=min(batch_size,k-iterations)
+        #n different points for each sample
+        samples=numpy.argpartition(numpy.random.rand(H,N),n-1,axis=1)[:,:n]
+        #degenerate samples, e.g. collinear ones for an affine model, give models that nothing fits
+        with numpy.errstate(divide='ignore',invalid='ignore'):
+            (R,trans)=model.fit_batch(from_points[samples],to_points[samples])
+            errs=numpy.sqrt(numpy.sum((model.transform_batch(from_points,R,trans)-to_points)**2,axis=2))
+            inliers=errs<t
+        counts=inliers.sum(axis=1)
+        #only samples whose own points all fit, with more than d other points fitting as well, count
+        ok=inliers[numpy.arange(H)[:,numpy.newaxis],samples].all(axis=1)&(counts-n>d)&model.is_valid_batch(R)
+        if ok.any():
+            h=numpy.argmax(numpy.where(ok,counts,-1))
+            if counts[h]>best_count:
+                best_count=counts[h]
+                best_inlier_idxs=numpy.nonzero(inliers[h])[0]
+                #the number of samples needed to have drawn one all inlier sample with the given confidence
+                w=best_count/float(N)
+                if w>=1:
+                    needed=0
+                else:
+                    needed=numpy.log(1-confidence)/numpy.log(1-w**n)
+        iterations+=H
+    if debug:
+        print 'batch_ransac: %d samples, %d of %d points inliers'%(iterations,best_count,N)
+    if best_inlier_idxs is None:
+        if return_all:
+            return None, []
+        return None
+    for refit in range(REFIT_ROUNDS):
+        bestfit=model.fit(from_points[best_inlier_idxs,:],to_points[best_inlier_idxs,:])
+        inlier_idxs=numpy.nonzero(model.get_error(from_points,to_points,bestfit)<t)[0]
+        if len(inlier_idxs)<n or numpy.array_equal(inlier_idxs,best_inlier_idxs) or refit==REFIT_ROUNDS-1:
+            break
+        best_inlier_idxs=inlier_idxs
+    if return_all:
+        return bestfit, best_inlier_idxs
+    else:
+        return bestfit
+
+def random_partition(n,n_data):
+    """return n random rows of data (and also the other len(data)-n rows)"""
+    all_idxs = numpy.arange( n_data )
+    numpy.random.shuffle(all_idxs)
+    idxs1 = all_idxs[:n]
+    idxs2 = all_idxs[n:]
+    return idxs1, idxs2
+
+class LinModel:
+    def __init__(self,t=None,R=None):
+        self.t=t
+        self.R=R
+
+def centre_points(A,B):
+    """the centroids of stacks of H samples of n points, H x n x dim arrays A and B, and the points relative to them"""
+    centroid_A = numpy.mean(A, axis=1)
+    centroid_B = numpy.mean(B, axis=1)
+    return (centroid_A,centroid_B,A-centroid_A[:,numpy.newaxis,:],B-centroid_B[:,numpy.newaxis,:])
+
+def rotation_sums(AA,BB):
+    """the sums over each sample of the dot and cross products of centred 2d points AA and BB, H x n x 2 arrays,
+    the rotation which best takes AA onto BB being arctan2(cross,dot)"""
+    dot = numpy.sum(AA[:,:,0]*BB[:,:,0]+AA[:,:,1]*BB[:,:,1],axis=1)
+    cross = numpy.sum(AA[:,:,0]*BB[:,:,1]-AA[:,:,1]*BB[:,:,0],axis=1)
+    return (dot,cross)
+
+def rotation_matrices(c,s):
+    """H x 2 x 2 stack of [[c,-s],[s,c]] for arrays c and s"""
+    return numpy.array([[c,-s],[s,c]]).transpose(2,0,1)
+        
+class LinearModel:
+    #the number of points it takes to fit the model
+    min_points = 1
+
+    def __init__(self, debug= False):
+        self.debug = debug
+        
+
+    def fit(self, from_points,to_points):
+      
+        t = numpy.zeros((1,from_points.shape[1]))
+        R = numpy.eye(from_points.shape[1])
+        return LinModel(t,R)
+        
+    def get_error( self, from_points,to_points,model):
+    
+        transformed_from_points=self.transform_points(from_points,model)
+     
+        # sum squared error per row
+        err_per_point = numpy.sqrt(numpy.sum((transformed_from_points-to_points)**2,axis=1))
+        
+        return err_per_point
+        
+    def transform_points(self,from_points,model):
+        N=from_points.shape[0]
+        
+     
+        rot_points=(numpy.dot(model.R,from_points.T)).T
+        transformed_from_points = rot_points + numpy.tile(model.t, (N, 1))
+        return transformed_from_points
+        
+    def transform_batch(self,from_points,R,t):
+        """from_points transformed by each of a stack of models given as H x dim x dim R and H x dim t, H x N x dim"""
+        return numpy.einsum('hij,nj->hni',R,from_points)+t[:,numpy.newaxis,:]
+
+    def calc_angle(self,model):
+        R=model.R;
+        print R
+        
+    def is_valid_transform(self,model):
+        return True
+
+    def is_valid_batch(self,R):
+        """is_valid_transform for a stack of H x dim x dim R, as an array of H booleans"""
+        return numpy.ones(R.shape[0],bool)
+
+class TranslationModel(LinearModel):
+    """transform between two N dimensional vector spaces using a simple translation"""
+    
+    def __init__(self, debug= False):
+        LinearModel.__init__(self,debug)
+      
+        
+    def fit(self, from_points,to_points):
+        
+        t = numpy.mean(to_points-from_points,0);
+        R = numpy.eye(from_points.shape[1]) 
+        return LinModel(t,R)
+
+    def fit_batch(self, from_points,to_points):
+        """fit a stack of H samples of n points, H x n x dim arrays, returns H x dim x dim R and H x dim t"""
+        (H,n,dim) = from_points.shape
+        t = numpy.mean(to_points-from_points,1)
+        R = numpy.tile(numpy.eye(dim),(H,1,1))
+        return (R,t)
+        
+class RigidModel(LinearModel):
+    """transform between two N dimensional vector spaces using a rigid tranformation"""
+    min_points = 2
+    
+    def __init__(self, debug= False):
+        LinearModel.__init__(self,debug)
+            
+    def fit(self, A,B):
+        assert len(A) == len(B)
+
+        N = A.shape[0]; # total points
+
+        centroid_A = numpy.mean(A, axis=0)
+        centroid_B = numpy.mean(B, axis=0)
+        
+        # centre the points
+        AA = A - numpy.tile(centroid_A, (N, 1))
+        BB = B - numpy.tile(centroid_B, (N, 1))
+
+        # dot is matrix multiplication for array
+        H = numpy.dot(numpy.transpose(AA) , BB)
+
+        U, S, Vt = numpy.linalg.svd(H)
+
+        R = numpy.dot( Vt.T , U.T)
+
+        # special reflection case
+        if numpy.linalg.det(R) < 0:
+           #print "Reflection detected"
+           #print Vt.shape
+           Vt[-1,:] *= -1
+           R = numpy.dot( Vt.T , U.T)
+
+        
+        t = -numpy.dot(R,centroid_A.T).T + centroid_B.T
+        #print ("centroid_A",centroid_A)       
+        #print ("t",t)
+        return LinModel(t,R)
+
+    def fit_batch(self, A,B):
+        """fit a stack of H samples of n points, H x n x dim arrays, returns H x dim x dim R and H x dim t,
+        in closed form in 2d and by SVD otherwise"""
+        (centroid_A,centroid_B,AA,BB) = centre_points(A,B)
+        if A.shape[2] == 2:
+            (dot,cross) = rotation_sums(AA,BB)
+            theta = numpy.arctan2(cross,dot)
+            R = rotation_matrices(numpy.cos(theta),numpy.sin(theta))
+            t = centroid_B - numpy.einsum('hij,hj->hi',R,centroid_A)
+            return (R,t)
+
+        H = numpy.einsum('hni,hnj->hij',AA,BB)
+
+        U, S, Vt = numpy.linalg.svd(H)
+        R = numpy.matmul(Vt.transpose(0,2,1),U.transpose(0,2,1))
+
+        # special reflection case
+        reflected = numpy.linalg.det(R) < 0
+        if reflected.any():
+            Vt[reflected,-1,:] *= -1
+            R[reflected] = numpy.matmul(Vt[reflected].transpose(0,2,1),U[reflected].transpose(0,2,1))
+
+        t = centroid_B - numpy.einsum('hij,hj->hi',R,centroid_A)
+        return (R,t)
+        
+
+       
+       
+class SimilarityModel(LinearModel):
+    """transform between two 2 dimensional vector spaces using a rigid tranformation and a scaling equal in x and y"""
+    min_points = 2
+    
+    def __init__(self, debug= False):
+        LinearModel.__init__(self,debug)
+        
+    def fit(self, from_points,to_points):
+        (R,t) = self.fit_batch(from_points[numpy.newaxis],to_points[numpy.newaxis])
+        return LinModel(t[0],R[0])
+
+    def fit_batch(self, A,B):
+        """least squares fit of a stack of H samples of n points, H x n x 2 arrays, returns H x 2 x 2 R and H x 2 t"""
+        (centroid_A,centroid_B,AA,BB) = centre_points(A,B)
+        (dot,cross) = rotation_sums(AA,BB)
+        norm = numpy.sum(AA*AA,axis=(1,2))
+        R = rotation_matrices(dot/norm,cross/norm)
+        t = centroid_B - numpy.einsum('hij,hj->hi',R,centroid_A)
+        return (R,t)
+
+
+class AffineModel(LinearModel):
+    """transform between two 2 dimensional vector spaces using a general linear transformation and a translation"""
+    min_points = 3
+
+    def __init__(self, max_det_change=.25,debug= False):
+        self.max_det_change=max_det_change
+        LinearModel.__init__(self,debug)
+        
+    def fit(self, A,B):
+        assert len(A) == len(B)
+        AA = A - numpy.mean(A,axis=0)
+        S = numpy.dot(AA.T,AA)
+        if numpy.linalg.det(S) > AFFINE_MIN_SPREAD*(numpy.trace(S)/2.0)**2:
+            (R,t) = self.fit_batch(A[numpy.newaxis],B[numpy.newaxis])
+            return LinModel(t[0],R[0])
+        #collinear (or too few) points don't pin down a linear transformation, so take the minimum norm one
+        M = numpy.hstack([A,numpy.ones((A.shape[0],1))])
+        (Tvec,residuals,rank,s) = numpy.linalg.lstsq(M,B,rcond=-1)
+        return LinModel(Tvec[2],Tvec[:2].T)
+
+    def fit_batch(self, A,B):
+        """least squares fit of a stack of H samples of n points, H x n x 2 arrays, returns H x 2 x 2 R and H x 2 t,
+        from the normal equations R = (BB^T AA)(AA^T AA)^-1 of the centred points with the 2x2 inverse written out"""
+        (centroid_A,centroid_B,AA,BB) = centre_points(A,B)
+        S = numpy.einsum('hni,hnj->hij',AA,AA)
+        C = numpy.einsum('hni,hnj->hij',BB,AA)
+        det = S[:,0,0]*S[:,1,1]-S[:,0,1]*S[:,1,0]
+        inverse = numpy.array([[S[:,1,1],-S[:,0,1]],[-S[:,1,0],S[:,0,0]]]).transpose(2,0,1)/det[:,numpy.newaxis,numpy.newaxis]
+        R = numpy.matmul(C,inverse)
+        t = centroid_B - numpy.einsum('hij,hj->hi',R,centroid_A)
+        return (R,t)
+        
+    def is_valid_transform(self,model):
+        if numpy.abs(numpy.linalg.det(model.R)-1)>self.max_det_change:
+            return False
+        else:
+            return True
+
+    def is_valid_batch(self,R):
+        with numpy.errstate(invalid='ignore'):
+            det = R[:,0,0]*R[:,1,1]-R[:,0,1]*R[:,1,0]
+            return numpy.isfinite(det)&(numpy.abs(det-1)<=self.max_det_change)
+        
+        
+class LinearLeastSquaresModel:
+    """linear system solved using linear least squares
+
+    This class serves as an example that fulfills the model interface
+    needed by the ransac() function.
+    
+    """
+    def __init__(self,input_columns,output_columns,debug=False):
+        self.input_columns = input_columns
+        self.output_columns = output_columns
+        self.debug = debug
+    def fit(self, data):
+        A = numpy.vstack([data[:,i] for i in self.input_columns]).T
+        B = numpy.vstack([data[:,i] for i in self.output_columns]).T
+        x,resids,rank,s = scipy.linalg.lstsq(A,B)
+        return x
+    def get_error( self, data, model):
+        A = numpy.vstack([data[:,i] for i in self.input_columns]).T
+        B = numpy.vstack([data[:,i] for i in self.output_columns]).T
+        B_fit = scipy.dot(A,model)
+        err_per_point = numpy.sum((B-B_fit)**2,axis=1) # sum squared error per row
+        return err_per_point
+